@@ -0,0 +1,259 @@
+import os
+import yaml
+from typing import Dict, Any, List, Tuple, Optional
+
+from rasterizer import MAP_TYPES
+from roi_filter import ROI_TYPES
+
+
+# 노이즈 제거 알고리즘별 필수 파라미터: 이름 -> (타입, 최솟값)
+ALGORITHM_PARAMS: Dict[str, Dict[str, Tuple[type, float]]] = {
+    'statistical': {'nb_neighbors': (int, 1), 'std_ratio': (float, 0)},
+    'radius': {'nb_points': (int, 0), 'radius': (float, 0)},
+    'none': {},
+}
+
+# 선택 항목 섹션의 키별 타입. 섹션이 있으면 모든 키가 필요하다.
+OPTIONAL_SECTIONS: Dict[str, Dict[str, type]] = {
+    'batch_settings': {'use_batch': bool, 'inputs': list, 'output_dir': str, 'workers': int},
+    'batch_settings.job_queue': {'use_job_queue': bool, 'path': str, 'max_attempts': int},
+    'write_queue': {'use_queue': bool, 'workers': int, 'max_pending': int},
+    'algorithm_settings.noise_removal.tiling': {'use_tiling': bool, 'tiles': list, 'workers': int},
+    'algorithm_settings.noise_removal.cache': {'use_cache': bool, 'path': str, 'max_size_mb': float},
+    'algorithm_settings.noise_sweep': {'use_sweep': bool, 'write_maps': bool, 'grids': dict},
+    'algorithm_settings.streaming': {'use_streaming': bool, 'chunk_size': int},
+    'algorithm_settings.roi': {'use_roi': bool, 'type': str},
+    'algorithm_settings.voxel_downsample': {'use_voxel': bool},
+    'algorithm_settings.z_buffer': {'use_z_buffer': bool, 'nearest': bool},
+    'algorithm_settings.low_memory': {'use_low_memory': bool, 'max_memory_mb': float},
+    'algorithm_settings.views': {'use_views': bool, 'image_size': list, 'views': list},
+    'algorithm_settings.pyramid': {'use_pyramid': bool, 'image_size': list, 'min_size': int},
+    'algorithm_settings.sparse_tiles': {'use_sparse_tiles': bool, 'image_size': list, 'tile_size': int},
+    'algorithm_settings.frame_stream': {'use_frame_stream': bool, 'frames': str, 'emit_every': int},
+}
+
+
+class ConfigError(ValueError):
+    def __init__(self, path: str, errors: List[str]) -> None:
+        """설정 파일 검증에서 발견한 모든 문제를 한 번에 전달하는 예외.
+
+        Args:
+            path   : 설정 파일 경로.
+            errors : 문제 목록.
+
+        """
+        super().__init__(f"Invalid config {path}: " + '; '.join(errors))
+        self.errors: List[str] = errors
+
+
+def _is_type(value: Any, kind: type) -> bool:
+    """YAML 값의 타입을 확인한다. bool은 int가 아니며, float 자리에는 int도 허용한다."""
+    if kind is bool:
+        return isinstance(value, bool)
+    if kind in (int, float) and isinstance(value, bool):
+        return False
+    if kind is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, kind)
+
+
+def _lookup(data: Dict[str, Any], dotted: str) -> Any:
+    """'a.b.c' 형태의 키로 중첩된 값을 찾는다. 없으면 None."""
+    for key in dotted.split('.'):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+class AppConfig:
+    def __init__(self, path: str) -> None:
+        """YAML 설정 파일을 한 번만 읽고 스키마로 검증한 설정 객체.
+
+        필요한 키, 값의 타입, 알고리즘별 필수 파라미터를 파일을 읽는 시점에 모두 확인하므로,
+        잘못된 설정은 포인트 클라우드를 읽기 전에 ConfigError로 실패한다.
+        reload_if_changed는 파일 수정 시간(mtime)이 바뀐 경우에만 다시 읽으므로,
+        상주 서비스나 배치 처리에서 작업마다 호출해도 비용이 거의 없다.
+
+        Args:
+            path : YAML 설정 파일 경로.
+        Raises:
+            ConfigError: 설정 값에 문제가 있는 경우.
+
+        """
+        self.path: str = path
+        self.mtime_ns: int = 0
+        self.data: Dict[str, Any] = {}  # 검증된 원본 설정 값 (기존 Dict 인터페이스용)
+
+        self.input_paths: List[Dict[str, str]] = []
+        self.map_paths: Dict[str, str] = {}
+        self.log_path: str = ''
+        self.use_file: bool = True
+        self.use_print: bool = True
+        self.metrics_path: Optional[str] = None
+        self.rate_limit: Optional[float] = None
+        self.algorithm: str = ''
+        self.params: Dict[str, Any] = {}
+        self.projection_vector: List[float] = []
+        self.image_size: Tuple[int, int] = (100, 100)
+        self.load()
+
+    def load(self) -> None:
+        """설정 파일을 읽고 검증한 뒤 값들을 갱신한다. 검증에 실패하면 기존 값은 바뀌지 않는다.
+
+        Args:
+            없음.
+        Returns:
+            없음.
+        Raises:
+            ConfigError: 설정 값에 문제가 있는 경우.
+
+        """
+        mtime_ns: int = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'r', encoding='UTF8') as file:
+            data: Any = yaml.safe_load(file)
+
+        errors: List[str] = self.validate(data)
+        if errors:
+            raise ConfigError(self.path, errors)
+
+        log: Dict[str, Any] = data['log_settings']
+        noise_removal: Dict[str, Any] = data['algorithm_settings']['noise_removal']
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.input_paths = data['3Dfile_paths']
+        self.map_paths = data['2Dfile_paths']
+        self.log_path = log['path']
+        self.use_file = log['use_file']
+        self.use_print = log['use_print']
+        self.metrics_path = log.get('metrics_path', 'log/metrics.jsonl') if log.get('use_metrics', False) else None
+        self.rate_limit = log.get('rate_limit')
+        self.algorithm = noise_removal['algorithms']
+        self.params = noise_removal.get('params') or {}
+        self.projection_vector = [float(v) for v in data['algorithm_settings']['projection_vector']]
+        self.image_size = tuple(data['algorithm_settings'].get('image_size', [100, 100]))
+
+    def reload_if_changed(self) -> bool:
+        """파일 수정 시간이 바뀐 경우에만 다시 읽는다.
+
+        Args:
+            없음.
+        Returns:
+            다시 읽은 경우 True.
+        Raises:
+            ConfigError: 바뀐 설정 값에 문제가 있는 경우. 이때 기존 값은 그대로 유지된다.
+
+        """
+        if os.stat(self.path).st_mtime_ns == self.mtime_ns:
+            return False
+        self.load()
+        return True
+
+    def validate(self, data: Any) -> List[str]:
+        """설정 값을 스키마와 비교하여 발견한 모든 문제를 반환한다.
+
+        Args:
+            data : YAML에서 읽은 설정 값.
+        Returns:
+            문제 목록. 문제가 없으면 빈 목록.
+
+        """
+        if not isinstance(data, dict):
+            return ['config must be a mapping']
+        errors: List[str] = []
+
+        def require(dotted: str, kind: type) -> Any:
+            value: Any = _lookup(data, dotted)
+            if value is None:
+                errors.append(f"missing key '{dotted}'")
+            elif not _is_type(value, kind):
+                errors.append(f"'{dotted}' must be {kind.__name__}, got {type(value).__name__}")
+                return None
+            return value
+
+        for entry in require('3Dfile_paths', list) or []:
+            if not isinstance(entry, dict) or not isinstance(entry.get('path'), str) or 'type' not in entry:
+                errors.append(f"'3Dfile_paths' entries need 'type' and 'path': {entry}")
+
+        for name, path in (require('2Dfile_paths', dict) or {}).items():
+            if name not in MAP_TYPES:
+                errors.append(f"unknown map '2Dfile_paths.{name}' (available: {', '.join(MAP_TYPES)})")
+            if not isinstance(path, str) or not path:
+                errors.append(f"'2Dfile_paths.{name}' must be a non-empty path")
+
+        require('log_settings.path', str)
+        require('log_settings.use_file', bool)
+        require('log_settings.use_print', bool)
+        if _lookup(data, 'log_settings.use_metrics') is not None:
+            require('log_settings.use_metrics', bool)
+        rate_limit: Any = _lookup(data, 'log_settings.rate_limit')
+        if rate_limit is not None and (not _is_type(rate_limit, float) or rate_limit <= 0):
+            errors.append(f"'log_settings.rate_limit' must be a positive number or null, got {rate_limit!r}")
+
+        algorithm: Any = require('algorithm_settings.noise_removal.algorithms', str)
+        if algorithm is not None and algorithm not in ALGORITHM_PARAMS:
+            errors.append(f"unknown algorithm '{algorithm}' (available: {', '.join(ALGORITHM_PARAMS)})")
+        elif algorithm is not None:
+            params: Any = _lookup(data, 'algorithm_settings.noise_removal.params') or {}
+            if not isinstance(params, dict):
+                errors.append("'algorithm_settings.noise_removal.params' must be dict")
+                params = {}
+            for key, (kind, minimum) in ALGORITHM_PARAMS[algorithm].items():
+                value: Any = params.get(key)
+                if value is None:
+                    errors.append(f"'{algorithm}' needs 'algorithm_settings.noise_removal.params.{key}'")
+                elif not _is_type(value, kind) or value < minimum or (kind is float and value == minimum):
+                    bound: str = f"> {minimum}" if kind is float else f">= {minimum}"  # float 파라미터는 0 초과
+                    errors.append(f"'params.{key}' must be {kind.__name__} {bound}, got {value!r}")
+
+        vector: Any = require('algorithm_settings.projection_vector', list)
+        if vector is not None and (len(vector) != 3 or not all(_is_type(v, float) for v in vector) or not any(vector)):
+            errors.append(f"'algorithm_settings.projection_vector' must be 3 numbers, not all zero: {vector}")
+
+        image_size: Any = _lookup(data, 'algorithm_settings.image_size')
+        if image_size is not None and (not isinstance(image_size, list) or len(image_size) != 2
+                                       or not all(_is_type(v, int) and v > 0 for v in image_size)):
+            errors.append(f"'algorithm_settings.image_size' must be 2 positive ints: {image_size}")
+
+        for section, keys in OPTIONAL_SECTIONS.items():
+            if _lookup(data, section) is None:
+                continue
+            for key, kind in keys.items():
+                value = require(f'{section}.{key}', kind)
+                if kind is int and value is not None and value < 1:
+                    errors.append(f"'{section}.{key}' must be >= 1, got {value}")
+
+        for key, kind in (('voxel_size', float), ('target_points', int), ('time_budget', float)):
+            value = _lookup(data, f'algorithm_settings.voxel_downsample.{key}')
+            if value is not None and (not _is_type(value, kind) or value <= 0):
+                errors.append(f"'algorithm_settings.voxel_downsample.{key}' must be a positive {kind.__name__} or null, got {value!r}")
+        voxel: Any = _lookup(data, 'algorithm_settings.voxel_downsample')
+        if isinstance(voxel, dict) and voxel.get('use_voxel') and not any(voxel.get(key) for key in ('voxel_size', 'target_points', 'time_budget')):
+            errors.append("'algorithm_settings.voxel_downsample' needs voxel_size, target_points or time_budget")
+
+        for key in ('backoff', 'lease'):
+            value = _lookup(data, f'batch_settings.job_queue.{key}')
+            if value is not None and (not _is_type(value, float) or value < 0):
+                errors.append(f"'batch_settings.job_queue.{key}' must be a non-negative number, got {value!r}")
+
+        roi: Any = _lookup(data, 'algorithm_settings.roi')
+        if isinstance(roi, dict) and isinstance(roi.get('type'), str):
+            if roi['type'] not in ROI_TYPES:
+                errors.append(f"'algorithm_settings.roi.type' must be one of {', '.join(ROI_TYPES)}, got '{roi['type']}'")
+            elif roi.get('use_roi'):
+                missing: List[str] = [key for key in ROI_TYPES[roi['type']] if roi.get(key) is None]
+                if missing:
+                    errors.append(f"'algorithm_settings.roi' type '{roi['type']}' needs {', '.join(missing)}")
+
+        tiles: Any = _lookup(data, 'algorithm_settings.noise_removal.tiling.tiles')
+        if isinstance(tiles, list) and (len(tiles) != 3 or not all(_is_type(v, int) and v > 0 for v in tiles)):
+            errors.append(f"'algorithm_settings.noise_removal.tiling.tiles' must be 3 positive ints: {tiles}")
+
+        grids: Any = _lookup(data, 'algorithm_settings.noise_sweep.grids')
+        for name, grid in (grids if isinstance(grids, dict) else {}).items():
+            if name not in ALGORITHM_PARAMS or name == 'none':
+                errors.append(f"unknown sweep algorithm '{name}'")
+            elif not isinstance(grid, dict) or any(not isinstance(grid.get(key), list) for key in ALGORITHM_PARAMS[name]):
+                errors.append(f"sweep grid '{name}' needs lists for {', '.join(ALGORITHM_PARAMS[name])}")
+
+        return errors
@@ -0,0 +1,307 @@
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+from multiprocessing import util
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from data_processing import DataProcessing
+from map_writer import split_ext
+from job_queue import JobQueue, config_digest
+from write_queue import WriteQueue
+
+
+_worker_dp: Optional[DataProcessing] = None  # 워커 프로세스마다 한 번만 생성하는 DataProcessing
+
+
+def _init_worker(write_queue: Optional[Dict[str, Any]] = None) -> None:
+    """워커 프로세스 시작 시 DataProcessing 인스턴스를 한 번만 생성한다.
+    write_queue.use_queue가 true이면 저장 큐를 시작하여, 한 파일의 맵을 저장하는 동안 다음 파일을 처리한다.
+    큐에 남은 맵은 워커 프로세스가 종료될 때 모두 저장된다."""
+    global _worker_dp
+    _worker_dp = DataProcessing()
+    if write_queue and write_queue.get('use_queue', False):
+        _worker_dp.dm.start_write_queue(write_queue.get('workers', 2), write_queue.get('max_pending', 8))
+        util.Finalize(_worker_dp.dm, _worker_dp.dm.close_write_queue, exitpriority=10)
+
+
+def _process_file(
+        path: str,
+        algorithm: str,
+        params: Dict[str, Any],
+        cache: Optional[Dict[str, Any]],
+        projection_vector: List[float],
+        map_paths: Dict[str, str],
+        image_size: List[int]
+    ) -> Dict[str, Any]:
+    """파일 하나에 대해 load_cloud(remove_noise) -> project_to_2d -> create_maps 파이프라인을 실행한다.
+    에러가 발생해도 예외를 밖으로 던지지 않고 결과에 기록하여, 한 파일의 실패가 배치 전체를 멈추지 않게 한다.
+    저장 큐를 사용하는 경우 맵 저장이 끝나기 전에 반환하므로, 저장 실패는 _run_queue_worker에서 큐를 비운 뒤 확인한다.
+
+    Args:
+        path              : 처리할 PCD 또는 PLY 파일 경로.
+        algorithm         : 노이즈 제거 알고리즘.
+        params            : 노이즈 제거 알고리즘 파라미터.
+        cache             : 노이즈 제거 결과 캐시 설정.
+        projection_vector : 투영 벡터.
+        map_paths         : 이 파일에 대한 맵 이름과 저장 경로.
+        image_size        : 맵 이미지 크기.
+    Returns:
+        파일 경로, 저장 경로, 포인트 개수, 처리 시간, 에러 메세지를 담은 딕셔너리.
+
+    """
+    dp: DataProcessing = _worker_dp if _worker_dp is not None else DataProcessing()
+    result: Dict[str, Any] = {'path': path, 'outputs': {}, 'points': 0, 'seconds': 0.0, 'error': None}
+    start: float = time.perf_counter()
+
+    try:
+        img_3d = dp.load_cloud(path, algorithm=algorithm, params=params, cache=cache)
+        result['points'] = len(img_3d) if isinstance(img_3d, np.ndarray) else len(img_3d.points)
+        projected_points: np.ndarray = dp.project_to_2d(img_3d, projection_vector=np.array(projection_vector))
+        dp.create_maps(projected_points, map_paths=map_paths, image_size=tuple(image_size))
+        result['outputs'] = map_paths
+    except Exception as e:
+        dp.dm.cm.logger.exception(f"Batch file failed: {path}--> {e}", name="[BatchProcessor] ")
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _run_queue_worker(
+        job_queue: Dict[str, Any],
+        algorithm: str,
+        params: Dict[str, Any],
+        cache: Optional[Dict[str, Any]],
+        projection_vector: List[float],
+        image_size: List[int]
+    ) -> List[Dict[str, Any]]:
+    """작업 큐에서 파일을 하나씩 가져와 처리하고 결과를 큐에 기록한다.
+    가져올 작업이 없으면 재시도를 기다리는 작업이나 다른 워커가 처리 중인(running) 작업이 있는 동안 기다리고,
+    pending, running 작업이 모두 없어지면 끝낸다. 처리 중인 작업의 lease는 heartbeat 스레드가 계속 연장한다.
+    저장 큐를 사용하는 경우 큐를 비우고 이 작업의 맵 저장이 모두 성공한 뒤에 complete를 기록한다.
+
+    Args:
+        job_queue         : batch_settings.job_queue 설정.
+        algorithm         : 노이즈 제거 알고리즘.
+        params            : 노이즈 제거 알고리즘 파라미터.
+        cache             : 노이즈 제거 결과 캐시 설정.
+        projection_vector : 투영 벡터.
+        image_size        : 맵 이미지 크기.
+    Returns:
+        이 워커가 실행한 시도별 _process_file 결과 목록.
+
+    """
+    dp: DataProcessing = _worker_dp if _worker_dp is not None else DataProcessing()
+    queue: JobQueue = JobQueue(
+        job_queue['path'], 
+        dp.dm.cm.logger, 
+        max_attempts=job_queue['max_attempts'], 
+        backoff=job_queue.get('backoff', 5.0), 
+        lease=job_queue.get('lease', 600.0)
+    )
+    results: List[Dict[str, Any]] = []
+    heartbeat: threading.Event = queue.start_heartbeat()
+    write_queue: Optional[WriteQueue] = dp.dm.write_queue
+    try:
+        while True:
+            job: Optional[Dict[str, Any]] = queue.claim()
+            if job is None:
+                retry: Optional[float] = queue.next_retry()
+                if retry is None:
+                    break
+                time.sleep(min(max(retry - time.time(), 0.01), 1.0))  # 재시도 시각까지 대기 (다른 워커의 결과를 보기 위해 최대 1초)
+                continue
+
+            failed_before: int = len(write_queue.failed) if write_queue is not None else 0
+            result: Dict[str, Any] = _process_file(job['input'], algorithm, params, cache, projection_vector, job['outputs'], image_size)
+            if result['error'] is None and write_queue is not None:
+                # 백그라운드 저장이 끝나야 done으로 기록할 수 있음
+                outputs: Set[str] = set(job['outputs'].values())
+                write_failed: List[str] = [name for name in write_queue.flush()[failed_before:] if name in outputs]
+                if write_failed:
+                    result['error'] = f"Map write failed: {', '.join(write_failed)}"
+                    result['outputs'] = {}
+            if result['error'] is None:
+                queue.complete(job['input'], result['points'], result['seconds'])
+            else:
+                queue.fail(job['input'], result['error'], result['seconds'])
+            results.append(result)
+    finally:
+        heartbeat.set()
+        queue.close()
+    return results
+
+
+class BatchProcessor:
+    def __init__(self, dp: DataProcessing) -> None:
+        """여러 개의 PCD/PLY 파일을 프로세스 풀로 나누어 처리하는 클래스.
+
+        Args:
+            dp : 로그 기록과 설정 파일 접근에 사용할 DataProcessing 인스턴스.
+
+        """
+        self.dp: DataProcessing = dp
+
+    def output_paths(
+            self,
+            input_path: str,
+            map_paths: Dict[str, str],
+            output_dir: str,
+            paths: Optional[List[str]] = None
+        ) -> Dict[str, str]:
+        """입력 파일마다 겹치지 않는 맵 저장 경로를 만든다.
+        2Dfile_paths의 확장자('.16.png' 포함)를 유지하고, 파일 이름은 '입력 파일 이름_입력 확장자_맵 이름' 형태가 된다.
+        paths 중에 다른 디렉토리의 같은 이름 파일이 있으면 입력 디렉토리 경로의 해시 8자리를 이름에 붙인다.
+        paths가 None이면 다른 입력과 겹치는지 알 수 없으므로 항상 디렉토리 해시를 붙인다.
+
+        예) data/scan_01.pcd, depth_map: result/depth_map.png -> output_dir/scan_01_pcd_depth_map.png
+            data/a/scan.pcd, data/b/scan.pcd -> output_dir/scan_pcd_<data/a 해시>_depth_map.png, ...
+
+        Args:
+            input_path : 입력 파일 경로.
+            map_paths  : YAML 설정 파일의 2Dfile_paths.
+            output_dir : 결과 저장 디렉토리.
+            paths      : 같은 output_dir에 저장하는 전체 입력 파일 경로 목록.
+        Returns:
+            맵 이름과 입력 파일 전용 저장 경로.
+
+        """
+        name, ext = os.path.splitext(os.path.basename(input_path))
+        stem: str = f"{name}_{ext[1:]}" if ext else name
+        directory: str = os.path.abspath(os.path.dirname(input_path))
+        if paths is None or any(
+                os.path.basename(other) == os.path.basename(input_path) and os.path.abspath(os.path.dirname(other)) != directory
+                for other in paths
+            ):
+            stem += '_' + hashlib.sha1(directory.encode('utf-8')).hexdigest()[:8]
+        return {
+            name: os.path.join(output_dir, f"{stem}_{name}{split_ext(path)[1] or '.png'}")
+            for name, path in map_paths.items()
+        }
+
+    def run(self, paths: List[str], config: Dict[str, Any]) -> Dict[str, Any]:
+        """배치 처리를 실행하고 처리량 요약을 로그에 기록한다.
+
+        workers가 1 이하이면 프로세스 풀 없이 현재 프로세스에서 순서대로 처리한다.
+        write_queue.use_queue가 true이면 맵 저장을 백그라운드 스레드에서 실행하여 다음 파일의 처리와 겹친다.
+        batch_settings.job_queue.use_job_queue가 true이면 JobQueue에 파일별 상태를 기록하고, 워커마다 큐에서 파일을
+        가져간다. 이전 실행에서 같은 입력, 같은 설정으로 끝난 파일은 건너뛰고 실패한 파일은 backoff 뒤에 다시 시도한다.
+        같은 큐 파일을 사용하는 다른 프로세스(다른 호스트 포함)와 작업을 나누어 처리할 수 있다.
+
+        Args:
+            paths  : 처리할 파일 경로 목록. ConfigFileManager.get_batch_paths 결과.
+            config : YAML 설정 값들.
+        Returns:
+            파일별 결과 목록(results)과 files/sec, points/sec 등의 요약.
+            작업 큐를 사용하면 이번 실행에서 처리한 파일의 마지막 시도 결과와 상태별 작업 개수(queue)를 담는다.
+
+        """
+        batch: Dict[str, Any] = config['batch_settings']
+        workers: int = batch.get('workers', os.cpu_count() or 1)
+        output_dir: str = batch['output_dir']
+        noise_removal: Dict[str, Any] = config['algorithm_settings']['noise_removal']
+        image_size: List[int] = config['algorithm_settings'].get('image_size', [100, 100])
+
+        jobs = [
+            (
+                path,
+                noise_removal['algorithms'],
+                noise_removal['params'],
+                noise_removal.get('cache'),
+                config['algorithm_settings']['projection_vector'],
+                self.output_paths(path, config['2Dfile_paths'], output_dir, paths),
+                image_size,
+            )
+            for path in paths
+        ]
+
+        self.dp.dm.cm.logger.info(f'Batch started: {len(jobs)} files, {workers} workers')
+        os.makedirs(output_dir, exist_ok=True)  # 워커들이 동시에 만들지 않도록 풀 시작 전에 생성
+        start: float = time.perf_counter()
+
+        job_queue: Dict[str, Any] = batch.get('job_queue') or {}
+        queue_counts: Optional[Dict[str, int]] = None
+        if job_queue.get('use_job_queue', False):
+            results, queue_counts = self.run_queue(jobs, job_queue, workers, config.get('write_queue'))
+        elif workers <= 1:
+            _init_worker(config.get('write_queue'))
+            results: List[Dict[str, Any]] = [_process_file(*job) for job in jobs]
+            _worker_dp.dm.close_write_queue()
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(config.get('write_queue'),)
+                ) as pool:
+                results = list(pool.map(_process_file, *zip(*jobs))) if jobs else []
+
+        elapsed: float = time.perf_counter() - start
+        failed: List[Dict[str, Any]] = [r for r in results if r['error'] is not None]
+        points: int = sum(r['points'] for r in results)
+        summary: Dict[str, Any] = {
+            'results': results,
+            'files': len(results),
+            'failed': len(failed),
+            'points': points,
+            'seconds': elapsed,
+            'files_per_sec': len(results) / elapsed if elapsed > 0 else 0.0,
+            'points_per_sec': points / elapsed if elapsed > 0 else 0.0,
+        }
+        if queue_counts is not None:
+            summary['queue'] = queue_counts
+
+        for r in failed:
+            self.dp.dm.cm.logger.error(f"Batch failed file: {r['path']} ({r['error']})")
+        self.dp.dm.cm.logger.info(
+            f"Batch finished: {summary['files']} files ({summary['failed']} failed), "
+            f"{summary['points']} points in {elapsed:.2f}s, "
+            f"{summary['files_per_sec']:.2f} files/sec, {summary['points_per_sec']:.0f} points/sec"
+        )
+        return summary
+
+    def run_queue(
+            self,
+            jobs: List[Tuple[Any, ...]],
+            job_queue: Dict[str, Any],
+            workers: int,
+            write_queue: Optional[Dict[str, Any]] = None
+        ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """작업들을 JobQueue에 넣고 워커들이 큐가 빌 때까지 처리한다.
+        설정 해시는 결과에 영향을 주는 노이즈 제거 알고리즘, 파라미터, 투영 벡터, 이미지 크기로 만든다.
+
+        Args:
+            jobs        : run에서 만든 _process_file 인자 목록.
+            job_queue   : batch_settings.job_queue 설정.
+            workers     : 워커 프로세스 개수.
+            write_queue : 워커별 백그라운드 맵 저장 설정.
+        Returns:
+            파일별 마지막 시도 결과 목록과 상태별 작업 개수.
+
+        """
+        queue: JobQueue = JobQueue(job_queue['path'], self.dp.dm.cm.logger, max_attempts=job_queue['max_attempts'])
+        try:
+            if jobs:
+                path, algorithm, params, cache, projection_vector, _, image_size = jobs[0]
+                config_hash: str = config_digest({
+                    'algorithm': algorithm, 'params': params, 'projection_vector': projection_vector, 'image_size': image_size
+                })
+                queue.add([(job[0], job[5]) for job in jobs], config_hash)
+                args: Tuple[Any, ...] = (job_queue, algorithm, params, cache, projection_vector, image_size)
+
+                if workers <= 1:
+                    _init_worker(write_queue)
+                    attempts: List[Dict[str, Any]] = _run_queue_worker(*args)
+                    _worker_dp.dm.close_write_queue()
+                else:
+                    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(write_queue,)) as pool:
+                        futures = [pool.submit(_run_queue_worker, *args) for _ in range(workers)]
+                        attempts = [result for future in futures for result in future.result()]
+            else:
+                attempts = []
+            counts: Dict[str, int] = queue.counts()
+        finally:
+            queue.close()
+
+        self.dp.dm.cm.logger.info(f'Job queue state: {counts}')
+        return list({result['path']: result for result in attempts}.values()), counts
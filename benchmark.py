@@ -0,0 +1,803 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import platform
+import tempfile
+import resource
+import tracemalloc
+import numpy as np
+import open3d as o3d
+from typing import Tuple, List, Dict, Optional, Any, Callable
+
+from rasterizer import Rasterizer, MapAccumulator, SparseMapAccumulator
+from projection import ProjectionEngine
+
+
+def legacy_depth_map(
+        projected_points: np.ndarray,
+        max_depth: float,
+        min_depth: float,
+        image_size: Tuple[int, int] = (100, 100)
+    ) -> np.ndarray:
+    """벡터화 이전의 포인트 단위 루프 depth map. 비교 기준(reference)으로만 사용한다.
+
+    Args:
+        projected_points : 2D 배열로 변환된 투영된 포인트.
+        max_depth        : 정규화에 사용할 최대 depth 값.
+        min_depth        : 정규화에 사용할 최소 depth 값.
+        image_size       : 이미지 크기.
+    Returns:
+        float32 타입의 depth map.
+
+    """
+    depth_map_image: np.ndarray = np.zeros(image_size, dtype=np.float32)
+    count_map: np.ndarray = np.zeros(image_size, dtype=int)
+
+    for point in projected_points:
+        x: int = int((point[0] - min_depth) / (max_depth - min_depth) * (image_size[1] - 1))
+        y: int = int((point[1] - min_depth) / (max_depth - min_depth) * (image_size[0] - 1))
+
+        if 0 <= x < image_size[1] and 0 <= y < image_size[0]:
+            depth_map_image[y, x] += point[0]
+            count_map[y, x] += 1
+
+    depth_map_image[count_map > 0] /= count_map[count_map > 0]
+    return depth_map_image
+
+
+def legacy_heat_map(
+        projected_points: np.ndarray,
+        max_depth: float,
+        min_depth: float,
+        image_size: Tuple[int, int] = (100, 100)
+    ) -> np.ndarray:
+    """벡터화 이전의 포인트 단위 루프 heat map. 비교 기준(reference)으로만 사용한다.
+
+    Args:
+        projected_points : 2D 배열로 변환된 투영된 포인트.
+        max_depth        : 정규화에 사용할 최대 depth 값.
+        min_depth        : 정규화에 사용할 최소 depth 값.
+        image_size       : 이미지 크기.
+    Returns:
+        uint8 3채널 RGB heat map.
+
+    """
+    heat_map_image: np.ndarray = np.zeros((image_size[0], image_size[1], 3), dtype=np.uint8)
+
+    for point in projected_points:
+        x: int = int((point[0] - min_depth) / (max_depth - min_depth) * (image_size[1] - 1))
+        y: int = int((point[1] - min_depth) / (max_depth - min_depth) * (image_size[0] - 1))
+
+        if 0 <= x < image_size[1] and 0 <= y < image_size[0]:
+            heat_map_image[y, x] = [255, 0, 0]
+
+    return heat_map_image
+
+
+def compare_rasterizer(
+        sizes: List[int],
+        image_size: Tuple[int, int] = (100, 100),
+        skip_legacy_above: Optional[int] = None,
+        seed: int = 0
+    ) -> List[Dict[str, Any]]:
+    """포인트 개수별로 기존 루프와 Rasterizer의 처리량(points/sec)을 비교한다.
+    두 결과가 비트 단위로 같은지도 함께 확인한다.
+
+    Args:
+        sizes             : 비교할 포인트 개수 목록.
+        image_size        : 이미지 크기.
+        skip_legacy_above : 이 값보다 포인트가 많으면 느린 기존 루프는 측정하지 않는다. None이면 항상 측정.
+        seed              : 난수 시드.
+    Returns:
+        포인트 개수별 측정 결과 딕셔너리 목록.
+
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    results: List[Dict[str, Any]] = []
+
+    for n in sizes:
+        projected_points: np.ndarray = rng.normal(size=(n, 2))
+        max_depth: float = np.max(projected_points[:, 0])
+        min_depth: float = np.min(projected_points[:, 0])
+        rasterizer: Rasterizer = Rasterizer(image_size)
+
+        start: float = time.perf_counter()
+        depth: np.ndarray = rasterizer.depth_map(projected_points, max_depth, min_depth)
+        heat: np.ndarray = rasterizer.heat_map(projected_points, max_depth, min_depth)
+        vectorized_sec: float = time.perf_counter() - start
+
+        result: Dict[str, Any] = {
+            'points': n,
+            'vectorized_sec': vectorized_sec,
+            'vectorized_points_per_sec': n / vectorized_sec,
+            'legacy_sec': None,
+            'legacy_points_per_sec': None,
+            'speedup': None,
+            'identical': None,
+        }
+
+        if skip_legacy_above is None or n <= skip_legacy_above:
+            start = time.perf_counter()
+            legacy_depth: np.ndarray = legacy_depth_map(projected_points, max_depth, min_depth, image_size)
+            legacy_heat: np.ndarray = legacy_heat_map(projected_points, max_depth, min_depth, image_size)
+            legacy_sec: float = time.perf_counter() - start
+
+            result['legacy_sec'] = legacy_sec
+            result['legacy_points_per_sec'] = n / legacy_sec
+            result['speedup'] = legacy_sec / vectorized_sec
+            result['identical'] = (
+                np.array_equal(depth.view(np.int32), legacy_depth.view(np.int32))
+                and np.array_equal(heat, legacy_heat)
+            )
+
+        results.append(result)
+
+    return results
+
+
+def compare_zbuffer(
+        sizes: List[int],
+        image_size: Tuple[int, int] = (1000, 1000),
+        seed: int = 0
+    ) -> List[Dict[str, Any]]:
+    """포인트 개수별로 평균 depth map과 z-buffer depth map(이긴 포인트 인덱스 포함)의 처리량을 비교한다.
+    z-buffer의 nearest depth가 min_depth_map과 같은지도 함께 확인한다.
+
+    Args:
+        sizes      : 비교할 포인트 개수 목록.
+        image_size : 이미지 크기.
+        seed       : 난수 시드.
+    Returns:
+        포인트 개수별 측정 결과 딕셔너리 목록.
+
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    results: List[Dict[str, Any]] = []
+
+    for n in sizes:
+        projected_points: np.ndarray = rng.normal(size=(n, 2))
+        max_depth: float = np.max(projected_points[:, 0])
+        min_depth: float = np.min(projected_points[:, 0])
+        rasterizer: Rasterizer = Rasterizer(image_size)
+
+        start: float = time.perf_counter()
+        rasterizer.depth_map(projected_points, max_depth, min_depth)
+        average_sec: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        depth, _ = rasterizer.z_buffer_map(projected_points, max_depth, min_depth)
+        zbuffer_sec: float = time.perf_counter() - start
+
+        minimum: np.ndarray = rasterizer.rasterize(projected_points, max_depth, min_depth, ['min_depth_map'])['min_depth_map']
+        results.append({
+            'points': n,
+            'average_points_per_sec': n / average_sec,
+            'zbuffer_points_per_sec': n / zbuffer_sec,
+            'ratio': average_sec / zbuffer_sec,
+            'matches_min_depth': bool(np.array_equal(depth, minimum)),
+        })
+
+    return results
+
+
+def compare_accumulators(
+        points: int,
+        image_sizes: List[int],
+        tile_size: int = 1024,
+        skip_dense_above: Optional[int] = None,
+        seed: int = 0
+    ) -> List[Dict[str, Any]]:
+    """출력 해상도별로 dense(MapAccumulator)와 sparse(SparseMapAccumulator) 누적의 시간과 최대 메모리를 비교한다.
+    dense는 누적 후 전체 맵을, sparse는 누적 후 포인트가 있는 타일의 맵을 만드는 시간까지 측정한다.
+
+    Args:
+        points           : 포인트 개수.
+        image_sizes      : 비교할 정사각형 이미지의 한 변 크기 목록.
+        tile_size        : sparse 출력 타일 한 변의 픽셀 개수.
+        skip_dense_above : 픽셀 개수가 이 값보다 크면 dense 측정을 생략한다.
+        seed             : 난수 시드.
+    Returns:
+        이미지 크기별 측정 결과 딕셔너리 목록.
+
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    projected_points: np.ndarray = rng.normal(size=(points, 2))
+    max_depth: float = np.max(projected_points[:, 0])
+    min_depth: float = np.min(projected_points[:, 0])
+    map_names: List[str] = ['depth_map', 'density_map']
+    results: List[Dict[str, Any]] = []
+
+    for size in image_sizes:
+        rasterizer: Rasterizer = Rasterizer((size, size))
+        linear_index, valid = rasterizer.compute_indices(projected_points, max_depth, min_depth)
+        depths: np.ndarray = projected_points[valid, 0]
+
+        def run_sparse() -> SparseMapAccumulator:
+            accumulator: SparseMapAccumulator = SparseMapAccumulator((size, size), map_names)
+            accumulator.add(linear_index, depths)
+            for _, _, tile in accumulator.tiles(tile_size):
+                tile.maps()
+            return accumulator
+
+        def run_dense() -> Dict[str, np.ndarray]:
+            accumulator: MapAccumulator = MapAccumulator((size, size), map_names)
+            accumulator.add(linear_index, depths)
+            return accumulator.maps()
+
+        sparse, sparse_sec, sparse_peak = measure_stage(run_sparse)
+        row: Dict[str, Any] = {
+            'image_size': size,
+            'points': points,
+            'occupied': len(sparse.keys) / (size * size),
+            'auto': type(rasterizer.accumulator(map_names, len(linear_index))).__name__,
+            'sparse_sec': sparse_sec,
+            'sparse_peak_bytes': sparse_peak,
+            'dense_sec': None,
+            'dense_peak_bytes': None,
+        }
+        if skip_dense_above is None or size * size <= skip_dense_above:
+            dense, row['dense_sec'], row['dense_peak_bytes'] = measure_stage(run_dense)
+            row['identical'] = all(np.array_equal(dense[name], image) for name, image in sparse.maps().items())
+        results.append(row)
+
+    return results
+
+
+def make_synthetic_cloud(n: int, profile: str, noise_ratio: float = 0.01, seed: int = 0) -> np.ndarray:
+    """벤치마크용 합성 포인트 클라우드를 만든다.
+
+    profile 종류
+        uniform   : 단위 정육면체 안에 균일하게 분포.
+        clustered : 단위 정육면체 안의 20개 가우시안 군집. 밀도 차이가 크다.
+        surface   : 굴곡이 있는 평면 위에 얇게 분포. 실제 스캔과 비슷한 2.5D 형태.
+    전체 포인트 중 noise_ratio 비율은 더 넓은 범위에 흩어진 noise 포인트로 바꾼다.
+
+    Args:
+        n           : 포인트 개수.
+        profile     : 'uniform', 'clustered', 'surface' 중 하나.
+        noise_ratio : noise 포인트 비율.
+        seed        : 난수 시드.
+    Returns:
+        (n, 3) 형태의 포인트.
+    Raises:
+        ValueError: 지원하지 않는 profile이 전달된 경우.
+
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    if profile == 'uniform':
+        points: np.ndarray = rng.random((n, 3))
+    elif profile == 'clustered':
+        centers: np.ndarray = rng.random((20, 3))
+        points = centers[rng.integers(0, 20, n)] + rng.normal(scale=0.02, size=(n, 3))
+    elif profile == 'surface':
+        xy: np.ndarray = rng.random((n, 2))
+        z: np.ndarray = 0.1 * np.sin(6 * xy[:, 0]) * np.cos(4 * xy[:, 1]) + rng.normal(scale=0.002, size=n)
+        points = np.column_stack([xy, z])
+    else:
+        raise ValueError(f"Unknown cloud profile: {profile}")
+
+    noise: int = int(n * noise_ratio)
+    points[:noise] = rng.uniform(-0.5, 1.5, size=(noise, 3))
+    rng.shuffle(points)
+    return points
+
+
+def measure_stage(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, float, int]:
+    """함수 하나의 실행 시간과 최대 메모리 할당량을 측정한다.
+    메모리는 tracemalloc으로 측정하므로 numpy 배열 할당은 포함되지만 open3d 내부 할당은 포함되지 않는다.
+
+    Args:
+        fn : 측정할 함수.
+    Returns:
+        함수 반환값, 실행 시간(초), 최대 할당 바이트.
+
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start: float = time.perf_counter()
+    try:
+        result: Any = fn(*args, **kwargs)
+        seconds: float = time.perf_counter() - start
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_stage_benchmark(
+        sizes: List[int],
+        profiles: List[str],
+        noise_ratio: float = 0.01,
+        algorithm: str = 'statistical',
+        params: Optional[Dict[str, Any]] = None,
+        image_size: Tuple[int, int] = (100, 100),
+        repeat: int = 1,
+        workdir: Optional[str] = None
+    ) -> Dict[str, Any]:
+    """합성 클라우드 크기, profile별로 파이프라인 단계의 실행 시간과 최대 메모리를 측정한다.
+
+    측정 단계: remove_noise, project_to_2d, create_depth_map, create_heat_map, save_image.
+    create_depth_map, create_heat_map은 내부에서 save_image까지 실행한 시간이다.
+    repeat 회 반복하여 가장 빠른 시간을 기록한다.
+
+    Args:
+        sizes       : 포인트 개수 목록.
+        profiles    : make_synthetic_cloud profile 목록.
+        noise_ratio : noise 포인트 비율.
+        algorithm   : remove_noise 알고리즘.
+        params      : remove_noise 파라미터. None이면 기본값 사용.
+        image_size  : 맵 이미지 크기.
+        repeat      : 반복 횟수.
+        workdir     : 합성 클라우드, 맵 이미지를 저장할 디렉토리. None이면 임시 디렉토리.
+    Returns:
+        실행 환경 정보(meta)와 단계별 측정 결과(results)를 담은 JSON 직렬화 가능한 딕셔너리.
+
+    """
+    from data_processing import DataProcessing  # 설정 파일, 로거를 사용하므로 측정할 때만 불러온다
+
+    if params is None:
+        params = {'nb_neighbors': 20, 'std_ratio': 2.0} if algorithm == 'statistical' else {'nb_points': 16, 'radius': 0.05}
+    workdir = workdir or tempfile.mkdtemp(prefix='benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    dp = DataProcessing()
+    results: List[Dict[str, Any]] = []
+
+    for profile in profiles:
+        for n in sizes:
+            cloud_path: str = os.path.join(workdir, f'{profile}_{n}.pcd')
+            pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(make_synthetic_cloud(n, profile, noise_ratio)))
+            o3d.io.write_point_cloud(cloud_path, pcd)
+            depth_path: str = os.path.join(workdir, f'{profile}_{n}_depth_map.png')
+            heat_path: str = os.path.join(workdir, f'{profile}_{n}_heat_map.png')
+
+            timings: Dict[str, List[Tuple[float, int]]] = {}
+            for _ in range(repeat):
+                cleaned, seconds, peak = measure_stage(dp.remove_noise, cloud_path, algorithm, params)
+                timings.setdefault('remove_noise', []).append((seconds, peak))
+
+                projected_points, seconds, peak = measure_stage(dp.project_to_2d, cleaned, np.array([1, 0, 0]))
+                timings.setdefault('project_to_2d', []).append((seconds, peak))
+
+                _, seconds, peak = measure_stage(dp.create_depth_map, projected_points, depth_path, image_size)
+                timings.setdefault('create_depth_map', []).append((seconds, peak))
+
+                _, seconds, peak = measure_stage(dp.create_heat_map, projected_points, heat_path, image_size)
+                timings.setdefault('create_heat_map', []).append((seconds, peak))
+
+                depth: np.ndarray = Rasterizer(image_size).depth_map(
+                    projected_points, np.max(projected_points[:, 0]), np.min(projected_points[:, 0])
+                )
+                _, seconds, peak = measure_stage(dp.dm.save_image, depth, depth_path, 'depth', 'gray')
+                timings.setdefault('save_image', []).append((seconds, peak))
+
+            for stage, values in timings.items():
+                seconds = min(value[0] for value in values)
+                results.append({
+                    'profile': profile,
+                    'points': n,
+                    'stage': stage,
+                    'seconds': seconds,
+                    'peak_bytes': max(value[1] for value in values),
+                    'points_per_sec': n / seconds if seconds > 0 else None,
+                })
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'open3d': o3d.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'algorithm': algorithm,
+            'params': params,
+            'noise_ratio': noise_ratio,
+            'image_size': list(image_size),
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+
+
+def compare_results(
+        baseline: Dict[str, Any],
+        current: Dict[str, Any],
+        threshold: float = 0.2
+    ) -> List[Dict[str, Any]]:
+    """기준(baseline) 결과와 현재 결과를 비교하여, 같은 profile, 포인트 개수, 단계에서
+    실행 시간 또는 최대 메모리가 threshold 비율 이상 늘어난 항목을 찾는다.
+
+    Args:
+        baseline  : run_stage_benchmark로 저장한 기준 결과.
+        current   : run_stage_benchmark로 측정한 현재 결과.
+        threshold : 허용하는 증가 비율. 0.2이면 20% 이상 느려지거나 메모리가 늘어난 경우 regression.
+    Returns:
+        regression 항목 목록. metric, baseline, current, ratio 포함.
+
+    """
+    base: Dict[Tuple[str, int, str], Dict[str, Any]] = {
+        (r['profile'], r['points'], r['stage']): r for r in baseline['results']
+    }
+    regressions: List[Dict[str, Any]] = []
+
+    for r in current['results']:
+        old: Optional[Dict[str, Any]] = base.get((r['profile'], r['points'], r['stage']))
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if old[metric] and r[metric] > old[metric] * (1 + threshold):
+                regressions.append({
+                    'profile': r['profile'],
+                    'points': r['points'],
+                    'stage': r['stage'],
+                    'metric': metric,
+                    'baseline': old[metric],
+                    'current': r[metric],
+                    'ratio': r[metric] / old[metric],
+                })
+
+    return regressions
+
+
+def run_daemon_benchmark(
+        points: int = 10000,
+        jobs: int = 10,
+        algorithm: str = 'statistical',
+        workdir: Optional[str] = None
+    ) -> Dict[str, Any]:
+    """같은 작업을 매번 새 프로세스로 실행하는 경우(CLI)와 상주 서비스(worker_daemon.py --stdio)로
+    실행하는 경우의 처리량(jobs/sec)을 비교한다.
+    CLI는 'worker_daemon.py --job'으로 실행하며, main.py와 같이 import, 설정 파일 읽기, 로거 생성을 매번 한다.
+
+    Args:
+        points    : 작업마다 처리할 합성 클라우드 포인트 개수.
+        jobs      : 작업 개수.
+        algorithm : 노이즈 제거 알고리즘.
+        workdir   : 합성 클라우드, 맵을 저장할 디렉토리. None이면 임시 디렉토리.
+    Returns:
+        CLI, daemon 각각의 전체 시간, jobs/sec과 daemon 시작 시간을 담은 딕셔너리.
+
+    """
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix='benchmark_'))
+    os.makedirs(workdir, exist_ok=True)
+    root: str = os.path.dirname(os.path.abspath(__file__))
+    script: str = os.path.join(root, 'worker_daemon.py')
+
+    cloud_path: str = os.path.join(workdir, f'daemon_{points}.pcd')
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(make_synthetic_cloud(points, 'uniform')))
+    o3d.io.write_point_cloud(cloud_path, pcd)
+    params: Dict[str, Any] = {'nb_neighbors': 20, 'std_ratio': 2.0} if algorithm == 'statistical' \
+        else {'nb_points': 16, 'radius': 0.05}
+    job_list: List[Dict[str, Any]] = [
+        {'id': i, 'input': cloud_path, 'algorithm': algorithm, 'params': params,
+         'outputs': {'depth_map': os.path.join(workdir, f'daemon_{i}_depth_map.npy')}}
+        for i in range(jobs)
+    ]
+
+    # 작업마다 새 프로세스 실행
+    start: float = time.perf_counter()
+    for job in job_list:
+        subprocess.run([sys.executable, script, '--job', json.dumps(job)], cwd=root, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    cli_seconds: float = time.perf_counter() - start
+
+    # 상주 서비스 하나에 모든 작업 전달
+    start = time.perf_counter()
+    daemon = subprocess.Popen([sys.executable, script, '--stdio'], cwd=root, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    daemon.stdin.write(json.dumps({'command': 'ping'}) + '\n')
+    daemon.stdin.flush()
+    daemon.stdout.readline()
+    startup_seconds: float = time.perf_counter() - start
+
+    responses: List[Dict[str, Any]] = []
+    for job in job_list:
+        daemon.stdin.write(json.dumps(job) + '\n')
+        daemon.stdin.flush()
+        responses.append(json.loads(daemon.stdout.readline()))
+    daemon.stdin.write(json.dumps({'command': 'shutdown'}) + '\n')
+    daemon.stdin.close()
+    daemon.wait()
+    daemon_seconds: float = time.perf_counter() - start
+
+    return {
+        'points': points,
+        'jobs': jobs,
+        'cli_seconds': cli_seconds,
+        'cli_jobs_per_sec': jobs / cli_seconds,
+        'daemon_startup_seconds': startup_seconds,
+        'daemon_seconds': daemon_seconds,
+        'daemon_jobs_per_sec': jobs / daemon_seconds,
+        'daemon_failed': sum(not r['ok'] for r in responses),
+        'job_seconds': sum(r['seconds'] for r in responses) / max(len(responses), 1),
+    }
+
+
+def run_voxel_benchmark(
+        points: int = 200000,
+        profile: str = 'surface',
+        targets: Optional[List[int]] = None,
+        algorithm: str = 'statistical',
+        image_size: Tuple[int, int] = (200, 200),
+        workdir: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+    """voxel 다운샘플링 목표 포인트 개수별로 remove_noise 속도 향상과 depth map 품질을 측정한다.
+
+    다운샘플링 없이 노이즈를 제거한 결과를 기준으로, 목표 개수마다 remove_noise(다운샘플링 포함) 시간과
+    위에서 내려다본(top view) depth map을 비교한다. 모든 depth map은 원본 클라우드의 범위로 래스터화하여 픽셀 위치를 맞춘다.
+    품질은 포인트가 있는 픽셀의 IoU와, 양쪽 모두 포인트가 있는 픽셀의 평균 depth 오차(MAE)로 나타낸다.
+
+    Args:
+        points     : 합성 클라우드 포인트 개수.
+        profile    : make_synthetic_cloud profile.
+        targets    : voxel 다운샘플링 목표 포인트 개수 목록. None이면 points의 1/2, 1/4, 1/10, 1/40.
+        algorithm  : 노이즈 제거 알고리즘.
+        image_size : depth map 크기.
+        workdir    : 합성 클라우드를 저장할 디렉토리. None이면 임시 디렉토리.
+    Returns:
+        목표 개수별 남은 포인트 개수, 시간, 속도 향상, IoU, depth MAE 목록. 첫 번째 항목이 기준(다운샘플링 없음)이다.
+
+    """
+    from data_processing import DataProcessing  # 설정 파일, 로거를 사용하므로 측정할 때만 불러온다
+
+    workdir = workdir or tempfile.mkdtemp(prefix='benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    cloud: np.ndarray = make_synthetic_cloud(points, profile)
+    cloud_path: str = os.path.join(workdir, f'voxel_{profile}_{points}.pcd')
+    o3d.io.write_point_cloud(cloud_path, o3d.geometry.PointCloud(o3d.utility.Vector3dVector(cloud)))
+    params: Dict[str, Any] = {'nb_neighbors': 20, 'std_ratio': 2.0} if algorithm == 'statistical' \
+        else {'nb_points': 16, 'radius': 0.05}
+
+    engine: ProjectionEngine = ProjectionEngine(['top'])
+    view: np.ndarray = engine.project(cloud)['top']
+    bounds: Tuple[float, float, float, float] = (
+        float(view[:, 0].min()), float(view[:, 0].max()), float(view[:, 1].min()), float(view[:, 1].max())
+    )
+    dp = DataProcessing()
+    results: List[Dict[str, Any]] = []
+    reference: Optional[Dict[str, np.ndarray]] = None
+
+    for target in [None] + (targets or [points // 2, points // 4, points // 10, points // 40]):
+        voxel: Optional[Dict[str, Any]] = {'use_voxel': True, 'target_points': target} if target else None
+        cleaned, seconds, _ = measure_stage(dp.remove_noise, cloud_path, algorithm, params, voxel=voxel)
+        maps: Dict[str, np.ndarray] = Rasterizer(image_size).rasterize_view(
+            engine.project(np.asarray(cleaned.points))['top'], ['depth_map', 'density_map'], bounds
+        )
+        if reference is None:
+            reference = maps
+        occupied: np.ndarray = maps['density_map'] > 0
+        expected: np.ndarray = reference['density_map'] > 0
+        both: np.ndarray = occupied & expected
+        base_seconds: float = results[0]['seconds'] if results else seconds
+        results.append({
+            'target_points': target,
+            'points': len(cleaned.points),
+            'seconds': seconds,
+            'speedup': base_seconds / seconds if seconds > 0 else None,
+            'occupancy_iou': float(both.sum() / max((occupied | expected).sum(), 1)),
+            'depth_mae': float(np.abs(maps['depth_map'][both] - reference['depth_map'][both]).mean()) if both.any() else None,
+        })
+    return results
+
+
+def run_roi_benchmark(
+        points: int = 1000000,
+        profile: str = 'uniform',
+        fractions: Optional[List[float]] = None,
+        algorithm: str = 'statistical',
+        chunk_size: int = 100000,
+        workdir: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+    """ROI로 남기는 포인트 비율별로 전체 파이프라인(ROI 자르기, 노이즈 제거, 투영, 맵 생성) 시간을 측정한다.
+
+    합성 클라우드를 x 순서로 정렬하여 저장한다(스캔 순서처럼 가까운 포인트가 가까이 저장된 파일).
+    ROI는 x 범위를 분위수로 정한 box이므로 ROI 밖의 chunk는 포인트별 판정 없이 건너뛴다.
+
+    Args:
+        points     : 합성 클라우드 포인트 개수.
+        profile    : make_synthetic_cloud profile.
+        fractions  : ROI 안에 남길 포인트 비율 목록. None이면 0.5, 0.25, 0.1, 0.05, 0.01.
+        algorithm  : 노이즈 제거 알고리즘.
+        chunk_size : ROI chunk 크기.
+        workdir    : 합성 클라우드를 저장할 디렉토리. None이면 임시 디렉토리.
+    Returns:
+        비율별 ROI 안의 포인트 개수, 시간, 줄어든 시간 목록. 첫 번째 항목이 기준(ROI 없음)이다.
+
+    """
+    from data_processing import DataProcessing  # 설정 파일, 로거를 사용하므로 측정할 때만 불러온다
+
+    workdir = workdir or tempfile.mkdtemp(prefix='benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    cloud: np.ndarray = make_synthetic_cloud(points, profile)
+    cloud = cloud[np.argsort(cloud[:, 0], kind='stable')]
+    cloud_path: str = os.path.join(workdir, f'roi_{profile}_{points}.pcd')
+    o3d.io.write_point_cloud(cloud_path, o3d.geometry.PointCloud(o3d.utility.Vector3dVector(cloud)))
+    params: Dict[str, Any] = {'nb_neighbors': 20, 'std_ratio': 2.0} if algorithm == 'statistical' \
+        else {'nb_points': 16, 'radius': 0.05}
+
+    dp = DataProcessing()
+    results: List[Dict[str, Any]] = []
+    for fraction in [None] + (fractions or [0.5, 0.25, 0.1, 0.05, 0.01]):
+        roi: Optional[Dict[str, Any]] = None
+        if fraction is not None:
+            upper: np.ndarray = cloud.max(axis=0)
+            upper[0] = np.quantile(cloud[:, 0], fraction)
+            roi = {'use_roi': True, 'type': 'box', 'min': cloud.min(axis=0).tolist(), 'max': upper.tolist(), 'chunk_size': chunk_size}
+        _, seconds, _ = measure_stage(
+            dp.process, cloud_path, np.array([1, 0, 0]), ['depth_map', 'density_map'], algorithm, params, roi=roi
+        )
+        base_seconds: float = results[0]['seconds'] if results else seconds
+        results.append({
+            'fraction': fraction,
+            'points': int(np.count_nonzero(cloud[:, 0] <= roi['max'][0])) if roi else len(cloud),  # ROI 안의 포인트 개수
+            'seconds': seconds,
+            'saved_seconds': base_seconds - seconds,
+            'speedup': base_seconds / seconds if seconds > 0 else None,
+        })
+    return results
+
+
+def main(args: Optional[Any] = None) -> int:
+    """벤치마크 CLI.
+
+    python benchmark.py rasterizer --sizes 1e5 1e6 1e7
+    python benchmark.py zbuffer --sizes 1e6 1e7
+    python benchmark.py sparse --points 1e6 --image-sizes 1000 5000 20000 50000
+    python benchmark.py stages --sizes 1e4 1e5 1e6 --output result/benchmark.json
+    python benchmark.py compare --baseline baseline.json --current result/benchmark.json --threshold 0.2
+    python benchmark.py daemon --points 10000 --jobs 20
+    python benchmark.py voxel --points 200000 --targets 100000 50000 20000
+    python benchmark.py roi --points 1000000 --fractions 0.5 0.1 0.01
+
+    compare는 regression이 있으면 1을 반환한다.
+
+    """
+    parser = argparse.ArgumentParser(description='Image processing benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    raster = commands.add_parser('rasterizer', help='loop vs vectorized rasterizer throughput')
+    raster.add_argument('--sizes', type=float, nargs='+', default=[1e5, 1e6, 1e7])
+    raster.add_argument('--skip-legacy-above', type=float, default=None)
+
+    zbuffer = commands.add_parser('zbuffer', help='averaged vs z-buffer depth map throughput')
+    zbuffer.add_argument('--sizes', type=float, nargs='+', default=[1e6, 1e7])
+    zbuffer.add_argument('--image-size', type=int, nargs=2, default=[1000, 1000])
+
+    sparse = commands.add_parser('sparse', help='dense vs sparse accumulation time and memory by output size')
+    sparse.add_argument('--points', type=float, default=1e6)
+    sparse.add_argument('--image-sizes', type=int, nargs='+', default=[1000, 5000, 20000, 50000])
+    sparse.add_argument('--tile-size', type=int, default=1024)
+    sparse.add_argument('--skip-dense-above', type=float, default=1e8)
+
+    stages = commands.add_parser('stages', help='per-stage time and peak memory')
+    stages.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5, 1e6, 1e7])
+    stages.add_argument('--profiles', nargs='+', default=['uniform', 'clustered', 'surface'])
+    stages.add_argument('--noise-ratio', type=float, default=0.01)
+    stages.add_argument('--algorithm', default='statistical', choices=['statistical', 'radius'])
+    stages.add_argument('--repeat', type=int, default=1)
+    stages.add_argument('--workdir', default=None)
+    stages.add_argument('--output', default='result/benchmark.json')
+
+    compare = commands.add_parser('compare', help='flag regressions against a stored baseline')
+    compare.add_argument('--baseline', required=True)
+    compare.add_argument('--current', required=True)
+    compare.add_argument('--threshold', type=float, default=0.2)
+
+    daemon = commands.add_parser('daemon', help='repeated CLI runs vs one worker daemon')
+    daemon.add_argument('--points', type=float, default=1e4)
+    daemon.add_argument('--jobs', type=int, default=10)
+    daemon.add_argument('--algorithm', default='statistical', choices=['statistical', 'radius'])
+    daemon.add_argument('--workdir', default=None)
+
+    voxel = commands.add_parser('voxel', help='voxel downsampling speedup vs depth map fidelity')
+    voxel.add_argument('--points', type=float, default=2e5)
+    voxel.add_argument('--profile', default='surface', choices=['uniform', 'clustered', 'surface'])
+    voxel.add_argument('--targets', type=float, nargs='+', default=None)
+    voxel.add_argument('--algorithm', default='statistical', choices=['statistical', 'radius'])
+    voxel.add_argument('--workdir', default=None)
+
+    roi = commands.add_parser('roi', help='time saved by ROI cropping vs fraction of points kept')
+    roi.add_argument('--points', type=float, default=1e6)
+    roi.add_argument('--profile', default='uniform', choices=['uniform', 'clustered', 'surface'])
+    roi.add_argument('--fractions', type=float, nargs='+', default=None)
+    roi.add_argument('--algorithm', default='statistical', choices=['statistical', 'radius'])
+    roi.add_argument('--chunk-size', type=int, default=100000)
+    roi.add_argument('--workdir', default=None)
+
+    parsed = parser.parse_args(args)
+
+    if parsed.command == 'rasterizer':
+        skip: Optional[int] = int(parsed.skip_legacy_above) if parsed.skip_legacy_above else None
+        results = compare_rasterizer([int(n) for n in parsed.sizes], skip_legacy_above=skip)
+
+        print(f"{'points':>12} {'loop pts/s':>14} {'vector pts/s':>14} {'speedup':>9} {'identical':>10}")
+        for r in results:
+            legacy: str = f"{r['legacy_points_per_sec']:14.0f}" if r['legacy_sec'] is not None else f"{'-':>14}"
+            speedup: str = f"{r['speedup']:8.1f}x" if r['speedup'] is not None else f"{'-':>9}"
+            print(f"{r['points']:>12} {legacy} {r['vectorized_points_per_sec']:14.0f} {speedup} {str(r['identical']):>10}")
+        return 0
+
+    if parsed.command == 'zbuffer':
+        results = compare_zbuffer([int(n) for n in parsed.sizes], tuple(parsed.image_size))
+        print(f"{'points':>12} {'average pts/s':>14} {'z-buffer pts/s':>15} {'ratio':>7} {'= min depth':>12}")
+        for r in results:
+            print(f"{r['points']:>12} {r['average_points_per_sec']:14.0f} {r['zbuffer_points_per_sec']:15.0f} "
+                  f"{r['ratio']:6.2f}x {str(r['matches_min_depth']):>12}")
+        return 0
+
+    if parsed.command == 'sparse':
+        results = compare_accumulators(int(parsed.points), parsed.image_sizes, parsed.tile_size, int(parsed.skip_dense_above))
+        print(f"{'size':>8} {'occupied':>9} {'auto':>21} {'dense s':>9} {'dense MB':>10} {'sparse s':>9} {'sparse MB':>10}")
+        for r in results:
+            dense: str = (f"{r['dense_sec']:9.3f} {r['dense_peak_bytes'] / 1e6:10.1f}" if r['dense_sec'] is not None
+                          else f"{'-':>9} {'-':>10}")
+            print(f"{r['image_size']:>8} {r['occupied']:9.4%} {r['auto']:>21} {dense} "
+                  f"{r['sparse_sec']:9.3f} {r['sparse_peak_bytes'] / 1e6:10.1f}")
+        return 0
+
+    if parsed.command == 'stages':
+        report: Dict[str, Any] = run_stage_benchmark(
+            [int(n) for n in parsed.sizes],
+            parsed.profiles,
+            noise_ratio=parsed.noise_ratio,
+            algorithm=parsed.algorithm,
+            repeat=parsed.repeat,
+            workdir=parsed.workdir,
+        )
+        if os.path.dirname(parsed.output):
+            os.makedirs(os.path.dirname(parsed.output), exist_ok=True)
+        with open(parsed.output, 'w', encoding='UTF8') as file:
+            json.dump(report, file, indent=2)
+
+        print(f"{'profile':>10} {'points':>10} {'stage':>18} {'seconds':>10} {'peak MB':>9} {'pts/s':>12}")
+        for r in report['results']:
+            print(f"{r['profile']:>10} {r['points']:>10} {r['stage']:>18} {r['seconds']:10.4f} "
+                  f"{r['peak_bytes'] / 1e6:9.1f} {r['points_per_sec'] or 0:12.0f}")
+        print(f"Saved to {parsed.output}")
+        return 0
+
+    if parsed.command == 'daemon':
+        r = run_daemon_benchmark(int(parsed.points), parsed.jobs, parsed.algorithm, parsed.workdir)
+        print(f"{'mode':>8} {'seconds':>10} {'jobs/s':>10}")
+        print(f"{'cli':>8} {r['cli_seconds']:10.3f} {r['cli_jobs_per_sec']:10.2f}")
+        print(f"{'daemon':>8} {r['daemon_seconds']:10.3f} {r['daemon_jobs_per_sec']:10.2f}")
+        print(f"daemon startup {r['daemon_startup_seconds']:.3f}s, mean job {r['job_seconds']:.4f}s, "
+              f"speedup {r['daemon_jobs_per_sec'] / r['cli_jobs_per_sec']:.1f}x")
+        return 1 if r['daemon_failed'] else 0
+
+    if parsed.command == 'voxel':
+        targets: Optional[List[int]] = [int(n) for n in parsed.targets] if parsed.targets else None
+        rows = run_voxel_benchmark(int(parsed.points), parsed.profile, targets, parsed.algorithm, workdir=parsed.workdir)
+        print(f"{'target':>10} {'points':>10} {'seconds':>10} {'speedup':>9} {'IoU':>7} {'depth MAE':>10}")
+        for r in rows:
+            mae: str = f"{r['depth_mae']:10.5f}" if r['depth_mae'] is not None else f"{'-':>10}"
+            print(f"{r['target_points'] or 'none':>10} {r['points']:>10} {r['seconds']:10.4f} "
+                  f"{r['speedup']:8.1f}x {r['occupancy_iou']:7.3f} {mae}")
+        return 0
+
+    if parsed.command == 'roi':
+        rows = run_roi_benchmark(int(parsed.points), parsed.profile, parsed.fractions, parsed.algorithm, parsed.chunk_size, parsed.workdir)
+        print(f"{'kept':>8} {'points':>10} {'seconds':>10} {'saved':>10} {'speedup':>9}")
+        for r in rows:
+            kept: str = f"{r['fraction']:8.0%}" if r['fraction'] is not None else f"{'all':>8}"
+            print(f"{kept} {r['points']:>10} {r['seconds']:10.4f} {r['saved_seconds']:10.4f} {r['speedup']:8.1f}x")
+        return 0
+
+    with open(parsed.baseline, 'r', encoding='UTF8') as file:
+        baseline: Dict[str, Any] = json.load(file)
+    with open(parsed.current, 'r', encoding='UTF8') as file:
+        current: Dict[str, Any] = json.load(file)
+
+    regressions = compare_results(baseline, current, parsed.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['profile']} {r['points']} {r['stage']} {r['metric']}: "
+              f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+    print(f"{len(regressions)} regressions (threshold {parsed.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
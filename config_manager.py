@@ -1,9 +1,11 @@
 import yaml
 import os
-import inspect
-from typing import Optional, Tuple, Dict, Any
+import glob
+import logging
+from typing import Optional, Tuple, Dict, Any, List
 
 from logger import Logger
+from app_config import AppConfig, ConfigError
 
 class ConfigFileManager:
     def __init__(self) -> None:
@@ -11,15 +13,19 @@ class ConfigFileManager:
         로그 클래스 사용을 위해 YAML 파일에 지정된 로그 경로, 로그 파일 기록 여부, 로그 출력 여부
         3가지 파라미터 값을 get_log_settings를 실행하여 가져온다.
         3가지 파라미터들을 사용하여 Logger 클래스 인스턴스를 생성한다.
+        설정 파일은 AppConfig로 한 번만 읽고 검증하며, 이후 메소드들은 읽어 둔 값을 사용한다.
 
         """
         self.img_config: str = 'config/image.yaml'  # 설정 파일 경로
         self.yaml_log: str = 'log/yaml_error.log'  # YAML 에러용 로그 경로
+        self.help_logger: Optional[Logger] = None  # YAML 에러가 처음 발생할 때 한 번만 생성
+        self.config: AppConfig = self.load_config()
         self.log_path: str
         self.use_file: bool
         self.use_print: bool
-        self.log_path, self.use_file, self.use_print = self.get_log_settings()
-        self.logger: Logger = Logger(self.log_path, self.use_file, self.use_print)
+        self.metrics_path: Optional[str]
+        self.log_path, self.use_file, self.use_print, self.metrics_path = self.get_log_settings()
+        self.logger: Logger = Logger(self.log_path, self.use_file, self.use_print, self.metrics_path, self.config.rate_limit)
 
     def load_yaml(self, file_path: str) -> Dict[str, Any]:
         """YAML 설정 파일을 읽는다.
@@ -36,7 +42,7 @@ class ConfigFileManager:
     def yaml_error(self, msg: str) -> None: # YAML 파일 읽기 실패, YAML 문법 오류 발생 시 실행
         """설정 파일 경로에 문제가 있어 YAML 파일을 읽지 못하거나, YAML 문법에 오류가 있을 때
         발생하는 에러를 기록하기 위한 logger. get_log_settings 메소드 실행 전에 발생하는 에러들을 기록한다.
-        로그 파일 기록과 터미널에 출력 기능은 반드시 한다.
+        로그 파일 기록과 터미널에 출력 기능은 반드시 한다. logger는 처음 에러가 발생할 때 한 번만 만든다.
         
         Args:
             msg : 로그 파일에 저장 또는 터미널에 출력할 메세지.
@@ -44,10 +50,48 @@ class ConfigFileManager:
             없음.
 
         """
-        self.help_logger: Logger = Logger(self.yaml_log, True, True) 
-        self.help_logger.exception(msg, f"[{self.__class__.__name__}] ")
+        if self.help_logger is None:
+            self.help_logger = Logger(self.yaml_log, True, True)
+        self.help_logger.exception(msg, name=f"[{self.__class__.__name__}] ")
 
-    def get_log_settings(self) -> Optional[Tuple[str, bool, bool]]:
+    def load_config(self) -> AppConfig:
+        """설정 파일을 읽고 검증한다. 잘못된 설정은 포인트 클라우드를 읽기 전에 실패하도록 예외를 다시 던진다.
+        
+        Args:
+            없음.
+        Returns:
+            검증된 AppConfig 인스턴스.
+        Raises:
+            ConfigError: 필요한 키가 없거나, 값의 타입, 알고리즘 파라미터에 문제가 있는 경우.
+            
+        """
+        try:
+            return AppConfig(self.img_config)
+        except ConfigError as ce:
+            self.yaml_error(f"Invalid config. Check the yaml file--> {ce}")
+            raise
+        except Exception as e:
+            self.yaml_error(f"Check the error yaml_error log--> {e}")
+            raise
+
+    def get_config(self) -> AppConfig:
+        """설정 객체를 반환한다. 설정 파일의 수정 시간이 바뀐 경우에만 다시 읽는다.
+        바뀐 설정에 문제가 있으면 에러를 기록하고 이전 설정을 계속 사용한다.
+        
+        Args:
+            없음.
+        Returns:
+            AppConfig 인스턴스.
+            
+        """
+        try:
+            if self.config.reload_if_changed():
+                self.logger.info(f'Config reloaded: {self.img_config}')
+        except Exception as e:
+            self.logger.exception(f"Config reload failed. Keep the previous config--> {e}")
+        return self.config
+
+    def get_log_settings(self) -> Optional[Tuple[str, bool, bool, Optional[str]]]:
         """YAML 설정 파일에 지정된 로그 세팅 관련 파라미터들을 불러온다.
         로그 파일 경로가 존재하지 않는 경우 디렉토리를 자동으로 생성 후 해당 위치에 로그 파일을 저장한다.
         YAML 문법, Key 값, 파라미터 값에 문제가 있는 경우 예외 처리를 사용해 로깅한다.
@@ -55,26 +99,23 @@ class ConfigFileManager:
         Args:
             없음.
         Returns:
-            기록할 로그 파일 경로, 로그 파일 기록 여부, 터미널에 출력 여부 반환.
+            기록할 로그 파일 경로, 로그 파일 기록 여부, 터미널에 출력 여부,
+            단계별 측정 결과 JSON 파일 경로(use_metrics가 true인 경우, 아니면 None) 반환.
         Raises:
-            use_file, use_print 값이 bool 아닌 경우 에러 발생
+            로그 디렉토리를 만들 수 없는 경우 에러 발생. 값의 타입은 AppConfig에서 검증한다.
             
         """
         try:
-            config: Dict[str, Any] = self.load_yaml(self.img_config)
-                
-            log_path: str = config['log_settings']['path']
-            use_file: bool = config['log_settings']['use_file']
-            use_print: bool = config['log_settings']['use_print']
-            
-            if not isinstance(use_file, bool) or not isinstance(use_print, bool):
-                raise ValueError("use_file and use_print must be a boolean value.")
+            log_path: str = self.config.log_path
+            use_file: bool = self.config.use_file
+            use_print: bool = self.config.use_print
+            metrics_path: Optional[str] = self.config.metrics_path
             
             if not os.path.exists(os.path.dirname(log_path)):
                 log_dir = os.path.dirname(log_path)
-                os.makedirs(log_dir)
+                os.makedirs(log_dir, exist_ok=True)
             
-            return log_path, use_file, use_print
+            return log_path, use_file, use_print, metrics_path
         
         except ValueError as ve:
             self.yaml_error(f"Occur log path value error. Check the value--> {ve}")
@@ -100,12 +141,12 @@ class ConfigFileManager:
             
         """        
         try:
-            config: Dict[str, str] = self.load_yaml(self.img_config)
+            config: AppConfig = self.get_config()
             
-            for path in config['3Dfile_paths']:
+            for path in config.input_paths:
                 if self.file_exist(path['path']):
                     self.logger.info(f'Successfully read {path["type"]} from {path["path"]}')
-                    return path['path'], config
+                    return path['path'], config.data
 
             raise FileNotFoundError(f"Check the {path['type']} and {path['path']}")
         
@@ -118,12 +159,50 @@ class ConfigFileManager:
         except Exception as e:
             self.logger.exception(f"Check the error total log--> {e}")
 
+    def get_batch_paths(self) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+        """YAML 설정 파일의 batch_settings.inputs 로부터 배치 처리할 PCD 또는 PLY 파일 목록을 획득한다.
+        inputs 항목에는 glob 패턴('data/*.pcd') 또는 디렉토리('data/scans')를 지정할 수 있다.
+        디렉토리인 경우 바로 아래의 .pcd, .ply 파일들을 사용한다. 중복된 경로는 한 번만 포함한다.
+
+        Args:
+            없음.
+        Returns:
+            정렬된 3D 파일 경로 목록, YAML 설정 값들 반환.
+        Raises:
+            배치 입력에 해당하는 파일이 하나도 없는 경우.
+
+        """
+        try:
+            config: Dict[str, Any] = self.get_config().data
+
+            paths: List[str] = []
+            for pattern in config['batch_settings']['inputs']:
+                if os.path.isdir(pattern):
+                    pattern = os.path.join(pattern, '*')
+                for path in glob.glob(pattern):
+                    if os.path.isfile(path) and path.lower().endswith(('.pcd', '.ply')) and path not in paths:
+                        paths.append(path)
+
+            if not paths:
+                raise FileNotFoundError(f"No pcd or ply file in {config['batch_settings']['inputs']}")
+
+            self.logger.info(f'Successfully found {len(paths)} batch files')
+            return sorted(paths), config
+
+        except ValueError as ve:
+            self.logger.exception(f"Occur batch path value error. Check the value--> {ve}")
+        except FileNotFoundError as fnf:
+            self.logger.exception(f"Unavailable batch files. Check the yaml file--> {fnf}")
+        except KeyError as ke:
+            self.logger.exception(f"Using the wrong yaml key. Check the yaml file--> {ke}")
+        except Exception as e:
+            self.logger.exception(f"Check the error total log--> {e}")
+
     def file_exist(self, path: str) -> bool:
         """YAML 설정 파일로 부터 PCD 또는 PLY 파일 경로를 획득한다.
         file_exist 메소드를 사용하여 파일 존재 여부를 확인한다.
         로그 파일 기록을 용이성을 위한 [file_exist 호출 클래스] [file_exist 호출 메소드] 로그 포맷 추가.
-        error 메소드에 파라미터를 전달할 때는 [file_exist 호출 메소드] 메세지, [file_exist 호출 클래스]
-        순으로 2가지를 전달한다.
+        호출 클래스와 메소드는 Logger.log_caller가 로그를 실제로 기록할 때 계산한다.
         
         Args:
             path : 확인하고 싶은 파일 경로.
@@ -132,26 +211,18 @@ class ConfigFileManager:
         
         """   
         if os.path.isfile(path):
-            self.logger.info(f"File exist: {path}")
+            self.logger.info("File exist: %s", args=(path,))
             return True
         else:
-            self.logger.error(
-                f"[{inspect.currentframe().f_back.f_code.co_name}] "
-                f"Check the file name", 
-                f"[{inspect.currentframe().f_back.f_locals['self'].__class__.__name__}] "
-            )
+            self.logger.log_caller(logging.ERROR, "Check the file name")
             return False
 
     def empty_path(self, path: str) -> bool:
         if not path:
-            self.logger.error(
-                f"[{inspect.currentframe().f_back.f_code.co_name}] "
-                f"Path is empty", 
-                f"[{inspect.currentframe().f_back.f_locals['self'].__class__.__name__}] "
-            )
+            self.logger.log_caller(logging.ERROR, "Path is empty")
             return True
         else:
-            self.logger.info(f"Correct path: {path}")
+            self.logger.info("Correct path: %s", args=(path,))
             return False
 
     def directory_exist(self, path: str, make: bool) -> bool:
@@ -159,8 +230,7 @@ class ConfigFileManager:
         file_exist 메소드를 사용하여 파일 존재 여부를 확인한다.
         경로 확인 후 로그에 기록한다.
         로그 파일 기록을 용이성을 위한 [file_exist 호출 클래스] [file_exist 호출 메소드] 로그 포맷 추가.
-        error 메소드에 파라미터를 전달할 때는 [directory_exist 호출 메소드] 메세지, [directory_exist 호출 클래스]
-        순으로 2가지를 전달한다.
+        호출 클래스와 메소드는 Logger.log_caller가 로그를 실제로 기록할 때 계산한다.
         
         Args:
             path : 확인하고 싶은 경로.
@@ -172,19 +242,11 @@ class ConfigFileManager:
         if not os.path.exists(os.path.dirname(path)):
             if make: # path에 맞는 디렉토리 생성
                 path = os.path.dirname(path)
-                os.makedirs(path)
-                self.logger.warning(
-                    f"[{inspect.currentframe().f_back.f_code.co_name}] "
-                    f"An existing path does not exist. Create a new path: {path}", 
-                    f"[{inspect.currentframe().f_back.f_locals['self'].__class__.__name__}] "
-                )
+                os.makedirs(path, exist_ok=True)  # 여러 워커, 저장 스레드가 동시에 만들 수 있음
+                self.logger.log_caller(logging.WARNING, "An existing path does not exist. Create a new path: %s", path)
                 return True
             else: # 디렉토리 생성 안함
-                self.logger.error(
-                    f"[{inspect.currentframe().f_back.f_code.co_name}] "
-                    f"Directory does not exist: {path}", 
-                    f"[{inspect.currentframe().f_back.f_locals['self'].__class__.__name__}] "
-                )
+                self.logger.log_caller(logging.ERROR, "Directory does not exist: %s", path)
                 return False
         else: # 경로에 맞는 디렉토리 존재
             return True
\ No newline at end of file
@@ -1,25 +1,31 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 
 from config_manager import ConfigFileManager
+from map_writer import MapWriter
+from write_queue import WriteQueue
+from rasterizer import Rasterizer
 
 class DataManager:
     def __init__(self) -> None:
         self.cm: ConfigFileManager = ConfigFileManager()
+        self.writer: MapWriter = MapWriter(self.cm.logger)
+        self.write_queue: Optional[WriteQueue] = None  # start_write_queue 이후에는 백그라운드에서 저장
 
     def get_depths(self, projected_points: np.ndarray) -> Tuple[float, float]:
-        """X와 Y 좌표를 계산을 위한 최대 최소 depth 값을 획득한다.
+        """투영된 포인트들의 최대 최소 depth 값을 획득한다.
+        legacy 2열 배열에서는 X와 Y 좌표 계산을 위한 정규화 범위로도 사용한다.
         
         Args:
-            projected_points : 2D 배열로 변환된 투영된 포인트.
+            projected_points : project_to_2d로 투영된 포인트.
         Returns:
             float 형태의 최대 최소 depth 값.
             
         """
-        max_depth: float = np.max(projected_points[:, 0])  # x 좌표에서 최대 깊이
-        min_depth: float = np.min(projected_points[:, 0])  # x 좌표에서 최소 깊이
-        self.cm.logger.info(f"Calculated to max depth {max_depth}, min depth {min_depth}")
+        depths: np.ndarray = Rasterizer.depths(projected_points)
+        max_depth: float = np.max(depths)  # 최대 깊이
+        min_depth: float = np.min(depths)  # 최소 깊이
+        self.cm.logger.info("Calculated to max depth %s, min depth %s", args=(max_depth, min_depth))
         return max_depth, min_depth
     
     def save_image(
@@ -32,18 +38,58 @@ class DataManager:
         """이미지를 저장하는 메소드. 이미지 저장 경로가 지정되지 않은 경우에는 이미지를 저장하지 않는다.
         따라서 이미지 저장 전에 경로가 empty 여부, 디렉토리 존재 여부를 확인한다.
         디렉토리가 비어있는 경우에는 디렉토리를 생성한다.
+        저장 형식은 경로의 확장자로 정해진다. '.png'는 matplotlib 미리보기 이미지이고,
+        '.16.png', '.npy', '.npz', '.raw'는 실제 맵 값을 저장한다. MapWriter 참고.
+        start_write_queue로 저장 큐를 시작한 경우에는 큐에 넣고 바로 반환하며, 저장은 백그라운드 스레드에서 실행된다.
         
         Args:
             image    : 이미지 프로세싱이 완료된 depth map 또는 heat map 2D 이미지 파일.
             path     : YAML 설정 파일에서 지정된 경로.
             map_type : 로그 기록을 위한 depth map, heat map을 구분하는 문자열.
-            cmap     : depth map인 경우 gray로 고정.
+            cmap     : depth map인 경우 gray로 고정. '.png' 미리보기 이미지에만 사용된다.
         Returns:
             없음.
             
         """
-        if not self.cm.empty_path(path) and self.cm.directory_exist(path, True):
-            plt.imsave(path, image, cmap=cmap) # 이미지 저장
-            self.cm.logger.info(f"{map_type.capitalize()} map saved at {path}")
+        if self.write_queue is not None:
+            self.write_queue.submit(path, self._write_image, image, path, map_type, cmap)
         else:
-            self.cm.logger.error(f"{map_type.capitalize()} map can't saved") # 경로가 지정되지 않은 경우 저장하지 않음
+            self._write_image(image, path, map_type, cmap)
+
+    def _write_image(self, image: np.ndarray, path: str, map_type: str, cmap: Optional[str]) -> None:
+        with self.cm.logger.span('save_image'):
+            if not self.cm.empty_path(path) and self.cm.directory_exist(path, True):
+                fmt: str = self.writer.write(image, path, cmap=cmap) # 이미지 저장
+                self.cm.logger.info("%s map saved at %s (%s)", args=(map_type.capitalize(), path, fmt))
+            else:
+                self.cm.logger.error(f"{map_type.capitalize()} map can't saved") # 경로가 지정되지 않은 경우 저장하지 않음
+
+    def start_write_queue(self, workers: int = 2, max_pending: int = 8) -> WriteQueue:
+        """이후의 save_image 호출을 백그라운드 저장 큐로 보낸다.
+        
+        Args:
+            workers     : 저장 스레드 개수.
+            max_pending : 최대 대기 작업 개수. 큐가 가득 차면 save_image가 기다린다.
+        Returns:
+            생성된 WriteQueue 인스턴스.
+            
+        """
+        if self.write_queue is None:
+            self.write_queue = WriteQueue(self.cm.logger, workers, max_pending)
+            self.cm.logger.info(f"Write queue started: {workers} workers, {max_pending} max pending")
+        return self.write_queue
+
+    def close_write_queue(self) -> List[str]:
+        """저장 큐에 남은 작업을 모두 저장하고 큐를 종료한다. 이후 save_image는 다시 바로 저장한다.
+        
+        Args:
+            없음.
+        Returns:
+            저장에 실패한 경로 목록.
+            
+        """
+        if self.write_queue is None:
+            return []
+        failed: List[str] = self.write_queue.close()
+        self.write_queue = None
+        return failed
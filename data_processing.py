@@ -1,162 +1,972 @@
+import os
+import json
 import numpy as np
 import open3d as o3d
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Union, Optional, List, Iterable
 
+from app_config import ALGORITHM_PARAMS
 from data_manager import DataManager
+from rasterizer import Rasterizer, MapAccumulator, SparseMapAccumulator, MAP_TYPES, LOW_MEMORY_POINT_BYTES
+from point_cloud_reader import PointCloudReader
+from tiled_noise_filter import TiledNoiseFilter
+from noise_cache import NoiseCache
+from noise_sweep import NoiseSweep
+from map_writer import split_ext
+from frame_stream import FrameStream
+from map_pyramid import MapPyramid
+from projection import ProjectionEngine
+from voxel_downsampler import VoxelDownsampler
+from roi_filter import RoiFilter
 
 class DataProcessing:
     def __init__(self) -> None:
         self.dm: DataManager = DataManager()
+        self.reader: PointCloudReader = PointCloudReader(self.dm.cm.logger)
+
+    def load_points(self, path: str) -> np.ndarray:
+        """PCD 또는 PLY 파일의 xyz 좌표를 open3d 없이 읽는다.
+
+        binary PCD, binary little endian PLY는 np.memmap view로 읽어 파일 내용을 복사하지 않는다.
+        ASCII, 압축 형식은 open3d로 읽는다.
+
+        Args:
+            path : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치.
+        Returns:
+            (N, 3) 형태의 xyz 좌표 배열.
+
+        """
+        return self.reader.read(path)
+
+    def to_points(self, source: Union[str, o3d.geometry.PointCloud, np.ndarray]) -> np.ndarray:
+        """파일 경로, 포인트 클라우드, 배열 중 하나를 (N, 3) xyz 좌표 배열로 만든다.
+
+        배열은 그대로, 포인트 클라우드는 open3d 내부 메모리를 공유하는 view로 반환하므로 복사하지 않는다.
+        파일 경로는 load_points로 읽는다.
+
+        Args:
+            source : PCD 또는 PLY 파일 위치, open3d 포인트 클라우드 또는 (N, 3) 형태의 xyz 좌표 배열.
+        Returns:
+            (N, 3) 형태의 xyz 좌표 배열.
+        Raises:
+            ValueError: 배열의 형태가 (N, 3)이 아닌 경우.
+
+        """
+        if isinstance(source, str):
+            return self.load_points(source)
+        points: np.ndarray = np.asarray(source.points) if isinstance(source, o3d.geometry.PointCloud) else source
+        if points.ndim != 2 or points.shape[1] != 3:
+            self.dm.cm.logger.error(f'Check input point array shape: {points.shape}')
+            raise ValueError(f"Point array must have shape (N, 3), got {points.shape}")
+        return points
+
+    def to_cloud(self, source: Union[str, o3d.geometry.PointCloud, np.ndarray]) -> o3d.geometry.PointCloud:
+        """파일 경로, 포인트 클라우드, 배열 중 하나를 open3d 포인트 클라우드로 만든다.
+
+        포인트 클라우드는 그대로 반환한다. open3d는 좌표를 자체 메모리에 보관하므로 배열은 한 번 복사되며,
+        float64 C 연속 배열이면 형 변환 없이 그 한 번만 복사한다.
+
+        Args:
+            source : PCD 또는 PLY 파일 위치, open3d 포인트 클라우드 또는 (N, 3) 형태의 xyz 좌표 배열.
+        Returns:
+            open3d 포인트 클라우드.
+        Raises:
+            ValueError: 배열의 형태가 (N, 3)이 아닌 경우.
+
+        """
+        if isinstance(source, str):
+            return o3d.io.read_point_cloud(source)
+        if isinstance(source, o3d.geometry.PointCloud):
+            return source
+        points: np.ndarray = np.ascontiguousarray(self.to_points(source), dtype=np.float64)
+        return o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
+
+    def crop_points(
+            self, 
+            source: Union[str, o3d.geometry.PointCloud, np.ndarray], 
+            roi: Dict[str, Any]
+        ) -> np.ndarray:
+        """관심 영역(ROI) 안의 포인트만 남긴다.
+
+        파일 경로는 PointCloudReader로 roi.chunk_size개씩 읽고 chunk마다 ROI 안의 포인트만 남긴다.
+        배열, 포인트 클라우드는 RoiFilter mask 한 번으로 자른다.
+
+        Args:
+            source : PCD 또는 PLY 파일 위치, open3d 포인트 클라우드 또는 (N, 3) 형태의 xyz 좌표 배열.
+            roi    : ROI 설정. 'type'('box', 'oriented_box', 'polygon')과 종류별 좌표, 'chunk_size'(선택).
+        Returns:
+            ROI 안의 (N, 3) 형태의 xyz 좌표 배열.
+        Raises:
+            ValueError: ROI 설정이 잘못된 경우.
+
+        """
+        with self.dm.cm.logger.span('crop_roi') as span:
+            roi_filter: RoiFilter = RoiFilter(roi, self.dm.cm.logger)
+            if isinstance(source, str):
+                points: np.ndarray = roi_filter.crop_chunks(self.reader.iter_chunks(source, roi.get('chunk_size', 1000000)))
+            else:
+                points = roi_filter.crop(self.to_points(source))
+            span['points'] = len(points)
+            return points
+
+    def load_cloud(
+            self, 
+            path: Union[str, o3d.geometry.PointCloud, np.ndarray], 
+            algorithm: str, 
+            params: Dict[str, Any],
+            tiling: Optional[Dict[str, Any]] = None,
+            cache: Optional[Dict[str, Any]] = None,
+            voxel: Optional[Dict[str, Any]] = None,
+            roi: Optional[Dict[str, Any]] = None
+        ) -> Union[o3d.geometry.PointCloud, np.ndarray]:
+        """설정된 알고리즘에 맞게 3D 파일을 읽는다.
+
+        algorithm이 'none'인 경우 노이즈 제거를 하지 않으므로 open3d가 필요 없다.
+        이 경우 to_points로 memmap view(또는 전달된 배열, 포인트 클라우드의 view)를 반환하여
+        투영, 래스터화 단계까지 복사 없이 사용한다. 그 외에는 remove_noise 결과를 반환한다.
+
+        Args:
+            path      : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치, 포인트 클라우드 또는 (N, 3) 배열.
+            algorithm : 'statistical', 'radius', 'none' 중 하나.
+            params    : remove_noise 파라미터. 'none'인 경우 사용하지 않는다.
+            tiling    : remove_noise 타일 분할 설정.
+            cache     : remove_noise 캐시 설정.
+            voxel     : remove_noise voxel 다운샘플링 설정.
+            roi       : 관심 영역 설정. use_roi가 true이면 ROI 밖의 포인트를 먼저 버린다.
+        Returns:
+            노이즈가 제거된 포인트 클라우드 또는 (N, 3) 형태의 xyz 좌표 배열.
+
+        """
+        if algorithm == 'none':
+            return self.crop_points(path, roi) if roi and roi.get('use_roi', False) else self.to_points(path)
+        return self.remove_noise(path, algorithm=algorithm, params=params, tiling=tiling, cache=cache, voxel=voxel, roi=roi)
 
     def remove_noise(
             self, 
-            path: str, 
+            path: Union[str, o3d.geometry.PointCloud, np.ndarray], 
             algorithm: str, 
-            params: Dict[str, Any]
+            params: Dict[str, Any],
+            tiling: Optional[Dict[str, Any]] = None,
+            cache: Optional[Dict[str, Any]] = None,
+            voxel: Optional[Dict[str, Any]] = None,
+            roi: Optional[Dict[str, Any]] = None
         ) -> o3d.geometry.PointCloud:
         """PCD 또는 PLY 파일의 노이즈를 제거한다.
         
         이 함수는 'statistical', 'radius' 2가지의 open3d의 outlier removal 알고리즘 사용이 가능하다.
+        tiling.use_tiling이 true인 경우 TiledNoiseFilter로 클라우드를 공간 타일로 나누어 병렬로 처리한다.
+        cache.use_cache가 true인 경우 NoiseCache에 결과 인덱스를 저장하고, 같은 입력에 대해서는 다시 계산하지 않는다.
+        roi.use_roi가 true인 경우 가장 먼저 crop_points로 관심 영역 밖의 포인트를 버린다.
+        voxel.use_voxel이 true인 경우 이웃 탐색 전에 VoxelDownsampler로 포인트 개수를 줄인다.
+        파일 경로 대신 포인트 클라우드나 (N, 3) 배열을 전달하면 파일을 거치지 않고 처리한다.
+        캐시 key는 입력 파일 내용으로 만들기 때문에 이 경우에는 캐시를 사용하지 않는다.
         
         Args:
-            path      : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치.
+            path      : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치, 포인트 클라우드 또는 (N, 3) 배열.
             algorithm : YAML 설정 파일에 지정한 알고리즘. 주석 처리를 통해 선택하여 사용 가능하다.
             params    : 'statistical'의 경우 'nb_neighbors'와 'std_ratio', 'radius'의 경우 'nb_points'와 'radius'
-                        모든 파라미터들은 YAML 파일에 딕셔너리 형태로 지정되어 있다.
+                        모든 파라미터들은 YAML 파일에 딕셔너리 형태로 지정되어 있다. 다른 키는 무시한다.
+            tiling    : 타일 분할 설정. 'use_tiling', 'tiles'(축별 타일 개수), 'workers', 'halo'(선택).
+                        None이면 타일 분할 없이 한 번에 처리한다.
+            cache     : 노이즈 제거 결과 캐시 설정. 'use_cache', 'path', 'max_size_mb'.
+                        None이면 캐시를 사용하지 않는다.
+            voxel     : voxel 다운샘플링 설정. 'use_voxel', 'voxel_size'(고정 크기) 또는
+                        'target_points'(목표 포인트 개수), 'time_budget'(노이즈 제거 시간 예산, 초).
+                        None이면 다운샘플링하지 않는다.
+            roi       : 관심 영역 설정. 'use_roi', 'type'과 종류별 좌표, 'chunk_size'(선택). crop_points 참고.
+                        None이면 자르지 않는다.
         Returns:
             노이즈가 제거된 포인트 클라우드.
         Raises:
             ValueError: 'statistical', 'radius' 이외의 값이 전달된 경우.
             
         """
-        pcd: o3d.geometry.PointCloud = o3d.io.read_point_cloud(path)
-        cl: o3d.geometry.PointCloud
-        ind: np.ndarray
-        
-        if algorithm == 'statistical':
-            cl, ind = pcd.remove_statistical_outlier(
-                nb_neighbors=params['nb_neighbors'],
-                std_ratio=params['std_ratio']
-            )
-            self.dm.cm.logger.info(f'Number of points after statistical noise removal: {len(np.asarray(cl.points))}')
-            return cl
+        with self.dm.cm.logger.span('remove_noise') as span:
+            cropped: bool = bool(roi and roi.get('use_roi', False))
+            pcd: o3d.geometry.PointCloud = self.to_cloud(self.crop_points(path, roi) if cropped else path)
+            span['points'] = len(pcd.points)
+            cl: o3d.geometry.PointCloud
+            ind: np.ndarray
+            tiled: bool = bool(tiling and tiling.get('use_tiling', False))
+
+            if algorithm not in ('statistical', 'radius'):
+                self.dm.cm.logger.error('Check removal algorithm')
+                raise ValueError("Unknown noise removal algorithm")
+            # 선택한 알고리즘이 받는 파라미터만 사용 (다른 알고리즘의 키가 섞여 있어도 캐시 key, 필터 호출에 영향 없음)
+            params = {key: value for key, value in params.items() if key in ALGORITHM_PARAMS[algorithm]}
+
+            # 같은 파일, 같은 파라미터로 이미 노이즈를 제거한 적이 있으면 캐시된 인덱스를 사용
+            # voxel 다운샘플링은 캐시를 확인한 뒤에 한다. key는 측정값이 아닌 voxel 설정으로 만들고,
+            # 고른 voxel 크기는 따로 저장하여 캐시 hit에서 같은 다운샘플링 클라우드를 다시 만든다.
+            use_voxel: bool = bool(voxel and voxel.get('use_voxel', False))
+            noise_cache: Optional[NoiseCache] = None
+            key: str = ''
+            if cache and cache.get('use_cache', False) and not isinstance(path, str):
+                self.dm.cm.logger.info('Noise cache skipped: in-memory input has no file to hash')
+            elif cache and cache.get('use_cache', False):
+                noise_cache = NoiseCache(cache['path'], cache.get('max_size_mb', 512), self.dm.cm.logger)
+                # 워커 개수는 결과에 영향이 없으므로 key에는 타일 분할과 halo만 사용
+                extra: Optional[Dict[str, Any]] = {name: tiling.get(name) for name in ('tiles', 'halo')} if tiled else None
+                if use_voxel or cropped:  # 잘라내거나 다운샘플링된 클라우드의 인덱스이므로 설정별로 따로 저장
+                    extra = {
+                        'tiling': extra, 
+                        'voxel': {name: voxel.get(name) for name in ('voxel_size', 'target_points', 'time_budget')} if use_voxel else None, 
+                        'roi': roi if cropped else None
+                    }
+                key = noise_cache.make_key(path, algorithm, params, extra)
+                cached: Optional[np.ndarray] = noise_cache.get(key, path)
+                cached_voxel: Optional[float] = noise_cache.get_voxel_size(key) if use_voxel and cached is not None else 0.0
+                if cached is not None and cached_voxel is not None:
+                    if cached_voxel:
+                        pcd = pcd.voxel_down_sample(cached_voxel)
+                    cl = pcd.select_by_index(cached.tolist())
+                    self.dm.cm.logger.info(f'Number of points after cached {algorithm} noise removal: {len(cl.points)}')
+                    return cl
+
+            # 이웃 탐색 전에 voxel grid로 포인트 개수를 줄임
+            voxel_size: float = 0.0
+            if use_voxel:
+                def run_filter(sample: o3d.geometry.PointCloud) -> Any:  # time_budget 추정용
+                    if algorithm == 'statistical':
+                        return sample.remove_statistical_outlier(**params)
+                    return sample.remove_radius_outlier(**params)
+
+                pcd, voxel_size = VoxelDownsampler(self.dm.cm.logger).downsample(
+                    pcd, 
+                    voxel_size=voxel.get('voxel_size'), 
+                    target_points=voxel.get('target_points'), 
+                    time_budget=voxel.get('time_budget'), 
+                    run_filter=run_filter
+                )
+
+            if tiled:
+                ind = TiledNoiseFilter(self.dm.cm.logger).filter(
+                    pcd, 
+                    algorithm, 
+                    params, 
+                    tiles=tiling['tiles'], 
+                    workers=tiling.get('workers', 1), 
+                    halo=tiling.get('halo')
+                )
+                cl = pcd.select_by_index(ind)
         
-        elif algorithm == 'radius':
-            cl, ind = pcd.remove_radius_outlier(
-                nb_points=params['nb_points'], 
-                radius=params['radius']
-            )
-            processed_img: o3d.geometry.PointCloud = pcd.select_by_index(ind)
-            self.dm.cm.logger.info(f'Number of points after radius noise removal: {len(np.asarray(processed_img.points))}')
-            return processed_img
+            elif algorithm == 'statistical':
+                cl, ind = pcd.remove_statistical_outlier(
+                    nb_neighbors=params['nb_neighbors'],
+                    std_ratio=params['std_ratio']
+                )
         
-        else:
-            self.dm.cm.logger.error('Check removal algorithm')
-            raise ValueError("Unknown noise removal algorithm")
+            else:
+                cl, ind = pcd.remove_radius_outlier(
+                    nb_points=params['nb_points'], 
+                    radius=params['radius']
+                )
+
+            if noise_cache is not None:
+                noise_cache.put(key, np.asarray(ind))
+                if use_voxel:
+                    noise_cache.put_voxel_size(key, voxel_size)
+
+            self.dm.cm.logger.info(f'Number of points after {"tiled " if tiled else ""}{algorithm} noise removal: {len(cl.points)}')
+            return cl
+
+    def sweep_noise(
+            self, 
+            path: str, 
+            grids: Dict[str, Dict[str, List[Any]]], 
+            projection_vector: Optional[np.ndarray] = None, 
+            map_paths: Optional[Dict[str, str]] = None, 
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> List[Dict[str, Any]]:
+        """노이즈 제거 파라미터 grid의 모든 조합에 대해 유지되는 포인트 개수를 구한다.
+
+        조합마다 remove_noise를 실행하지 않고, NoiseSweep으로 이웃 탐색을 알고리즘당 한 번만 실행한다.
+        map_paths가 지정되면 조합마다 맵을 생성하며, 저장 경로에는 알고리즘과 파라미터 값이 붙는다.
+        예) result/depth_map.png -> result/depth_map_statistical_nb_neighbors20_std_ratio2.0.png
+
+        Args:
+            path              : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치.
+            grids             : 알고리즘별 파라미터 후보 목록.
+                                예) {'statistical': {'nb_neighbors': [10, 20], 'std_ratio': [1.0, 2.0]}}
+            projection_vector : 맵 생성 시 사용할 투영 벡터.
+            map_paths         : 맵 이름과 저장 경로. None이면 맵을 생성하지 않는다.
+            image_size        : 적당한 이미지 크기.
+        Returns:
+            조합별 알고리즘, 파라미터, 유지된 포인트 개수, 전체 포인트 개수 목록.
+
+        """
+        points: np.ndarray = np.asarray(o3d.io.read_point_cloud(path).points)
+        results: List[Dict[str, Any]] = []
+
+        for algorithm, params, mask in NoiseSweep(points, self.dm.cm.logger).run(grids):
+            results.append({'algorithm': algorithm, 'params': params, 'kept': int(np.count_nonzero(mask)), 'total': len(points)})
+
+            if not map_paths:
+                continue
+            projected_points: np.ndarray = self.project_to_2d(points[mask], projection_vector)
+            if len(projected_points) < 2 or np.ptp(projected_points[:, 0]) == 0 or np.ptp(projected_points[:, 1]) == 0:  # 이미지 범위가 없음
+                self.dm.cm.logger.warning(f'Sweep {algorithm} {params}: too few points for maps')
+                continue
+            tag: str = '_'.join([algorithm] + [f'{key}{value}' for key, value in params.items()])
+            sweep_paths: Dict[str, str] = {
+                name: f'{split_ext(map_path)[0]}_{tag}{split_ext(map_path)[1]}'
+                for name, map_path in map_paths.items()
+            }
+            self.create_maps(projected_points, sweep_paths, image_size)
+
+        return results
 
     def project_to_2d(
             self, 
-            pcd: o3d.geometry.PointCloud, 
-            projection_vector: np.ndarray
+            pcd: Union[o3d.geometry.PointCloud, np.ndarray], 
+            projection_vector: np.ndarray,
+            legacy: bool = False
         ) -> np.ndarray:
-        """3D 이미지를 벡터 방향에 따라 투영 후 2D 배열로 변환한다.
-        
-        투영된 이미지의 개수가 홀수개인 경우 마지막 포인트 제거한다.
+        """3D 이미지를 투영 벡터 방향으로 보는 orthographic view로 투영한다.
+
+        ProjectionEngine으로 투영 벡터를 보는 방향으로 하는 기저를 만들고, 포인트마다 이미지 평면 좌표(u, v)와
+        보는 방향 거리(depth)를 계산한다. 포인트 i는 결과의 행 i이다.
+        legacy가 True이면 투영 값을 2개씩 묶어 (x, y) 좌표로 쓰는 기존 방식(2열 배열)을 사용한다.
+        이 경우 투영 값의 개수가 홀수개이면 마지막 포인트를 제거하고, 행 i는 포인트 2i, 2i+1이다.
         projected_points의 개수가 0인 경우는 warning 로그를 출력 및 기록한다.
         
         Args:
-            pcd               : 노이즈 제거가 완료된 포인트 클라우드.
+            pcd               : 노이즈 제거가 완료된 포인트 클라우드 또는 load_points로 읽은 (N, 3) 배열.
             projection_vector : 투영 벡터 방향을 설정하는 파라미터. YAML 파일에서 수정 가능하다. 
                                 현재는 X 방향으로 설정되어 있다.
+            legacy            : True이면 기존 2열 투영 방식을 사용한다. 이전 결과와 비교하는 경우에만 사용한다.
         Returns:
-            2D 배열로 변환된 투영된 포인트.
+            (u, v, depth) 3열 배열. legacy이면 2열 배열.
             
         """
-        points: np.ndarray = np.asarray(pcd.points)
+        with self.dm.cm.logger.span('project_to_2d') as span:
+            points: np.ndarray = pcd if isinstance(pcd, np.ndarray) else np.asarray(pcd.points)
+            span['points'] = len(points)
+            projected_points: np.ndarray = self._project(points, projection_vector, legacy)
+
+            if projected_points.size == 0:
+                self.dm.cm.logger.warning(f'No projected points. Current size: {projected_points.shape}')
+            else:
+                self.dm.cm.logger.info(f'Number of projected points: {len(projected_points)}')
+            
+            return projected_points
+    
+    def _project(self, points: np.ndarray, projection_vector: np.ndarray, legacy: bool = False) -> np.ndarray:
+        """포인트들을 투영 벡터 방향의 orthographic view로 투영한다. 로그는 기록하지 않는다.
+        legacy이면 투영 값을 2개씩 묶어 2D 배열로 변환한다."""
+        if not legacy:
+            view: Dict[str, Any] = {'name': 'projection', 'direction': np.asarray(projection_vector, dtype=np.float64)}
+            return ProjectionEngine([view]).project(points)['projection']
+
         projected_points: np.ndarray = points @ projection_vector.reshape(-1, 1)  # 벡터 형태로 변환
 
         if projected_points.size % 2 != 0:
             projected_points = projected_points[:-1]  # 마지막 포인트 제거
 
-        projected_points = projected_points.reshape(-1, 2)  # 2D 배열로 변환
+        return projected_points.reshape(-1, 2)  # 2D 배열로 변환
+
+    def project_views(
+            self,
+            pcd: Union[o3d.geometry.PointCloud, np.ndarray],
+            views: Iterable[Union[str, Dict[str, Any]]]
+        ) -> Dict[str, np.ndarray]:
+        """3D 포인트들을 여러 view(orthographic, pinhole)로 한 번에 투영한다.
+
+        project_to_2d와 달리 view마다 실제 이미지 평면 좌표(u, v)와 보는 방향 거리(depth)를 계산한다.
+        모든 view의 기저를 이어 붙인 행렬을 한 번만 곱하므로, 여러 view의 맵을 만들 때 포인트 클라우드를 다시 읽거나 복사하지 않는다.
+
+        Args:
+            pcd   : 노이즈 제거가 완료된 포인트 클라우드 또는 load_points로 읽은 (N, 3) 배열.
+            views : VIEW_PRESETS 이름('top', 'front', 'side' 등) 또는 view 설정 딕셔너리 목록. ProjectionEngine 참고.
+        Returns:
+            view 이름을 key로, (u, v, depth) 3열 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: view 설정이 잘못된 경우.
+
+        """
+        with self.dm.cm.logger.span('project_views') as span:
+            points: np.ndarray = pcd if isinstance(pcd, np.ndarray) else np.asarray(pcd.points)
+            span['points'] = len(points)
+            projected_views: Dict[str, np.ndarray] = ProjectionEngine(views).project(points)
+            self.dm.cm.logger.info(f'Projected views: { {name: len(view) for name, view in projected_views.items()} }')
+            return projected_views
+
+    def create_view_maps(
+            self,
+            pcd: Union[o3d.geometry.PointCloud, np.ndarray],
+            views: Iterable[Union[str, Dict[str, Any]]],
+            map_paths: Dict[str, str],
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> Dict[str, Dict[str, np.ndarray]]:
+        """포인트들을 여러 view로 한 번에 투영하고 view마다 맵을 만든다.
+        맵은 경로에 view 이름을 붙여 저장한다. 예) result/depth_map.png -> result/depth_map_top.png
+        투영된 포인트가 2개 미만이거나 범위가 0인 view는 warning 로그를 남기고 건너뛴다.
+
+        Args:
+            pcd        : 노이즈 제거가 완료된 포인트 클라우드 또는 (N, 3) 배열.
+            views      : view 이름 또는 view 설정 딕셔너리 목록.
+            map_paths  : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+            image_size : 적당한 이미지 크기.
+        Returns:
+            view 이름을 key로, 맵 딕셔너리를 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정되었거나 view 설정이 잘못된 경우.
+
+        """
+        unknown = [name for name in map_paths if name not in MAP_TYPES]
+        if unknown:
+            self.dm.cm.logger.error(f'Check 2Dfile_paths map names: {unknown}')
+            raise ValueError(f"Unknown map type: {unknown}")
+
+        views = list(views)
+        engine: ProjectionEngine = ProjectionEngine(views)  # pinhole view의 이미지 범위 계산용
+        projected_views: Dict[str, np.ndarray] = self.project_views(pcd, views)
+        results: Dict[str, Dict[str, np.ndarray]] = {}
+        for name, projected_view in projected_views.items():
+            with self.dm.cm.logger.span('create_view_maps', len(projected_view)):
+                bounds = engine.bounds(name)
+                if len(projected_view) < 2 or (bounds is None and (np.ptp(projected_view[:, 0]) == 0 or np.ptp(projected_view[:, 1]) == 0)):
+                    self.dm.cm.logger.warning(f'View {name} has no image extent. Skip maps ({len(projected_view)} points)')
+                    continue
+                results[name] = Rasterizer(image_size).rasterize_view(projected_view, map_paths.keys(), bounds)
+                self.save_maps(results[name], {
+                    map_name: f'{split_ext(map_path)[0]}_{name}{split_ext(map_path)[1]}'
+                    for map_name, map_path in map_paths.items()
+                })
+        return results
 
-        if projected_points.size == 0:
-            self.dm.cm.logger.warning(f'Projected points size is not even. Current size: {projected_points}')
-        else:
-            self.dm.cm.logger.info(f'Number of projected points: {projected_points.size}')
-            
-        return projected_points
-    
     def create_depth_map(
             self, 
             projected_points: np.ndarray, 
-            depth_map_path: str, 
+            depth_map_path: Optional[str] = None, 
             image_size: Tuple[int, int] = (100, 100)
-        ) -> None:
+        ) -> np.ndarray:
         """투영된 포인트들을 2D depth map으로 생성한다.
         
-        최대 최소 depth 값을 가져와 투영된 포인트들과 계산하여, 2차원 좌표값을 획득한다. 이후 depth 값을 해당 위치에 저장한다.
+        최대 최소 depth 값을 가져와 Rasterizer로 모든 포인트의 2차원 좌표값을 한 번에 계산한다. 이후 depth 값을 해당 위치에 누적한다.
         평균화 작업을 진행하고, 이미지 저장을 위해 파라미터 값을 DataManager 클래스의 save_image 메소드에 넘겨준다.
         float32 타입이며, 사진 색상은 회색이다.
         
         Args:
-            projected_points : 2D 배열로 변환된 투영된 포인트.
+            projected_points : project_to_2d로 투영된 포인트.
             depth_map_path   : 이미지 저장을 위한 경로. YAML 설정 파일에 해당 경로가 지정되어 있다. 
+                               None이면 저장하지 않는다.
             image_size       : 적당한 이미지 크기.
         Returns:
-            없음.
+            depth map 배열.
             
         """
-        depth_map_image: np.ndarray = np.zeros(image_size, dtype=np.float32)  # Depth map 초기화
-        count_map: np.ndarray = np.zeros(image_size, dtype=int)  # 카운트 배열 초기화
-
-        max_depth, min_depth = self.dm.get_depths(projected_points)
-
-        for point in projected_points:
-            x: int = int((point[0] - min_depth) / (max_depth - min_depth) * (image_size[1] - 1))
-            y: int = int((point[1] - min_depth) / (max_depth - min_depth) * (image_size[0] - 1))
-
-            if 0 <= x < image_size[1] and 0 <= y < image_size[0]:
-                depth_map_image[y, x] += point[0]  # depth 값을 해당 위치에 저장
-                count_map[y, x] += 1  # 카운트 증가
+        with self.dm.cm.logger.span('create_depth_map', len(projected_points)):
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            depth_map_image: np.ndarray = Rasterizer(image_size).depth_map(projected_points, max_depth, min_depth)
 
-        # 평균화
-        depth_map_image[count_map > 0] /= count_map[count_map > 0]
-
-        self.dm.cm.logger.info(f'Depth map parameters: {depth_map_image.size}, {depth_map_path}')
-        self.dm.save_image(depth_map_image, depth_map_path, map_type="depth", cmap='gray')  # depth map image 저장
+            self.dm.cm.logger.info(f'Depth map parameters: {depth_map_image.size}, {depth_map_path}')
+            if depth_map_path:
+                self.dm.save_image(depth_map_image, depth_map_path, map_type="depth", cmap='gray')  # depth map image 저장
+            return depth_map_image
 
 
     def create_heat_map(
             self, 
             projected_points: np.ndarray, 
-            heat_map_path: str, 
+            heat_map_path: Optional[str] = None, 
             image_size: Tuple[int, int] = (100, 100)
-        ) -> None:
+        ) -> np.ndarray:
         """투영된 포인트들을 2D heat map으로 생성.
         
-        최대 최소 depth 값을 가져와 투영된 포인트들과 계산하여, 2차원 좌표값을 획득한다. 
-        이후 heat_map_image 배열에 x, y 좌표값을 대입한다.
+        최대 최소 depth 값을 가져와 Rasterizer로 모든 포인트의 2차원 좌표값을 한 번에 계산한다. 
+        이후 heat_map_image 배열의 해당 위치들을 한 번에 칠한다.
         이미지 저장을 위해 파라미터 값을 DataManager 클래스의 save_image 메소드에 넘겨준다.
         uint8 타입이며, 사진 색상은 붉은색으로 지정했다.
         
         Args:
-            projected_points : 2D 배열로 변환된 투영된 포인트.
+            projected_points : project_to_2d로 투영된 포인트.
             heat_map_path    : 이미지 저장을 위한 경로. YAML 설정 파일에 해당 경로가 지정되어 있다. 
+                               None이면 저장하지 않는다.
             image_size       : 적당한 이미지 크기.
         Returns:
-            없음.
+            heat map 배열.
             
         """        
-        heat_map_image: np.ndarray = np.zeros((image_size[0], image_size[1], 3), dtype=np.uint8)  # 3채널 RGB 이미지 초기화
-        max_depth, min_depth = self.dm.get_depths(projected_points)
-        
-        for point in projected_points:
-            x: int = int((point[0] - min_depth) / (max_depth - min_depth) * (image_size[1] - 1))
-            y: int = int((point[1] - min_depth) / (max_depth - min_depth) * (image_size[0] - 1))
+        with self.dm.cm.logger.span('create_heat_map', len(projected_points)):
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            heat_map_image: np.ndarray = Rasterizer(image_size).heat_map(projected_points, max_depth, min_depth)
+
+            self.dm.cm.logger.info(f'Heat map parameters: {heat_map_image.size}, {heat_map_path}')
+            if heat_map_path:
+                self.dm.save_image(heat_map_image, heat_map_path, map_type="heat")  # heat map image 저장
+            return heat_map_image
+
+    def create_zbuffer_map(
+            self, 
+            projected_points: np.ndarray, 
+            depth_map_path: Optional[str] = None, 
+            image_size: Tuple[int, int] = (100, 100), 
+            nearest: bool = True, 
+            index_path: Optional[str] = None
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """투영된 포인트들로 픽셀마다 가장 가까운(또는 가장 먼) 포인트 하나의 depth만 남긴 depth map을 생성한다.
+
+        create_depth_map의 평균과 달리 보이는 면 뒤의 포인트가 섞이지 않는다. 픽셀 위치는 create_depth_map과 같다.
+        nearest는 depth 값(투영 값)이 가장 작은 포인트이다.
+        이긴 포인트 인덱스는 project_to_2d에 전달한 클라우드의 포인트 인덱스이다.
+        legacy 2열 배열은 투영 값을 2개씩 묶어 첫 번째 값을 depth로 쓰므로, 행 i는 포인트 2i이다.
+
+        Args:
+            projected_points : project_to_2d로 투영된 포인트.
+            depth_map_path   : depth map 저장 경로. None이면 저장하지 않는다.
+            image_size       : 적당한 이미지 크기.
+            nearest          : True이면 가장 가까운 포인트, False이면 가장 먼 포인트를 남긴다.
+            index_path       : 픽셀별 이긴 포인트 인덱스 맵의 저장 경로('.npy', '.npz', '.raw'). None이면 저장하지 않는다.
+        Returns:
+            float32 depth map과 픽셀별 이긴 포인트의 클라우드 인덱스(int64, 포인트가 없으면 -1) 배열.
+        Raises:
+            ValueError : index_path가 인덱스 값을 그대로 저장하지 않는 형식('.png', '.16.png' 등)인 경우.
+
+        """
+        if index_path and split_ext(index_path)[1].lower() not in ('.npy', '.npz', '.raw'):
+            raise ValueError(f"Point index map must be saved as .npy, .npz or .raw, got {index_path}")
+
+        with self.dm.cm.logger.span('create_zbuffer_map', len(projected_points)):
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            depth_map_image, index_image = Rasterizer(image_size).z_buffer_map(projected_points, max_depth, min_depth, nearest)
+            if projected_points.shape[1] == 2:
+                index_image[index_image >= 0] *= 2  # legacy projected_points 행 -> 클라우드 포인트 인덱스
+
+            self.dm.cm.logger.info(
+                f'Z-buffer depth map ({"nearest" if nearest else "farthest"}): '
+                f'{np.count_nonzero(index_image >= 0)} pixels, {depth_map_path}'
+            )
+            if depth_map_path:
+                self.dm.save_image(depth_map_image, depth_map_path, map_type="depth", cmap='gray')
+            if index_path:
+                self.dm.save_image(index_image, index_path, map_type="point index", cmap='gray')
+            return depth_map_image, index_image
+
+    def create_maps(
+            self,
+            projected_points: np.ndarray,
+            map_paths: Dict[str, str],
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> Dict[str, np.ndarray]:
+        """투영된 포인트들로 여러 종류의 2D 맵을 한 번에 생성한다.
+
+        최대 최소 depth 값과 픽셀 좌표를 한 번만 계산하고, 그 결과를 공유하여
+        map_paths에 지정된 맵들(depth, heat, density, min depth, max depth, std)을 만든다.
+        create_depth_map, create_heat_map을 따로 호출하는 것과 달리 포인트 클라우드를 한 번만 훑는다.
+        생성된 맵은 save_maps로 각각 지정된 경로에 저장한다.
+
+        Args:
+            projected_points : project_to_2d로 투영된 포인트.
+            map_paths        : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+                               예) {'depth_map': 'result/depth_map.png', 'std_map': 'result/std_map.png'}
+                               경로가 None인 맵은 저장하지 않고 배열만 반환한다.
+            image_size       : 적당한 이미지 크기.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정된 경우.
+
+        """
+        with self.dm.cm.logger.span('create_maps', len(projected_points)):
+            unknown = [name for name in map_paths if name not in MAP_TYPES]
+            if unknown:
+                self.dm.cm.logger.error(f'Check 2Dfile_paths map names: {unknown}')
+                raise ValueError(f"Unknown map type: {unknown}")
+
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            maps: Dict[str, np.ndarray] = Rasterizer(image_size).rasterize(
+                projected_points, max_depth, min_depth, map_paths.keys()
+            )
+
+            self.save_maps(maps, map_paths)
+            return maps
+
+    def process(
+            self,
+            source: Union[str, o3d.geometry.PointCloud, np.ndarray],
+            projection_vector: np.ndarray,
+            map_names: Iterable[str] = ('depth_map', 'heat_map'),
+            algorithm: str = 'none',
+            params: Optional[Dict[str, Any]] = None,
+            image_size: Tuple[int, int] = (100, 100),
+            map_paths: Optional[Dict[str, str]] = None,
+            voxel: Optional[Dict[str, Any]] = None,
+            roi: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, np.ndarray]:
+        """노이즈 제거, 2D 투영, 맵 생성을 메모리 안에서 실행하고 맵 배열을 반환한다.
+
+        다른 수집 코드 뒤에 파이프라인을 붙이는 경우에 사용한다. 입력을 임시 PCD 파일로 쓰거나 저장된 이미지를
+        다시 읽을 필요가 없다. 배열, 포인트 클라우드 입력은 to_points, to_cloud와 같은 규칙으로 복사를 줄인다.
+        map_paths를 지정한 맵만 마지막 단계에서 파일로 저장한다.
+
+        예)
+            maps = dp.process(points, np.array([1, 0, 0]), map_names=['depth_map', 'density_map'])
+
+        Args:
+            source            : PCD 또는 PLY 파일 위치, open3d 포인트 클라우드 또는 (N, 3) 형태의 xyz 좌표 배열.
+            projection_vector : 투영 벡터.
+            map_names         : 생성할 맵 이름 목록.
+            algorithm         : 'statistical', 'radius', 'none' 중 하나.
+            params            : remove_noise 파라미터. 'none'인 경우 사용하지 않는다.
+            image_size        : 적당한 이미지 크기.
+            map_paths         : 맵 이름과 저장 경로. None이면 저장하지 않는다.
+            voxel             : remove_noise voxel 다운샘플링 설정.
+            roi               : 관심 영역 설정.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 입력 배열의 형태가 (N, 3)이 아니거나, 알고리즘 또는 맵 이름이 잘못된 경우.
+
+        """
+        cloud: Union[o3d.geometry.PointCloud, np.ndarray] = self.load_cloud(source, algorithm, params or {}, voxel=voxel, roi=roi)
+        projected_points: np.ndarray = self.project_to_2d(cloud, projection_vector)
+        return self.create_maps(
+            projected_points, 
+            {name: (map_paths or {}).get(name) for name in map_names}, 
+            image_size
+        )
+
+    def create_map_pyramid(
+            self,
+            projected_points: np.ndarray,
+            map_paths: Dict[str, str],
+            image_size: Tuple[int, int] = (100, 100),
+            min_size: int = 64,
+            tile_size: Optional[int] = None
+        ) -> MapPyramid:
+        """투영된 포인트들을 image_size에서 한 번만 누적하고, 2x2 블록 합치기로 작은 해상도의 맵들을 만든다.
+
+        tile_size가 없으면 level마다 맵 하나를 저장한다. 예) result/depth_map.png -> result/depth_map_L0.png
+        tile_size가 있으면 level마다 타일로 나누어 저장하고, level별 크기와 타일 개수를 pyramid.json에 기록한다.
+        예) result/depth_map.png -> result/depth_map/L0/0_0.png, result/depth_map/pyramid.json
+        '.png' 미리보기 이미지는 타일마다 colormap 범위가 따로 정해지므로, 타일은 '.16.png', '.npy' 등을 권장한다.
+
+        Args:
+            projected_points : project_to_2d로 투영된 포인트.
+            map_paths        : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+            image_size       : 가장 큰 level(level 0)의 이미지 크기.
+            min_size         : 가장 작은 level의 긴 변 최대 크기.
+            tile_size        : 타일 한 변의 픽셀 개수. None이면 타일로 나누지 않는다.
+        Returns:
+            level별 누적값을 가진 MapPyramid.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정된 경우.
+
+        """
+        with self.dm.cm.logger.span('create_map_pyramid', len(projected_points)):
+            unknown = [name for name in map_paths if name not in MAP_TYPES]
+            if unknown:
+                self.dm.cm.logger.error(f'Check 2Dfile_paths map names: {unknown}')
+                raise ValueError(f"Unknown map type: {unknown}")
+
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            rasterizer: Rasterizer = Rasterizer(image_size)
+            linear_index, valid = rasterizer.compute_indices(projected_points, max_depth, min_depth)
+            accumulator: Union[MapAccumulator, SparseMapAccumulator] = rasterizer.accumulator(map_paths.keys(), len(linear_index))
+            accumulator.add(linear_index, Rasterizer.depths(projected_points)[valid])
+
+            pyramid: MapPyramid = MapPyramid(accumulator, min_size)
+            self.dm.cm.logger.info(f'Map pyramid levels: {[level.image_size for level in pyramid.levels]}')
+
+            for level in range(len(pyramid.levels)):
+                maps: Dict[str, np.ndarray] = pyramid.level_maps(level)
+                if tile_size is None:
+                    self.save_maps(maps, {
+                        name: f'{split_ext(map_path)[0]}_L{level}{split_ext(map_path)[1]}'
+                        for name, map_path in map_paths.items()
+                    })
+                    continue
+                for name, image in maps.items():
+                    stem, ext = split_ext(map_paths[name])
+                    for row, col, tile in pyramid.tiles(image, tile_size):
+                        tile_path: str = os.path.join(stem, f'L{level}', f'{row}_{col}{ext}')
+                        self.dm.save_image(tile, tile_path, map_type=name[:-len('_map')].replace('_', ' '), cmap=MAP_TYPES[name])
+
+            if tile_size is not None:
+                for name, map_path in map_paths.items():
+                    stem, ext = split_ext(map_path)
+                    self.dm.cm.logger.info(f'Pyramid manifest saved at {pyramid.write_manifest(stem, name, tile_size, ext)}')
+            return pyramid
+
+    def create_map_tiles(
+            self,
+            projected_points: np.ndarray,
+            map_paths: Dict[str, str],
+            image_size: Tuple[int, int],
+            tile_size: int
+        ) -> SparseMapAccumulator:
+        """이미지 전체 크기의 배열을 만들지 않고, 포인트가 있는 타일의 맵만 저장한다.
+
+        포인트는 SparseMapAccumulator로 포인트가 있는 픽셀에만 누적하고, 타일 하나씩 dense 배열로 만들어 저장한다.
+        메모리는 포인트가 있는 픽셀 개수와 타일 하나의 크기에 비례하므로 50k x 50k처럼 큰 해상도에 사용한다.
+        타일 경로와 포인트가 있는 타일 목록은 tiles.json에 기록한다. 목록에 없는 타일은 빈 타일이다.
+        예) result/depth_map.png -> result/depth_map/0_0.png, result/depth_map/tiles.json
+
+        Args:
+            projected_points : project_to_2d로 투영된 포인트.
+            map_paths        : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+            image_size       : 전체 이미지 크기.
+            tile_size        : 타일 한 변의 픽셀 개수.
+        Returns:
+            포인트를 누적한 SparseMapAccumulator.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정된 경우.
+
+        """
+        with self.dm.cm.logger.span('create_map_tiles', len(projected_points)):
+            unknown = [name for name in map_paths if name not in MAP_TYPES]
+            if unknown:
+                self.dm.cm.logger.error(f'Check 2Dfile_paths map names: {unknown}')
+                raise ValueError(f"Unknown map type: {unknown}")
+
+            max_depth, min_depth = self.dm.get_depths(projected_points)
+            linear_index, valid = Rasterizer(image_size).compute_indices(projected_points, max_depth, min_depth)
+            accumulator: SparseMapAccumulator = SparseMapAccumulator(image_size, map_paths.keys())
+            accumulator.add(linear_index, Rasterizer.depths(projected_points)[valid])
+            self.dm.cm.logger.info(
+                f'Sparse accumulation: {len(accumulator.keys)} of {image_size[0] * image_size[1]} pixels occupied, '
+                f'{accumulator.nbytes / 2 ** 20:.1f} MB'
+            )
+
+            written: List[List[int]] = []
+            for row, col, tile in accumulator.tiles(tile_size):
+                for name, image in tile.maps().items():
+                    stem, ext = split_ext(map_paths[name])
+                    self.dm.save_image(image, os.path.join(stem, f'{row}_{col}{ext}'), map_type=name[:-len('_map')].replace('_', ' '), cmap=MAP_TYPES[name])
+                written.append([row, col])
+
+            for name, map_path in map_paths.items():
+                stem, ext = split_ext(map_path)
+                manifest_path: str = os.path.join(stem, 'tiles.json')
+                os.makedirs(stem, exist_ok=True)
+                with open(manifest_path, 'w', encoding='UTF8') as file:
+                    json.dump({
+                        'map': name,
+                        'size': list(image_size),
+                        'tile_size': tile_size,
+                        'rows': -(-image_size[0] // tile_size),
+                        'cols': -(-image_size[1] // tile_size),
+                        'path': f'{{row}}_{{col}}{ext}',
+                        'tiles': written,
+                    }, file, indent=2)
+                self.dm.cm.logger.info(f'Map tiles manifest saved at {manifest_path} ({len(written)} tiles)')
+            return accumulator
+
+    def create_maps_low_memory(
+            self,
+            pcd: Union[str, o3d.geometry.PointCloud, np.ndarray],
+            projection_vector: np.ndarray,
+            map_paths: Dict[str, str],
+            max_memory_mb: float,
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> Dict[str, np.ndarray]:
+        """좌표를 float32로 다루고 메모리 예산(max_memory_mb) 안에서 2D 맵을 생성한다.
+
+        투영은 float32 행렬 곱으로, 정규화는 Rasterizer의 low_memory 모드로 제자리에서 계산하며,
+        픽셀별 포인트 개수는 전체 포인트 개수가 들어가는 가장 작은 정수 타입(np.min_scalar_type)을 사용한다.
+        입력 포인트 배열, 누적 배열, 포인트당 처리 메모리(LOW_MEMORY_POINT_BYTES)로 예상 메모리를 계산하고,
+        예산을 넘으면 예산에 맞는 크기의 chunk로 나누어 처리한다. chunk마다 float32 복사본을 만들며
+        (chunk가 하나이면 전체 포인트의 복사본), 이 복사본은 포인트당 처리 메모리에 포함된다.
+        파일 경로를 전달하면 binary PCD, PLY는 memmap으로 읽으므로 입력은 chunk 분량만 메모리에 올라온다.
+        메모리에 있는 배열, 포인트 클라우드를 전달하면 입력 배열 크기도 예산에 포함된다.
+        float32 반올림 때문에 create_maps와 경계 픽셀이 다를 수 있다.
+
+        Args:
+            pcd               : PCD 또는 PLY 파일 경로, 노이즈 제거가 완료된 포인트 클라우드 또는 (N, 3) 배열.
+            projection_vector : 투영 벡터.
+            map_paths         : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+            max_memory_mb     : 맵 생성에 사용할 최대 메모리(MB). memmap이 아닌 입력 포인트 배열을 포함한다.
+            image_size        : 적당한 이미지 크기.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정된 경우, 입력 배열과 이미지 배열만으로 예산을 넘는 경우, 투영된 포인트가 없는 경우.
+
+        """
+        with self.dm.cm.logger.span('create_maps_low_memory') as span:
+            unknown = [name for name in map_paths if name not in MAP_TYPES]
+            if unknown:
+                self.dm.cm.logger.error(f'Check 2Dfile_paths map names: {unknown}')
+                raise ValueError(f"Unknown map type: {unknown}")
+
+            points: np.ndarray = self.to_points(pcd)  # 파일 경로는 memmap view (binary PCD, PLY)
+            span['points'] = len(points)
+            vector: np.ndarray = np.asarray(projection_vector, dtype=np.float32)
+            accumulator: MapAccumulator = MapAccumulator(image_size, map_paths.keys(), count_dtype=np.min_scalar_type(len(points)))
+
+            # 예상 메모리: 메모리에 있는 입력 배열 + 누적 배열 + bincount 임시 배열(int64) + 출력 맵(float32) + 포인트별 임시 배열
+            budget: float = max_memory_mb * 2 ** 20
+            input_bytes: int = 0 if self._is_memmap(points) else points.nbytes
+            pixel_bytes: int = input_bytes + accumulator.nbytes + image_size[0] * image_size[1] * (8 + 4 * len(map_paths))
+            if pixel_bytes >= budget:
+                raise ValueError(
+                    f"Input points ({input_bytes / 2 ** 20:.1f} MB) and image buffers need {pixel_bytes / 2 ** 20:.1f} MB, "
+                    f"over max_memory_mb {max_memory_mb}. Pass a binary PCD/PLY path to read the input with memmap"
+                )
+            chunk_size: int = len(points)
+            if pixel_bytes + len(points) * LOW_MEMORY_POINT_BYTES > budget:
+                chunk_size = max(int((budget - pixel_bytes) // LOW_MEMORY_POINT_BYTES), 1)
+            chunks: List[np.ndarray] = [points[start:start + chunk_size] for start in range(0, len(points), max(chunk_size, 1))]
+            self.dm.cm.logger.info(
+                f'Low memory estimate: {(pixel_bytes + len(points) * LOW_MEMORY_POINT_BYTES) / 2 ** 20:.1f} MB '
+                f'(budget {max_memory_mb} MB, input {input_bytes / 2 ** 20:.1f} MB), '
+                f'{len(chunks)} chunk(s) of {chunk_size} points, count type {accumulator.count.dtype}'
+            )
+
+            # 이미지 범위(u, v) 계산. chunk가 하나이면 투영 결과를 누적에 그대로 사용
+            bounds: Optional[Tuple[float, float, float, float]] = None
+            projected_points: np.ndarray = np.empty((0, 3), dtype=np.float32)
+            for chunk in chunks:
+                projected_points = self._project(np.asarray(chunk, dtype=np.float32), vector)
+                bounds = Rasterizer.extend_bounds(bounds, projected_points)
+            if bounds is None:
+                raise ValueError("No projected points")
+            self.dm.cm.logger.info(f"Calculated image bounds {bounds}")
+
+            rasterizer: Rasterizer = Rasterizer(image_size, low_memory=True)
+            for chunk in chunks:
+                if len(chunks) > 1:
+                    projected_points = self._project(np.asarray(chunk, dtype=np.float32), vector)
+                linear_index, valid = rasterizer.compute_indices(projected_points, 0, 0, bounds)
+                accumulator.add(linear_index, Rasterizer.depths(projected_points)[valid])
+            del projected_points
+
+            maps: Dict[str, np.ndarray] = accumulator.maps()
+            self.save_maps(maps, map_paths)
+            peak_rss: Optional[float] = self.dm.cm.logger.peak_rss_mb()
+            if peak_rss is not None:
+                self.dm.cm.logger.info(f'Peak RSS after low memory maps: {peak_rss:.1f} MB')
+            return maps
+
+    def _is_memmap(self, points: np.ndarray) -> bool:
+        """배열이 np.memmap의 view인지 확인한다. memmap은 읽은 부분만 메모리에 올라온다."""
+        base: Any = points
+        while base is not None:
+            if isinstance(base, np.memmap):
+                return True
+            base = getattr(base, 'base', None)
+        return False
+
+    def create_maps_streaming(
+            self,
+            path: str,
+            projection_vector: np.ndarray,
+            map_paths: Dict[str, str],
+            chunk_size: int,
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> Dict[str, np.ndarray]:
+        """메모리보다 큰 포인트 클라우드를 chunk 단위로 읽어 2D 맵을 생성한다.
+
+        첫 번째 pass에서는 chunk마다 투영만 하여 이미지 범위(u, v 최소 최대)를 구하고,
+        두 번째 pass에서 chunk마다 투영, 픽셀 좌표 계산 후 MapAccumulator에 누적한다.
+        최대 메모리 사용량은 클라우드 크기가 아니라 chunk_size와 이미지 크기로 정해진다.
+        모든 chunk가 같은 이미지 범위를 사용하므로 결과는 전체를 메모리에 올려 create_maps를 실행한 것과 같다.
+        노이즈 제거는 클라우드 전체의 이웃 탐색이 필요하므로 이 모드에서는 수행하지 않는다.
 
-            if 0 <= x < image_size[1] and 0 <= y < image_size[0]:
-                heat_map_image[y, x] = [255, 0, 0]  # 붉은색으로 표시
+        Args:
+            path              : YAML 설정 파일에 지정한 PCD 또는 PLY 파일 위치.
+            projection_vector : 투영 벡터.
+            map_paths         : 맵 이름과 저장 경로. YAML 설정 파일의 2Dfile_paths 항목이다.
+            chunk_size        : 한 번에 읽을 최대 포인트 개수.
+            image_size        : 적당한 이미지 크기.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 지정된 경우, 투영된 포인트가 없는 경우.
+
+        """
+        with self.dm.cm.logger.span('create_maps_streaming') as span:
+            accumulator: MapAccumulator = MapAccumulator(image_size, map_paths.keys())
+            rasterizer: Rasterizer = Rasterizer(image_size)
+
+            # 1st pass: 이미지 범위 계산
+            bounds: Optional[Tuple[float, float, float, float]] = None
+            for chunk in self.reader.iter_chunks(path, chunk_size):
+                bounds = Rasterizer.extend_bounds(bounds, self._project(chunk, projection_vector))
+
+            if bounds is None:
+                raise ValueError(f"No projected points in {path}")
+            self.dm.cm.logger.info(f"Calculated image bounds {bounds}")
+
+            # 2nd pass: chunk 단위 누적
+            points: int = 0
+            for chunk in self.reader.iter_chunks(path, chunk_size):
+                projected_points: np.ndarray = self._project(chunk, projection_vector)
+                linear_index, valid = rasterizer.compute_indices(projected_points, 0, 0, bounds)
+                accumulator.add(linear_index, Rasterizer.depths(projected_points)[valid])
+                points += len(chunk)
+            span['points'] = points
+            self.dm.cm.logger.info(f'Number of streamed points: {points} (chunk size {chunk_size})')
+
+            maps: Dict[str, np.ndarray] = accumulator.maps()
+            self.save_maps(maps, map_paths)
+            return maps
+
+    def create_maps_from_frames(
+            self,
+            frames: Iterable[Union[str, np.ndarray]],
+            projection_vector: np.ndarray,
+            map_paths: Dict[str, str],
+            window: Optional[int] = None,
+            decay: Optional[float] = None,
+            emit_every: int = 1,
+            bounds: Optional[Tuple[float, float, float, float]] = None,
+            image_size: Tuple[int, int] = (100, 100)
+        ) -> List[int]:
+        """연속된 프레임으로 depth map, heat map을 갱신하면서 emit_every 프레임마다 저장한다.
+
+        프레임마다 맵을 처음부터 다시 만들지 않고, FrameStream의 픽셀별 합계, 개수 누적값에
+        새 프레임을 더하고 window 밖으로 나간 프레임을 빼거나(window) 가중치를 줄인다(decay).
+        저장 경로에는 프레임 번호가 붙는다. 예) result/depth_map.png -> result/depth_map_000010.png
+
+        Args:
+            frames            : 프레임 PCD/PLY 파일 경로 또는 (N, 3) 포인트 배열의 iterable.
+            projection_vector : 투영 벡터.
+            map_paths         : 맵 이름과 저장 경로. depth_map, heat_map, density_map을 지원한다.
+            window            : 유지할 최근 프레임 개수.
+            decay             : 프레임마다 곱할 가중치 감소 비율.
+            emit_every        : 맵을 저장할 프레임 간격.
+            bounds            : (u 최소, u 최대, v 최소, v 최대) 이미지 범위. None이면 첫 번째 프레임의 범위.
+            image_size        : 적당한 이미지 크기.
+        Returns:
+            맵을 저장한 프레임 번호 목록.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름, window와 decay를 함께 지정한 경우.
+
+        """
+        with self.dm.cm.logger.span('create_maps_from_frames') as span:
+            stream: FrameStream = FrameStream(image_size, map_paths.keys(), window, decay, emit_every=emit_every, bounds=bounds)
+            emitted: List[int] = []
+            points: int = 0
+
+            for frame in frames:
+                frame_points: np.ndarray = self.load_points(frame) if isinstance(frame, str) else frame
+                points += len(frame_points)
+                if stream.add(self._project(frame_points, projection_vector)):
+                    frame_paths: Dict[str, str] = {
+                        name: f'{split_ext(map_path)[0]}_{stream.frames:06d}{split_ext(map_path)[1]}'
+                        for name, map_path in map_paths.items()
+                    }
+                    self.save_maps(stream.maps(), frame_paths)
+                    emitted.append(stream.frames)
+
+            span['points'] = points
+            self.dm.cm.logger.info(f'Frame stream finished: {stream.frames} frames, {len(emitted)} map updates')
+            return emitted
 
-        self.dm.cm.logger.info(f'Heat map parameters: {heat_map_image.size}, {heat_map_path}')
-        self.dm.save_image(heat_map_image, heat_map_path, map_type="heat")  # heat map image 저장
+    def save_maps(self, maps: Dict[str, np.ndarray], map_paths: Dict[str, Optional[str]]) -> None:
+        """생성된 맵들을 각각 지정된 경로에 DataManager 클래스의 save_image 메소드로 저장한다.
+
+        Args:
+            maps      : 맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+            map_paths : 맵 이름과 저장 경로. 경로가 없거나 None인 맵은 저장하지 않는다.
+        Returns:
+            없음.
+
+        """
+        for name, image in maps.items():
+            if not map_paths.get(name):
+                continue
+            map_type: str = name[:-len('_map')].replace('_', ' ')  # 'min_depth_map' -> 'min depth'
+            self.dm.cm.logger.info(f'{map_type.capitalize()} map parameters: {image.size}, {map_paths[name]}')
+            self.dm.save_image(image, map_paths[name], map_type=map_type, cmap=MAP_TYPES[name])
@@ -0,0 +1,152 @@
+import numpy as np
+from collections import deque
+from typing import Tuple, Dict, Iterable, Optional, List, Deque
+
+from rasterizer import Rasterizer
+
+
+# 프레임 스트림에서 만들 수 있는 맵. 프레임을 빼는 연산이 가능한 합계, 개수로 만들 수 있는 맵만 지원한다.
+STREAM_MAPS: Tuple[str, ...] = ('depth_map', 'heat_map', 'density_map')
+
+
+class FrameStream:
+    def __init__(
+            self,
+            image_size: Tuple[int, int],
+            map_names: Iterable[str],
+            window: Optional[int] = None,
+            decay: Optional[float] = None,
+            depth_range: Optional[Tuple[float, float]] = None,
+            emit_every: int = 1,
+            min_weight: float = 0.5,
+            bounds: Optional[Tuple[float, float, float, float]] = None
+        ) -> None:
+        """연속된 센서 프레임을 픽셀별 depth 합계, 포인트 개수 누적값에 더하고 빼면서 맵을 갱신하는 클래스.
+
+        window를 지정하면 최근 window개 프레임만 남기고, 오래된 프레임은 그 프레임이 더한 픽셀 값만 뺀다.
+        decay를 지정하면 새 프레임마다 이전 누적값의 가중치가 decay배가 된다. 전체 배열에 곱하지 않고
+        새 프레임의 값을 decay^-t 배로 더한 뒤 맵을 만들 때 한 번에 나누므로, 프레임 하나의 비용은
+        창 크기나 이미지 크기가 아니라 그 프레임의 포인트 개수에 비례한다.
+        프레임마다 픽셀 위치가 같아야 하므로 이미지 범위는 고정한다. project_to_2d의 (u, v, depth) 프레임은 bounds,
+        legacy 2열 프레임은 depth_range를 사용한다. 지정하지 않으면 첫 번째 프레임의 범위를 사용하며,
+        범위를 벗어난 포인트는 버려진다.
+
+        Args:
+            image_size  : (높이, 너비) 형태의 이미지 크기.
+            map_names   : 생성할 맵 이름 목록. STREAM_MAPS 참고.
+            window      : 유지할 최근 프레임 개수. decay와 함께 사용할 수 없다.
+            decay       : 프레임마다 곱할 가중치 감소 비율(0 < decay < 1). window와 함께 사용할 수 없다.
+            depth_range : legacy 2열 프레임의 (최소 depth, 최대 depth) 정규화 범위.
+            emit_every  : 맵을 내보낼 프레임 간격.
+            min_weight  : heat map에 표시할 픽셀의 최소 가중치 합. window 모드에서는 포인트가 1개 이상인 픽셀이다.
+            bounds      : (u, v, depth) 프레임의 (u 최소, u 최대, v 최소, v 최대) 이미지 범위.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름, window와 decay를 함께 지정한 경우, 값의 범위가 잘못된 경우.
+
+        """
+        self.map_names: List[str] = list(map_names)
+        unknown: List[str] = [name for name in self.map_names if name not in STREAM_MAPS]
+        if unknown:
+            raise ValueError(f"Unsupported map type for frame stream: {unknown}")
+        if window is not None and decay is not None:
+            raise ValueError("Use either window or decay, not both")
+        if window is not None and window < 1:
+            raise ValueError(f"window must be >= 1: {window}")
+        if decay is not None and not 0 < decay < 1:
+            raise ValueError(f"decay must be between 0 and 1: {decay}")
+
+        self.image_size: Tuple[int, int] = image_size
+        self.rasterizer: Rasterizer = Rasterizer(image_size)
+        self.window: Optional[int] = window
+        self.decay: Optional[float] = decay
+        self.depth_range: Optional[Tuple[float, float]] = depth_range
+        self.bounds: Optional[Tuple[float, float, float, float]] = tuple(bounds) if bounds is not None else None
+        self.emit_every: int = max(emit_every, 1)
+        self.min_weight: float = min_weight
+        self.frames: int = 0
+
+        pixels: int = image_size[0] * image_size[1]
+        self.depth_sum: np.ndarray = np.zeros(pixels)
+        self.weight: np.ndarray = np.zeros(pixels)  # 픽셀별 포인트 개수(가중치 합)
+        self.scale: float = 1.0  # decay 모드에서 누적값에 곱해진 decay^-t
+        self.history: Deque[Tuple[np.ndarray, np.ndarray, np.ndarray]] = deque()  # window 모드의 프레임별 기여분
+
+    def add(self, projected_points: np.ndarray) -> bool:
+        """프레임 하나를 누적값에 더한다. window를 넘은 프레임은 뺀다.
+
+        Args:
+            projected_points : project_to_2d로 투영된 프레임의 포인트.
+        Returns:
+            이번 프레임에서 맵을 내보내야 하면(emit_every 간격) True.
+
+        """
+        if projected_points.shape[1] == 3:
+            if self.bounds is None:
+                self.bounds = Rasterizer.extend_bounds(None, projected_points)
+            linear_index, valid = self.rasterizer.compute_indices(projected_points, 0, 0, self.bounds)
+        else:
+            if self.depth_range is None:
+                self.depth_range = (float(np.min(projected_points[:, 0])), float(np.max(projected_points[:, 0])))
+            min_depth, max_depth = self.depth_range
+            linear_index, valid = self.rasterizer.compute_indices(projected_points, max_depth, min_depth)
+
+        # 프레임이 닿은 픽셀만 모아서 더하고 뺀다 (프레임 포인트 개수에 비례)
+        pixels, inverse = np.unique(linear_index, return_inverse=True)
+        sums: np.ndarray = np.bincount(inverse, weights=Rasterizer.depths(projected_points)[valid], minlength=len(pixels))
+        counts: np.ndarray = np.bincount(inverse, minlength=len(pixels)).astype(np.float64)
+
+        if self.decay is not None:
+            self.scale /= self.decay
+            if self.scale > 1e100:  # overflow 방지: 누적값에 실제 가중치를 반영하고 scale 초기화
+                self.depth_sum /= self.scale
+                self.weight /= self.scale
+                self.scale = 1.0
+            sums *= self.scale
+            counts *= self.scale
+
+        self.depth_sum[pixels] += sums
+        self.weight[pixels] += counts
+
+        if self.window is not None:
+            self.history.append((pixels, sums, counts))
+            if len(self.history) > self.window:
+                self.expire()
+
+        self.frames += 1
+        return self.frames % self.emit_every == 0
+
+    def expire(self) -> None:
+        """window 모드에서 가장 오래된 프레임의 기여분을 뺀다."""
+        pixels, sums, counts = self.history.popleft()
+        self.depth_sum[pixels] -= sums
+        self.weight[pixels] -= counts
+        empty: np.ndarray = pixels[self.weight[pixels] == 0]
+        self.depth_sum[empty] = 0  # 반올림 오차로 남은 값 제거
+
+    def maps(self) -> Dict[str, np.ndarray]:
+        """현재 누적값으로 맵을 만든다. 포인트가 없는 픽셀은 모두 0이다.
+
+        Args:
+            없음.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+
+        """
+        height, width = self.image_size
+        weight: np.ndarray = (self.weight / self.scale).reshape(height, width)
+        occupied: np.ndarray = (weight > 0) & (weight >= self.min_weight)
+
+        maps: Dict[str, np.ndarray] = {}
+        for name in self.map_names:
+            if name == 'depth_map':
+                depth_map_image: np.ndarray = np.zeros((height, width), dtype=np.float32)
+                depth_sum: np.ndarray = self.depth_sum.reshape(height, width)
+                depth_map_image[occupied] = depth_sum[occupied] / self.weight.reshape(height, width)[occupied]  # scale은 약분됨
+                maps[name] = depth_map_image
+            elif name == 'heat_map':
+                heat_map_image: np.ndarray = np.zeros((height, width, 3), dtype=np.uint8)
+                heat_map_image[occupied] = (255, 0, 0)  # 붉은색으로 표시
+                maps[name] = heat_map_image
+            elif name == 'density_map':
+                maps[name] = weight.astype(np.float32)
+        return maps
@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from logger import Logger
+
+
+JOB_STATES: Tuple[str, ...] = ('pending', 'running', 'done', 'failed')
+
+
+def file_digest(path: str) -> str:
+    """파일 내용의 blake2b 해시를 계산한다.
+
+    Args:
+        path : 파일 경로.
+    Returns:
+        16진수 문자열 해시.
+
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_digest(settings: Dict[str, Any]) -> str:
+    """결과에 영향을 주는 설정 값들의 해시를 계산한다.
+
+    Args:
+        settings : JSON으로 변환 가능한 설정 딕셔너리.
+    Returns:
+        16진수 문자열 해시.
+
+    """
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode('utf-8'), digest_size=20).hexdigest()
+
+
+class JobQueue:
+    def __init__(
+            self,
+            path: str,
+            logger: Logger,
+            max_attempts: int = 3,
+            backoff: float = 5.0,
+            lease: float = 600.0
+        ) -> None:
+        """입력 파일별 작업 상태를 SQLite 파일에 기록하는 작업 큐 클래스.
+
+        같은 파일을 여는 여러 프로세스(파일 시스템을 공유하는 여러 호스트 포함)가 BEGIN IMMEDIATE 트랜잭션으로
+        작업을 하나씩 가져가므로 한 작업을 두 워커가 동시에 처리하지 않는다.
+        작업마다 상태(pending, running, done, failed), 출력 경로, 처리 시간, 입력 파일 해시, 설정 해시를 기록한다.
+        실패한 작업은 backoff * 2^(시도 횟수 - 1)초 뒤에 다시 시도하고, max_attempts번 실패하면 failed가 된다.
+        running 작업에는 가져간 워커(호스트:pid)와 heartbeat 시각을 기록한다. 워커는 start_heartbeat로 lease를 계속 연장하며,
+        lease가 끝난 작업과 같은 호스트에서 pid가 없어진 워커의 작업은 다른 워커가 다시 가져간다.
+        complete, fail은 작업을 가져간 워커가 아직 가지고 있는 경우에만 기록한다.
+
+        Args:
+            path         : SQLite 파일 경로.
+            logger       : 로그 기록용 Logger 인스턴스.
+            max_attempts : 작업 하나의 최대 시도 횟수.
+            backoff      : 첫 번째 재시도까지의 대기 시간(초).
+            lease        : heartbeat가 없는 running 작업을 죽은 워커의 작업으로 보기까지의 시간(초).
+
+        """
+        self.path: str = path
+        self.logger: Logger = logger
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+        self.lease: float = lease
+        self.worker: str = f'{socket.gethostname()}:{os.getpid()}'
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 트랜잭션은 직접 시작한다. WAL은 네트워크 파일 시스템에서 동작하지 않으므로 기본 journal 모드를 사용한다.
+        self.connection: sqlite3.Connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' input TEXT PRIMARY KEY, state TEXT NOT NULL, outputs TEXT NOT NULL, config_hash TEXT NOT NULL,'
+            ' input_hash TEXT, input_size INTEGER, input_mtime REAL, attempts INTEGER NOT NULL DEFAULT 0,'
+            ' next_attempt REAL NOT NULL DEFAULT 0, lease_until REAL, worker TEXT, points INTEGER,'
+            ' seconds REAL, error TEXT, updated REAL, heartbeat REAL)'
+        )
+        if 'heartbeat' not in [row['name'] for row in self.connection.execute('PRAGMA table_info(jobs)')]:
+            self.connection.execute('ALTER TABLE jobs ADD COLUMN heartbeat REAL')  # 이전 버전의 큐 파일
+
+    def close(self) -> None:
+        """SQLite 연결을 닫는다."""
+        self.connection.close()
+
+    def _owner_alive(self, worker: Optional[str]) -> bool:
+        """running 작업을 가져간 워커 프로세스가 살아 있는지 확인한다.
+        같은 호스트의 워커만 pid로 확인할 수 있으며, 다른 호스트의 워커는 lease(heartbeat)로 판단하므로 살아 있다고 본다."""
+        host, _, pid = (worker or '').rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit() or os.name == 'nt':  # Windows의 os.kill은 프로세스를 종료함
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except OSError:  # 다른 사용자의 프로세스 등
+            return True
+        return True
+
+    def _reclaim_dead(self, now: float) -> int:
+        """트랜잭션 안에서 호출한다. 워커가 죽은 running 작업을 바로 다시 가져갈 수 있도록 pending으로 되돌린다."""
+        reclaimed: int = 0
+        for row in self.connection.execute("SELECT input, worker FROM jobs WHERE state = 'running'").fetchall():
+            if not self._owner_alive(row['worker']):
+                self.connection.execute(
+                    "UPDATE jobs SET state = 'pending', next_attempt = 0, lease_until = NULL, updated = ? WHERE input = ?",
+                    (now, row['input'])
+                )
+                self.logger.warning('Job owner %s is gone, reclaiming: %s', args=(row['worker'], row['input']))
+                reclaimed += 1
+        return reclaimed
+
+    def _outputs_exist(self, outputs: Dict[str, str]) -> bool:
+        return all(os.path.exists(path) for path in outputs.values())
+
+    def _input_unchanged(self, row: sqlite3.Row) -> bool:
+        """입력 파일이 완료 당시와 같은지 확인한다. 크기와 수정 시간이 같으면 해시를 다시 계산하지 않는다."""
+        if not os.path.exists(row['input']) or row['input_hash'] is None:
+            return False
+        stat: os.stat_result = os.stat(row['input'])
+        if stat.st_size == row['input_size'] and stat.st_mtime == row['input_mtime']:
+            return True
+        return file_digest(row['input']) == row['input_hash']
+
+    def add(self, jobs: Iterable[Tuple[str, Dict[str, str]]], config_hash: str) -> Dict[str, int]:
+        """작업들을 큐에 넣는다. 여러 프로세스가 같은 작업들을 넣어도 한 번만 등록된다.
+
+        done 작업은 설정 해시가 같고, 출력 파일이 모두 있고, 입력 파일 해시가 같으면 건너뛴다.
+        그 외의 done, failed 작업은 pending으로 되돌린다. pending, running 작업은 그대로 둔다.
+        중간에 종료된 이전 실행의 running 작업은 같은 호스트에서 실행한 경우 워커 pid가 없으므로 먼저 pending으로 되돌린다.
+
+        Args:
+            jobs        : (입력 파일 경로, 맵 이름과 출력 경로) 목록.
+            config_hash : 결과에 영향을 주는 설정의 해시. config_digest 결과.
+        Returns:
+            added(새 작업), reset(다시 처리), skipped(완료된 결과 재사용), kept(진행 중) 개수.
+
+        """
+        counts: Dict[str, int] = {'added': 0, 'reset': 0, 'skipped': 0, 'kept': 0}
+        now: float = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._reclaim_dead(now)
+            for input_path, outputs in jobs:
+                row: Optional[sqlite3.Row] = self.connection.execute(
+                    'SELECT * FROM jobs WHERE input = ?', (input_path,)
+                ).fetchone()
+                if row is None:
+                    self.connection.execute(
+                        'INSERT INTO jobs (input, state, outputs, config_hash, updated) VALUES (?, ?, ?, ?, ?)',
+                        (input_path, 'pending', json.dumps(outputs, sort_keys=True), config_hash, now)
+                    )
+                    counts['added'] += 1
+                elif row['state'] in ('pending', 'running'):
+                    counts['kept'] += 1
+                elif row['state'] == 'done' and row['config_hash'] == config_hash \
+                        and row['outputs'] == json.dumps(outputs, sort_keys=True) and self._outputs_exist(outputs) \
+                        and self._input_unchanged(row):
+                    counts['skipped'] += 1
+                else:
+                    self.connection.execute(
+                        'UPDATE jobs SET state = ?, outputs = ?, config_hash = ?, attempts = 0, next_attempt = 0,'
+                        ' error = NULL, updated = ? WHERE input = ?',
+                        ('pending', json.dumps(outputs, sort_keys=True), config_hash, now, input_path)
+                    )
+                    counts['reset'] += 1
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+        self.logger.info(
+            f"Job queue {self.path}: {counts['added']} added, {counts['reset']} reset, "
+            f"{counts['skipped']} skipped (up to date), {counts['kept']} in progress"
+        )
+        return counts
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """처리할 작업 하나를 가져와 running으로 바꾼다.
+        재시도 대기 시간이 지난 pending 작업, lease가 끝난 running 작업, 워커가 죽은 running 작업을 가져올 수 있다.
+        가져온 뒤 입력 파일의 해시, 크기, 수정 시간을 기록하므로, done 작업의 해시는 실제로 처리한 내용의 해시이다.
+
+        Args:
+            없음.
+        Returns:
+            입력 경로(input), 출력 경로(outputs), 시도 횟수(attempts)를 담은 딕셔너리. 가져올 작업이 없으면 None.
+
+        """
+        now: float = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._reclaim_dead(now)
+            row: Optional[sqlite3.Row] = self.connection.execute(
+                "SELECT input, outputs, attempts, state FROM jobs"
+                " WHERE (state = 'pending' AND next_attempt <= ?) OR (state = 'running' AND lease_until < ?)"
+                " ORDER BY next_attempt, input LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1, lease_until = ?, worker = ?, heartbeat = ?,"
+                    " input_hash = NULL, updated = ? WHERE input = ?",
+                    (now + self.lease, self.worker, now, now, row['input'])
+                )
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            return None
+        if row['state'] == 'running':
+            self.logger.warning('Job lease expired, reclaiming: %s', args=(row['input'],))
+
+        # 처리하기 전의 입력 파일 내용을 기록 (done 이후 건너뛰기 판단에 사용)
+        try:
+            stat: os.stat_result = os.stat(row['input'])
+            self.connection.execute(
+                "UPDATE jobs SET input_hash = ?, input_size = ?, input_mtime = ? WHERE input = ? AND worker = ? AND state = 'running'",
+                (file_digest(row['input']), stat.st_size, stat.st_mtime, row['input'], self.worker)
+            )
+        except OSError:  # 없는 파일은 처리 단계에서 실패로 기록됨
+            pass
+        return {'input': row['input'], 'outputs': json.loads(row['outputs']), 'attempts': row['attempts'] + 1}
+
+    def heartbeat(self) -> int:
+        """이 워커가 가진 running 작업의 heartbeat 시각을 기록하고 lease를 연장한다.
+
+        Args:
+            없음.
+        Returns:
+            연장한 작업 개수.
+
+        """
+        now: float = time.time()
+        return self.connection.execute(
+            "UPDATE jobs SET heartbeat = ?, lease_until = ? WHERE worker = ? AND state = 'running'",
+            (now, now + self.lease, self.worker)
+        ).rowcount
+
+    def start_heartbeat(self) -> threading.Event:
+        """lease / 3초마다 heartbeat를 기록하는 스레드를 시작한다. 스레드는 별도의 SQLite 연결을 사용한다.
+
+        Args:
+            없음.
+        Returns:
+            set()을 호출하면 스레드가 끝나는 Event.
+
+        """
+        stop: threading.Event = threading.Event()
+
+        def beat() -> None:
+            queue: JobQueue = JobQueue(self.path, self.logger, self.max_attempts, self.backoff, self.lease)
+            try:
+                while not stop.wait(self.lease / 3):
+                    queue.heartbeat()
+            finally:
+                queue.close()
+
+        threading.Thread(target=beat, name='job-heartbeat', daemon=True).start()
+        return stop
+
+    def complete(self, input_path: str, points: int, seconds: float) -> bool:
+        """작업을 done으로 기록한다. 입력 파일의 해시는 claim에서 처리 전에 기록한 값을 사용한다.
+
+        Args:
+            input_path : 입력 파일 경로.
+            points     : 처리한 포인트 개수.
+            seconds    : 처리 시간(초).
+        Returns:
+            기록했으면 True. lease가 끝나 다른 워커가 작업을 가져간 경우 False.
+
+        """
+        updated: int = self.connection.execute(
+            "UPDATE jobs SET state = 'done', points = ?, seconds = ?, error = NULL, lease_until = NULL, updated = ?"
+            " WHERE input = ? AND worker = ? AND state = 'running'",
+            (points, seconds, time.time(), input_path, self.worker)
+        ).rowcount
+        if not updated:
+            self.logger.warning('Job is no longer owned by %s, result not recorded: %s', args=(self.worker, input_path))
+        return bool(updated)
+
+    def fail(self, input_path: str, error: str, seconds: float) -> Optional[str]:
+        """작업 실패를 기록한다. 시도 횟수가 남아 있으면 backoff 뒤에 다시 시도하도록 pending으로 되돌린다.
+
+        Args:
+            input_path : 입력 파일 경로.
+            error      : 에러 메세지.
+            seconds    : 처리 시간(초).
+        Returns:
+            바뀐 상태('pending' 또는 'failed'). lease가 끝나 다른 워커가 작업을 가져간 경우 None.
+
+        """
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            row: Optional[sqlite3.Row] = self.connection.execute(
+                "SELECT attempts FROM jobs WHERE input = ? AND worker = ? AND state = 'running'", (input_path, self.worker)
+            ).fetchone()
+            if row is not None:
+                attempts: int = row['attempts']
+                state: str = 'failed' if attempts >= self.max_attempts else 'pending'
+                delay: float = self.backoff * 2 ** (attempts - 1)
+                self.connection.execute(
+                    'UPDATE jobs SET state = ?, next_attempt = ?, error = ?, seconds = ?, lease_until = NULL, updated = ?'
+                    ' WHERE input = ?',
+                    (state, time.time() + delay, error, seconds, time.time(), input_path)
+                )
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            self.logger.warning('Job is no longer owned by %s, failure not recorded: %s', args=(self.worker, input_path))
+            return None
+        if state == 'pending':
+            self.logger.warning('Job failed (attempt %s/%s), retrying in %.1fs: %s', args=(attempts, self.max_attempts, delay, input_path))
+        else:
+            self.logger.error('Job failed after %s attempts: %s (%s)', args=(attempts, input_path, error))
+        return state
+
+    def next_retry(self) -> Optional[float]:
+        """다음에 가져갈 수 있는 작업이 생기는 가장 빠른 시각을 반환한다.
+        pending 작업의 재시도 시각과 다른 워커가 처리 중인 running 작업의 lease 만료 시각 중 가장 빠른 시각이다.
+
+        Args:
+            없음.
+        Returns:
+            time.time() 기준 시각. pending, running 작업이 모두 없으면 None.
+
+        """
+        return self.connection.execute(
+            "SELECT MIN(CASE WHEN state = 'pending' THEN next_attempt ELSE lease_until END) FROM jobs"
+            " WHERE state IN ('pending', 'running')"
+        ).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """상태별 작업 개수를 반환한다.
+
+        Args:
+            없음.
+        Returns:
+            JOB_STATES를 key로 가지는 작업 개수 딕셔너리.
+
+        """
+        counts: Dict[str, int] = dict.fromkeys(JOB_STATES, 0)
+        for state, count in self.connection.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'):
+            counts[state] = count
+        return counts
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """모든 작업의 기록을 반환한다.
+
+        Args:
+            없음.
+        Returns:
+            작업별 입력 경로, 상태, 출력 경로, 시도 횟수, 포인트 개수, 처리 시간, 에러 메세지 목록.
+
+        """
+        rows: List[sqlite3.Row] = self.connection.execute(
+            'SELECT input, state, outputs, attempts, points, seconds, error, worker, heartbeat FROM jobs ORDER BY input'
+        ).fetchall()
+        return [dict(row, outputs=json.loads(row['outputs'])) for row in rows]
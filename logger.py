@@ -1,65 +1,226 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+import tracemalloc
+from logging.handlers import QueueHandler, QueueListener
+from types import FrameType
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+try:
+    import resource  # Unix 전용. Windows에서는 peak RSS를 기록하지 않음
+except ImportError:
+    resource = None
+
+
+class _LazyQueueHandler(QueueHandler):
+    """레코드를 포맷하지 않고 그대로 큐에 넣는 핸들러. 메세지 포맷은 listener 스레드에서 기록할 때 한다.
+    같은 프로세스 안의 큐만 사용하므로 레코드를 복사하거나 pickle 하지 않는다."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _StderrHandler(logging.StreamHandler):
+    """기록하는 시점의 sys.stderr에 출력하는 핸들러. 핸들러를 한 번만 만들어도 stderr 교체(테스트, daemon)를 따라간다."""
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    @property
+    def stream(self) -> Any:
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value: Any) -> None:
+        pass
+
+
+class _ContextFormatter(logging.Formatter):
+    """log_caller로 기록한 레코드의 호출 위치([클래스] [메소드])를 메세지 앞에 붙이는 포맷터.
+    log_caller를 거치지 않은 레코드는 호출 위치 없이 기록한다."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'caller_context'):
+            record.caller_context = ''
+        return super().format(record)
+
+
+class _RateLimitFilter(logging.Filter):
+    """같은 메세지 템플릿의 INFO 이하 레코드를 1초에 per_second개까지만 통과시키는 필터.
+    WARNING 이상은 제한하지 않는다. 버린 개수는 다음 1초 구간의 첫 레코드에 덧붙인다."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.per_second: Optional[float] = None  # None이면 제한하지 않음
+        self._windows: Dict[Any, List[float]] = {}  # 메세지 템플릿 -> [구간 시작 시각, 통과 개수, 버린 개수]
+        self._lock: threading.Lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_second is None or record.levelno >= logging.WARNING:
+            return True
+        now: float = time.monotonic()
+        with self._lock:
+            if len(self._windows) > 4096:  # f-string 메세지로 key가 계속 늘어나는 것 방지
+                self._windows = {key: window for key, window in self._windows.items() if now - window[0] < 1.0}
+            window: List[float] = self._windows.setdefault(record.msg, [now, 0, 0])
+            if now - window[0] >= 1.0:
+                if window[2]:
+                    record.msg = f"{record.msg} ({int(window[2])} similar messages suppressed)"
+                window[:] = [now, 0, 0]
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+# 로그 파일(logger 이름)마다 한 번만 만드는 listener와 필터. Logger를 여러 번 생성해도 핸들러가 중복되지 않는다.
+_setup_lock: threading.Lock = threading.Lock()
+_listeners: Dict[str, QueueListener] = {}
+_filters: Dict[str, _RateLimitFilter] = {}
+
+
+def _restart_listeners() -> None:
+    """fork된 자식 프로세스에는 listener 스레드가 없으므로 다시 시작한다.
+    multiprocessing 워커는 atexit을 실행하지 않고 종료하므로 Finalize로 남은 로그를 기록한다(저장 큐보다 나중에 실행)."""
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    for listener in _listeners.values():
+        listener._thread = None
+        listener.start()
+    if _listeners:
+        from multiprocessing import util
+        util.Finalize(None, _stop_listeners, exitpriority=0)
+
+
+def _stop_listeners() -> None:
+    """종료 시 큐에 남은 레코드를 모두 기록한다."""
+    for listener in list(_listeners.values()):
+        if listener._thread is not None:
+            listener.stop()
+
+
+atexit.register(_stop_listeners)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners)
+
 
 class Logger:
-    def __init__(self, path: str, file: bool, print: bool) -> None:
-        self.setup_logger(path, file, print)
+    def __init__(
+            self,
+            path: str,
+            file: bool,
+            print: bool,
+            metrics_path: Optional[str] = None,
+            rate_limit: Optional[float] = None
+        ) -> None:
+        self.setup_logger(path, file, print, rate_limit)
+        self.metrics_path: Optional[str] = metrics_path  # None이면 span 측정을 하지 않음
+        self.spans: List[Dict[str, Any]] = []  # 이번 실행에서 기록된 span
+        self._local: threading.local = threading.local()  # span 중첩은 스레드마다 따로 추적 (WriteQueue 스레드)
+        self._metrics_lock: threading.Lock = threading.Lock()
+
+    @property
+    def _span_stack(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
 
-    def setup_logger(self, path:str, file: bool, print: bool) -> None:
+    def setup_logger(self, path:str, file: bool, print: bool, rate_limit: Optional[float] = None) -> None:
         """로그의 레벨, 포멧, 핸들러 사용 여부를 설정하는 메소드.
+        로그 파일 경로마다 이름이 붙은 logger를 사용하며, 호출한 스레드는 레코드를 큐에 넣기만 한다.
+        파일 쓰기, 터미널 출력, 메세지 포맷은 listener 스레드에서 한다.
+        같은 경로로 여러 번 호출해도 핸들러는 한 번만 추가되므로 로그가 중복 기록되지 않는다.
         
         Args:
-            path  : 저장할 로그 파일 경로
-            file  : 로그 파일 저장 여부 선택.
-            print : 터미널에 출력 여부 선택
+            path       : 저장할 로그 파일 경로
+            file       : 로그 파일 저장 여부 선택.
+            print      : 터미널에 출력 여부 선택
+            rate_limit : 같은 메세지 템플릿의 INFO 로그를 1초에 기록할 최대 개수. None이면 제한하지 않는다.
         Returns:
             없음.
             
         """
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(message)s',
+        name: str = 'image_processing.' + os.path.normpath(path)
+        self.logger = logging.getLogger(name)
+        self.logger.propagate = False  # root logger에 핸들러가 있어도 중복 기록하지 않음
+        formatter = _ContextFormatter(
+            '%(asctime)s [%(levelname)s] %(caller_context)s%(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
 
-        if file:
-            file_handler = logging.FileHandler(path)
-            file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+        with _setup_lock:
+            listener: Optional[QueueListener] = _listeners.get(name)
+            if listener is None:
+                log_queue: queue.SimpleQueue = queue.SimpleQueue()
+                self.logger.setLevel(logging.DEBUG)
+                self.logger.addHandler(_LazyQueueHandler(log_queue))
+                _filters[name] = _RateLimitFilter()
+                self.logger.addFilter(_filters[name])
+                listener = QueueListener(log_queue, respect_handler_level=True)
+                listener.start()
+                _listeners[name] = listener
+            _filters[name].per_second = rate_limit
+
+            handlers: List[logging.Handler] = list(listener.handlers)
+            if file and not any(isinstance(handler, logging.FileHandler) for handler in handlers):
+                file_handler = logging.FileHandler(path)
+                file_handler.setLevel(logging.INFO)
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+
+            if print and not any(isinstance(handler, _StderrHandler) for handler in handlers):
+                console_handler = _StderrHandler()
+                console_handler.setLevel(logging.INFO)
+                console_handler.setFormatter(formatter)
+                handlers.append(console_handler)
 
-        if print:
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            if len(handlers) != len(listener.handlers):  # 새 핸들러는 listener를 다시 시작해야 적용됨
+                listener.stop()
+                listener.handlers = tuple(handlers)
+                listener.start()
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message)
+    def flush(self) -> None:
+        """큐에 들어간 로그를 모두 기록할 때까지 기다린다. 로그 파일을 바로 읽어야 하는 경우에 사용한다."""
+        with _setup_lock:
+            listener: Optional[QueueListener] = _listeners.get(self.logger.name)
+            if listener is not None:
+                listener.stop()
+                listener.start()
 
-    def info(self, message: str, name: str="") -> None:
+    def debug(self, message: str, *args: Any) -> None:
+        self.logger.debug(message, *args, stacklevel=2)
+
+    def info(self, message: str, name: str = "", *, args: Tuple[Any, ...] = ()) -> None:
         """정상 동작시 실행한다.
         최종 기록 형태는
         
         [name] 메세지 
         
         형태이다.
+        args를 전달하면 메세지의 %s 등을 기록하는 시점에 채운다(lazy formatting). 반복 호출되는 곳은
+        f-string 대신 args를 사용하면 같은 템플릿으로 묶여 rate_limit이 적용되고, 버려지는 로그는 포맷 비용이 없다.
         
         Args:
             message  : 파일에 기록할 내용.
             name     : 호출된 클래스 또는 함수(main)의 위치.
+            args     : message의 % 포맷 인자. keyword로만 전달한다.
         Returns:
             없음.
             
         """
-        message = name + message
-        self.logger.info(message)
+        self.logger.info(name + message, *args, stacklevel=2)
 
-    def warning(self, message: str, name: str="") -> None:
-        message = name + message
-        self.logger.warning(message)
+    def warning(self, message: str, name: str = "", *, args: Tuple[Any, ...] = ()) -> None:
+        self.logger.warning(name + message, *args, stacklevel=2)
 
-    def error(self, message: str, name: str="") -> None:
+    def error(self, message: str, name: str = "", *, args: Tuple[Any, ...] = ()) -> None:
         """사용자가 설정한 에러 또는 시스템 에러 발생시 실행한다.
         최종 기록 형태는 
         
@@ -70,14 +231,14 @@ class Logger:
         Args:
             message  : 파일에 기록할 내용.
             name     : 호출된 클래스 또는 함수(main)의 위치.
+            args     : message의 % 포맷 인자. keyword로만 전달한다.
         Returns:
             없음.
             
         """
-        message = name + message
-        self.logger.error(message) 
+        self.logger.error(name + message, *args, stacklevel=2)
 
-    def exception(self, message: str, name: str="") -> None: 
+    def exception(self, message: str, name: str = "", *, args: Tuple[Any, ...] = ()) -> None: 
         """사용자가 설정한 에러 또는 시스템 에러 발생시 실행한다.
         Trackback까지 추가로 로그 파일에 기록 또는 터미널에 출력할 수 있다.
         최종 기록 형태는 
@@ -90,9 +251,171 @@ class Logger:
         Args:
             message  : 파일에 기록할 내용.
             name     : 호출된 클래스 또는 함수(main)의 위치.
+            args     : message의 % 포맷 인자. keyword로만 전달한다.
         Returns:
             없음.
             
         """
-        message = name + message
-        self.logger.exception(message) 
+        self.logger.exception(name + message, *args, stacklevel=2)
+
+    def log_caller(self, level: int, message: str, *args: Any, depth: int = 2) -> None:
+        """메세지 앞에 [호출 클래스] [호출 메소드]를 붙여 기록한다.
+        호출 위치의 클래스와 메소드 이름은 문자열로 바꾸어 레코드에 담으므로 frame 참조가 큐에 남지 않는다.
+        해당 레벨이 기록되지 않는 경우에는 frame도 가져오지 않는다.
+
+        Args:
+            level   : logging 레벨. 예) logging.ERROR
+            message : 기록할 내용.
+            args    : message의 % 포맷 인자.
+            depth   : log_caller를 호출한 함수로부터 몇 단계 위의 호출 위치를 기록할지. 기본값 2는 호출한 함수의 호출자.
+        Returns:
+            없음.
+
+        """
+        if self.logger.isEnabledFor(level):
+            frame: FrameType = sys._getframe(depth)
+            owner: Any = frame.f_locals.get('self')
+            context: str = (f"[{owner.__class__.__name__}] " if owner is not None else '') + f"[{frame.f_code.co_name}] "
+            del frame, owner  # 레코드가 기록될 때까지 frame이 살아있지 않도록 바로 해제
+            self.logger.log(level, message, *args, extra={'caller_context': context}, stacklevel=depth + 1)
+
+    @contextmanager
+    def span(self, stage: str, points: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """단계 하나의 wall time, CPU time, 최대 메모리 할당량, points/sec를 측정한다.
+        metrics_path가 지정된 경우에만 측정하며, 측정 결과는 JSON 한 줄로 metrics_path에 추가된다.
+        with 블록 안에서 반환된 딕셔너리의 'points' 값을 바꾸면 points/sec 계산에 사용된다.
+        span은 중첩될 수 있고, 바깥 span의 최대 메모리에는 안쪽 span의 할당량도 포함된다.
+        tracemalloc은 프로세스 전체에 하나이므로 최대 메모리는 main 스레드의 span에서만 측정한다.
+        다른 스레드(WriteQueue 등)의 span은 시간만 기록하고 peak_bytes는 None이다.
+        main 스레드 span의 최대 메모리에는 같은 시간에 다른 스레드가 할당한 메모리도 포함된다.
+
+        사용 예)
+            with logger.span('remove_noise') as span:
+                ...
+                span['points'] = len(pcd.points)
+
+        Args:
+            stage  : 단계 이름.
+            points : 처리한 포인트 개수. 블록 안에서 지정해도 된다.
+        Returns:
+            측정 정보 딕셔너리.
+
+        """
+        record: Dict[str, Any] = {'type': 'span', 'stage': stage, 'points': points}
+        if self.metrics_path is None:
+            yield record
+            return
+        if threading.current_thread() is not threading.main_thread():
+            yield from self._thread_span(record)
+            return
+
+        record['_owns_tracing'] = not tracemalloc.is_tracing()  # 다른 곳에서 시작한 tracemalloc은 멈추지 않음
+        if record['_owns_tracing']:
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._span_stack:
+            self._span_stack[-1]['_peak'] = max(self._span_stack[-1]['_peak'], peak)
+        tracemalloc.reset_peak()
+        record['_start_bytes'] = current
+        record['_peak'] = current
+        self._span_stack.append(record)
+
+        wall: float = time.perf_counter()
+        cpu: float = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_sec'] = time.perf_counter() - wall
+            record['cpu_sec'] = time.process_time() - cpu
+            self._span_stack.pop()
+            peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = max(peak - record.pop('_start_bytes'), 0)
+            if self._span_stack:
+                self._span_stack[-1]['_peak'] = max(self._span_stack[-1]['_peak'], peak)
+            if record.pop('_owns_tracing'):
+                tracemalloc.stop()
+            self._finish_span(record)
+
+    def _thread_span(self, record: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """main 스레드가 아닌 스레드의 span. tracemalloc을 건드리지 않고 시간만 측정한다."""
+        wall: float = time.perf_counter()
+        cpu: float = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_sec'] = time.perf_counter() - wall
+            record['cpu_sec'] = time.process_time() - cpu
+            record['peak_bytes'] = None
+            self._finish_span(record)
+
+    def _finish_span(self, record: Dict[str, Any]) -> None:
+        """span 측정 결과에 points/sec, peak RSS, 시각을 추가하고 기록한다."""
+        record['points_per_sec'] = record['points'] / record['wall_sec'] \
+            if record['points'] and record['wall_sec'] > 0 else None
+        record['peak_rss_mb'] = self.peak_rss_mb()
+        record['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self._metrics_lock:
+            self.spans.append(record)
+        self._write_metrics(record)
+
+    def metrics_summary(self) -> List[Dict[str, Any]]:
+        """이번 실행에서 기록된 span들을 단계별로 합산하여 표 형태로 로그에 기록하고,
+        같은 내용을 'summary' 타입 JSON 한 줄로 metrics_path에 추가한다.
+
+        Args:
+            없음.
+        Returns:
+            단계별 호출 횟수, wall time 합계, CPU time 합계, 최대 메모리, points/sec 목록.
+
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            row = rows.setdefault(span['stage'], {
+                'stage': span['stage'], 'calls': 0, 'wall_sec': 0.0, 'cpu_sec': 0.0, 'peak_bytes': 0, 'points': 0
+            })
+            row['calls'] += 1
+            row['wall_sec'] += span['wall_sec']
+            row['cpu_sec'] += span['cpu_sec']
+            row['peak_bytes'] = max(row['peak_bytes'], span['peak_bytes'] or 0)  # main 스레드 밖의 span은 None
+            row['points'] += span['points'] or 0
+
+        summary: List[Dict[str, Any]] = list(rows.values())
+        if not summary:
+            return summary
+
+        self.info(f"{'stage':<22}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'points/s':>14}")
+        for row in summary:
+            row['points_per_sec'] = row['points'] / row['wall_sec'] if row['points'] and row['wall_sec'] > 0 else None
+            self.info(
+                f"{row['stage']:<22}{row['calls']:>6}{row['wall_sec']:>10.4f}{row['cpu_sec']:>10.4f}"
+                f"{row['peak_bytes'] / 1e6:>10.2f}{row['points_per_sec'] or 0:>14.0f}"
+            )
+        peak_rss: Optional[float] = self.peak_rss_mb()
+        if peak_rss is not None:
+            self.info(f'Peak RSS: {peak_rss:.1f} MB')
+        self._write_metrics({
+            'type': 'summary', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'), 'peak_rss_mb': peak_rss, 'stages': summary
+        })
+        return summary
+
+    def peak_rss_mb(self) -> Optional[float]:
+        """프로세스 시작 이후 최대 RSS(실제 사용한 물리 메모리)를 구한다. 컨테이너 메모리 크기를 정할 때 사용한다.
+        tracemalloc의 peak_bytes와 달리 open3d 등 C 라이브러리가 할당한 메모리도 포함된다.
+
+        Args:
+            없음.
+        Returns:
+            MB 단위 최대 RSS. resource 모듈이 없는 환경(Windows)에서는 None.
+
+        """
+        if resource is None:
+            return None
+        peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024  # macOS는 byte, Linux는 KB 단위
+
+    def _write_metrics(self, record: Dict[str, Any]) -> None:
+        """측정 결과를 JSON 한 줄로 metrics_path에 추가한다."""
+        if os.path.dirname(self.metrics_path):
+            os.makedirs(os.path.dirname(self.metrics_path), exist_ok=True)
+        with self._metrics_lock, open(self.metrics_path, 'a', encoding='UTF8') as file:
+            file.write(json.dumps(record) + '\n')
@@ -1,8 +1,10 @@
+import glob
 import numpy as np
 import open3d as o3d
-from typing import Optional, Any
+from typing import Optional, Any, Union, Dict, Tuple
 
 from data_processing import DataProcessing
+from batch_processor import BatchProcessor
 
 
 
@@ -15,60 +17,191 @@ def main(args: Optional[Any] = None) -> None:
         DataManager       : Depth 계산 및 이미지 저장을 담당
         ConfigFileManager : 설정 파일 관리 및 설정 파일에서 발생하는 에러 관리를 담당
         Logger            : 콘솔 출력 및 로그 파일에 기록을 위한 로그 셋업을 담당
+        BatchProcessor    : 여러 3D 파일을 프로세스 풀로 병렬 처리하는 배치 모드를 담당
 
     """
+    # 설정 파일 검증. 잘못된 설정은 포인트 클라우드를 읽기 전에 ConfigError로 종료 (log/yaml_error.log에 기록)
+    dp: DataProcessing = DataProcessing()
+
     try:
-        dp: DataProcessing = DataProcessing()
+        # 백그라운드 맵 저장: 저장하는 동안 다음 단계(다음 파일) 계산을 진행
+        write_queue: Dict[str, Any] = dp.dm.cm.get_config().data.get('write_queue', {})
+        if write_queue.get('use_queue', False):
+            dp.dm.start_write_queue(write_queue.get('workers', 2), write_queue.get('max_pending', 8))
+
+        # 배치 모드: batch_settings.inputs 의 모든 파일을 프로세스 풀로 처리
+        if dp.dm.cm.get_config().data.get('batch_settings', {}).get('use_batch', False):
+            batch_paths, config_file = dp.dm.cm.get_batch_paths()
+            BatchProcessor(dp).run(batch_paths, config_file)
+            return
 
         # load image path, yaml file
         img_3d_path, config_file = dp.dm.cm.get_img_path()
+        image_size: Tuple[int, int] = dp.dm.cm.get_config().image_size  # 배치, 상주 서비스 모드와 같은 맵 크기
+
+        # 스트리밍 모드: chunk 단위로 읽어 메모리 사용량을 chunk_size로 제한
+        streaming: Dict[str, Any] = config_file['algorithm_settings'].get('streaming', {})
+        if streaming.get('use_streaming', False):
+            if config_file['algorithm_settings']['noise_removal']['algorithms'] != 'none':
+                dp.dm.cm.logger.warning('Noise removal is skipped in streaming mode', name=f"[{__name__}] ")
+            dp.create_maps_streaming(
+                img_3d_path, 
+                projection_vector=np.array(config_file['algorithm_settings']['projection_vector']), 
+                map_paths=config_file['2Dfile_paths'], 
+                chunk_size=streaming['chunk_size'], 
+                image_size=image_size
+            )
+            return
+
+        # 프레임 스트림 모드: 연속된 프레임으로 맵을 누적 갱신하고 emit_every 프레임마다 저장
+        frame_stream: Dict[str, Any] = config_file['algorithm_settings'].get('frame_stream', {})
+        if frame_stream.get('use_frame_stream', False):
+            dp.create_maps_from_frames(
+                sorted(glob.glob(frame_stream['frames'])), 
+                projection_vector=np.array(config_file['algorithm_settings']['projection_vector']), 
+                map_paths=config_file['2Dfile_paths'], 
+                window=frame_stream.get('window'), 
+                decay=frame_stream.get('decay'), 
+                emit_every=frame_stream['emit_every'], 
+                bounds=frame_stream.get('bounds'), 
+                image_size=image_size
+            )
+            return
+
+        # 파라미터 sweep 모드: 노이즈 제거 파라미터 조합별로 유지되는 포인트 개수를 기록
+        noise_sweep: Dict[str, Any] = config_file['algorithm_settings'].get('noise_sweep', {})
+        if noise_sweep.get('use_sweep', False):
+            dp.sweep_noise(
+                img_3d_path, 
+                grids=noise_sweep['grids'], 
+                projection_vector=np.array(config_file['algorithm_settings']['projection_vector']), 
+                map_paths=config_file['2Dfile_paths'] if noise_sweep.get('write_maps', False) else None, 
+                image_size=image_size
+            )
+            return
+
+        # 저메모리 모드: float32 좌표로 max_memory_mb 안에서 맵 생성 (예산을 넘으면 자동으로 chunk 처리)
+        # 노이즈 제거가 없으면 파일 경로를 그대로 전달하여 binary PCD, PLY를 memmap chunk로 읽음
+        noise_removal: Dict[str, Any] = config_file['algorithm_settings']['noise_removal']
+        low_memory: Dict[str, Any] = config_file['algorithm_settings'].get('low_memory', {})
+        roi: Optional[Dict[str, Any]] = config_file['algorithm_settings'].get('roi')
+        if low_memory.get('use_low_memory', False) and noise_removal['algorithms'] == 'none' and not (roi and roi.get('use_roi', False)):
+            dp.create_maps_low_memory(
+                img_3d_path, 
+                projection_vector=np.array(config_file['algorithm_settings']['projection_vector']), 
+                map_paths=config_file['2Dfile_paths'], 
+                max_memory_mb=low_memory['max_memory_mb'], 
+                image_size=image_size
+            )
+            return
 
-        # 3D 노이즈 삭제
-        img_3d: o3d.geometry.PointCloud = dp.remove_noise(
+        # 3D 노이즈 삭제 ('none'인 경우 노이즈 제거 없이 memmap으로 읽음)
+        img_3d: Union[o3d.geometry.PointCloud, np.ndarray] = dp.load_cloud(
             img_3d_path, 
             algorithm=config_file['algorithm_settings']['noise_removal']['algorithms'], 
-            params=config_file['algorithm_settings']['noise_removal']['params']
+            params=config_file['algorithm_settings']['noise_removal']['params'], 
+            tiling=config_file['algorithm_settings']['noise_removal'].get('tiling'), 
+            cache=config_file['algorithm_settings']['noise_removal'].get('cache'), 
+            voxel=config_file['algorithm_settings'].get('voxel_downsample'), 
+            roi=config_file['algorithm_settings'].get('roi')
         )
 
+        # 여러 view 맵 생성: 모든 view를 한 번에 투영하고 view마다 맵 생성
+        views: Dict[str, Any] = config_file['algorithm_settings'].get('views', {})
+        if views.get('use_views', False):
+            dp.create_view_maps(
+                img_3d, 
+                views=views['views'], 
+                map_paths=config_file['2Dfile_paths'], 
+                image_size=tuple(views['image_size'])
+            )
+            return
+
+        # 저메모리 모드 (노이즈 제거 결과): 메모리에 있는 클라우드도 예산에 포함
+        if low_memory.get('use_low_memory', False):
+            dp.create_maps_low_memory(
+                img_3d, 
+                projection_vector=np.array(config_file['algorithm_settings']['projection_vector']), 
+                map_paths=config_file['2Dfile_paths'], 
+                max_memory_mb=low_memory['max_memory_mb'], 
+                image_size=image_size
+            )
+            return
+
         # 2D 투영
         projected_points: np.ndarray = dp.project_to_2d(
             img_3d, 
             projection_vector=np.array(config_file['algorithm_settings']['projection_vector'])
         )
 
-        # 2D Depth map 생성
-        dp.create_depth_map(
-            projected_points, 
-            depth_map_path=config_file['2Dfile_paths']['depth_map']
-        )
+        # 여러 해상도 맵 생성: 가장 큰 해상도에서 한 번 누적하고 작은 level은 누적값을 합쳐서 생성
+        pyramid: Dict[str, Any] = config_file['algorithm_settings'].get('pyramid', {})
+        if pyramid.get('use_pyramid', False):
+            dp.create_map_pyramid(
+                projected_points, 
+                map_paths=config_file['2Dfile_paths'], 
+                image_size=tuple(pyramid['image_size']), 
+                min_size=pyramid['min_size'], 
+                tile_size=pyramid.get('tile_size')
+            )
+            return
+
+        # 큰 해상도 맵: 포인트가 있는 픽셀에만 누적하고 포인트가 있는 타일만 저장
+        sparse_tiles: Dict[str, Any] = config_file['algorithm_settings'].get('sparse_tiles', {})
+        if sparse_tiles.get('use_sparse_tiles', False):
+            dp.create_map_tiles(
+                projected_points, 
+                map_paths=config_file['2Dfile_paths'], 
+                image_size=tuple(sparse_tiles['image_size']), 
+                tile_size=sparse_tiles['tile_size']
+            )
+            return
+
+        # z-buffer 모드: depth map은 픽셀마다 가장 가까운(먼) 포인트 하나로 만들고, 나머지 맵은 그대로 생성
+        map_paths: Dict[str, str] = config_file['2Dfile_paths']
+        z_buffer: Dict[str, Any] = config_file['algorithm_settings'].get('z_buffer', {})
+        if z_buffer.get('use_z_buffer', False):
+            dp.create_zbuffer_map(
+                projected_points, 
+                depth_map_path=map_paths.get('depth_map'), 
+                image_size=image_size, 
+                nearest=z_buffer['nearest'], 
+                index_path=z_buffer.get('index_path')
+            )
+            map_paths = {name: path for name, path in map_paths.items() if name != 'depth_map'}
 
-        # 2D Heat map 생성
-        dp.create_heat_map(
+        # 2D 맵 생성 (2Dfile_paths에 지정된 depth, heat, density 등의 맵을 한 번에 생성)
+        dp.create_maps(
             projected_points, 
-            heat_map_path=config_file['2Dfile_paths']['heat_map']
+            map_paths=map_paths, 
+            image_size=image_size
         )
         
     except ValueError as ve:
         dp.dm.cm.logger.exception(
             f"Value has the error. Check the value--> {ve}", 
-            f"[{__name__}] "
+            name=f"[{__name__}] "
         )  
     
     except TypeError as te:
         dp.dm.cm.logger.exception(
             f"Data type has the error. Check the Data type--> {te}", 
-            f"[{__name__}] "
+            name=f"[{__name__}] "
         )
     except KeyError as ke:
         dp.dm.cm.logger.exception(
             f"Key has the error. Check the yaml file--> {ke}",
-            f"[{__name__}] "
+            name=f"[{__name__}] "
         )
     except Exception as e:
         dp.dm.cm.logger.exception(
             f"Check the error log--> {e}", 
-            f"[{__name__}] "
+            name=f"[{__name__}] "
         )
+    finally:
+        dp.dm.close_write_queue()  # 남은 맵을 모두 저장
+        # 단계별 처리 시간, 메모리 요약 (log_settings.use_metrics가 true인 경우에만 기록됨)
+        dp.dm.cm.logger.metrics_summary()
 
 if __name__ == '__main__':
     main()
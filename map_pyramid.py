@@ -0,0 +1,80 @@
+import os
+import json
+import numpy as np
+from typing import Dict, Any, List, Tuple, Iterator
+
+from rasterizer import MapAccumulator
+
+
+class MapPyramid:
+    def __init__(self, accumulator: MapAccumulator, min_size: int = 64) -> None:
+        """가장 큰 해상도에서 한 번 누적한 값으로 여러 해상도의 맵을 만드는 클래스.
+
+        level 0은 accumulator의 해상도이며, level k+1은 level k의 누적값(합계, 개수, 최소, 최대)을
+        2x2 블록 단위로 합쳐서 만든다. 포인트를 다시 훑지 않으므로 level을 추가하는 비용은 픽셀 개수에 비례한다.
+        coarse level의 값은 2x2 블록 안의 포인트들로 계산한 값과 같다. 다만 해당 크기로 직접 래스터화한 결과와는
+        픽셀 경계가 달라 같지 않을 수 있다.
+
+        Args:
+            accumulator : 가장 큰 해상도로 포인트를 누적한 MapAccumulator.
+            min_size    : 가장 작은 level의 긴 변이 이 값 이하가 될 때까지 level을 만든다.
+
+        """
+        self.levels: List[MapAccumulator] = [accumulator]
+        while max(self.levels[-1].image_size) > max(min_size, 1):
+            self.levels.append(self.levels[-1].downsample())
+
+    def level_maps(self, level: int) -> Dict[str, np.ndarray]:
+        """level 하나의 맵들을 만든다.
+
+        Args:
+            level : 0이 가장 큰 해상도인 level 번호.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+
+        """
+        return self.levels[level].maps()
+
+    def tiles(self, image: np.ndarray, tile_size: int) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """맵을 tile_size x tile_size 타일로 나눈다. 마지막 행, 열의 타일은 더 작을 수 있다.
+
+        Args:
+            image     : 맵 배열.
+            tile_size : 타일 한 변의 픽셀 개수.
+        Returns:
+            (타일 행 번호, 타일 열 번호, 타일 배열 view) iterator.
+
+        """
+        height, width = image.shape[:2]
+        for row in range(0, height, tile_size):
+            for col in range(0, width, tile_size):
+                yield row // tile_size, col // tile_size, image[row:row + tile_size, col:col + tile_size]
+
+    def write_manifest(self, directory: str, map_name: str, tile_size: int, ext: str) -> str:
+        """viewer가 필요한 타일만 읽을 수 있도록 level별 크기와 타일 개수를 pyramid.json에 기록한다.
+
+        Args:
+            directory : 타일을 저장한 디렉토리.
+            map_name  : 맵 이름.
+            tile_size : 타일 한 변의 픽셀 개수.
+            ext       : 타일 파일 확장자.
+        Returns:
+            저장한 pyramid.json 경로.
+
+        """
+        levels: List[Dict[str, Any]] = []
+        for level, accumulator in enumerate(self.levels):
+            height, width = accumulator.image_size
+            levels.append({
+                'level': level,
+                'size': [height, width],
+                'rows': -(-height // tile_size),
+                'cols': -(-width // tile_size),
+                'path': f'L{level}/{{row}}_{{col}}{ext}',
+            })
+
+        path: str = os.path.join(directory, 'pyramid.json')
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='UTF8') as file:
+            json.dump({'map': map_name, 'tile_size': tile_size, 'levels': levels}, file, indent=2)
+        return path
@@ -0,0 +1,189 @@
+import os
+import json
+import zlib
+import struct
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+from logger import Logger
+
+
+# 저장 경로의 확장자로 맵마다 저장 형식을 고른다. 긴 확장자를 먼저 비교한다.
+MAP_FORMATS: Dict[str, str] = {
+    '.16.png': 'png16',   # 16-bit grayscale PNG (scale, offset을 tEXt chunk에 저장)
+    '.png': 'preview',    # matplotlib colormap 미리보기 이미지 (8-bit RGBA)
+    '.npy': 'npy',
+    '.npz': 'npz',
+    '.raw': 'raw',        # raw float32 memmap (shape, dtype은 '.json' sidecar 파일에 저장)
+}
+
+PNG_SIGNATURE: bytes = b'\x89PNG\r\n\x1a\n'
+
+
+def split_ext(path: str) -> Tuple[str, str]:
+    """'.16.png' 처럼 두 단계로 된 확장자도 하나의 확장자로 나눈다.
+
+    Args:
+        path : 맵 저장 경로.
+    Returns:
+        (확장자를 제외한 경로, 확장자). 예) 'result/depth_map.16.png' -> ('result/depth_map', '.16.png')
+
+    """
+    for ext in MAP_FORMATS:
+        if path.lower().endswith(ext):
+            return path[:-len(ext)], path[-len(ext):]
+    return os.path.splitext(path)
+
+
+class MapWriter:
+    def __init__(self, logger: Logger) -> None:
+        """맵 배열을 저장 경로의 확장자에 맞는 형식으로 저장하는 클래스.
+
+        '.png'는 기존과 같이 matplotlib colormap으로 렌더링한 미리보기 이미지이며, 8-bit로 양자화되어 실제 depth 값을 잃는다.
+        나머지 형식은 matplotlib 없이 배열을 바로 저장한다.
+            '.16.png' : 16-bit grayscale PNG. 실제 값 = 픽셀 값 * scale + offset. 정수 맵(density)은 손실 없이 저장된다.
+                        RGB 맵(heat map)은 8-bit RGB PNG로 저장한다.
+            '.npy'    : numpy 배열 그대로 저장.
+            '.npz'    : 'image' key로 압축 저장.
+            '.raw'    : 헤더 없는 배열 데이터(np.memmap으로 바로 열 수 있음). shape, dtype은 '<경로>.json'에 저장.
+        matplotlib은 '.png' 미리보기를 저장할 때만 import 한다.
+
+        Args:
+            logger : 로그 기록용 Logger 인스턴스.
+
+        """
+        self.logger: Logger = logger
+
+    def format_of(self, path: str) -> str:
+        """저장 경로의 확장자로 저장 형식을 구한다. 지원하지 않는 확장자는 matplotlib 미리보기로 저장한다."""
+        return MAP_FORMATS.get(split_ext(path)[1].lower(), 'preview')
+
+    def write(self, image: np.ndarray, path: str, cmap: Optional[str] = None) -> str:
+        """맵 배열을 저장한다.
+
+        Args:
+            image : 맵 배열. (H, W) 실수 맵 또는 (H, W, 3) uint8 RGB 맵.
+            path  : 저장 경로. 확장자로 저장 형식을 고른다. MAP_FORMATS 참고.
+            cmap  : '.png' 미리보기 이미지의 colormap.
+        Returns:
+            사용한 저장 형식 이름.
+        Raises:
+            ValueError: '.16.png'로 저장할 맵에 nan, inf 값이 있는 경우.
+
+        """
+        fmt: str = self.format_of(path)
+        if fmt == 'preview':
+            import matplotlib.pyplot as plt  # 미리보기 이미지를 저장할 때만 필요
+            plt.imsave(path, image, cmap=cmap)
+        elif fmt == 'png16':
+            self._write_png(image, path)
+        elif fmt == 'npy':
+            np.save(path, image)
+        elif fmt == 'npz':
+            np.savez_compressed(path, image=image)
+        else:
+            self._write_raw(image, path)
+        return fmt
+
+    def _write_png(self, image: np.ndarray, path: str) -> None:
+        height, width = image.shape[:2]
+        text: Dict[str, str] = {}
+        if image.ndim == 3:  # RGB 맵은 8-bit RGB PNG
+            bit_depth, color_type = 8, 2
+            rows: np.ndarray = np.ascontiguousarray(image, dtype=np.uint8).reshape(height, width * 3)
+        else:
+            if not np.all(np.isfinite(image)):
+                raise ValueError(f"Map has nan or inf values. Can't save as 16-bit PNG: {path}")
+            low: float = float(image.min()) if image.size else 0.0
+            high: float = float(image.max()) if image.size else 0.0
+            if low >= 0 and high <= 65535 and np.array_equal(image, np.round(image)):
+                scale, offset = 1.0, 0.0  # 정수 맵은 그대로 저장 (손실 없음)
+            else:
+                scale, offset = (high - low) / 65535 or 1.0, low
+            quantized: np.ndarray = np.round((image.astype(np.float64) - offset) / scale).astype('>u2')
+            bit_depth, color_type = 16, 0
+            rows = quantized.view(np.uint8).reshape(height, width * 2)
+            text = {'scale': repr(scale), 'offset': repr(offset)}
+            self.logger.info(f'16-bit PNG scale {scale}, offset {offset}: {path}')
+
+        # 각 행 앞에 filter type 0(None) 바이트를 붙인다
+        raw: np.ndarray = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+        raw[:, 1:] = rows
+        with open(path, 'wb') as file:
+            file.write(PNG_SIGNATURE)
+            file.write(self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)))
+            for key, value in text.items():
+                file.write(self._chunk(b'tEXt', key.encode('latin-1') + b'\x00' + value.encode('latin-1')))
+            file.write(self._chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+            file.write(self._chunk(b'IEND', b''))
+
+    def _chunk(self, kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    def _write_raw(self, image: np.ndarray, path: str) -> None:
+        image = image.astype(np.float32) if image.dtype.kind == 'f' else image
+        memmap: np.memmap = np.memmap(path, dtype=image.dtype, mode='w+', shape=image.shape)
+        memmap[...] = image
+        memmap.flush()
+        del memmap
+        with open(f'{path}.json', 'w', encoding='UTF8') as file:
+            json.dump({'dtype': image.dtype.str, 'shape': list(image.shape)}, file)
+
+    def read(self, path: str) -> np.ndarray:
+        """write로 저장한 맵을 읽는다. '.png' 미리보기 이미지는 원래 값으로 되돌릴 수 없으므로 지원하지 않는다.
+
+        Args:
+            path : 맵 저장 경로.
+        Returns:
+            맵 배열. '.16.png'는 scale, offset을 적용한 float32 배열, '.raw'는 읽기 전용 memmap.
+        Raises:
+            ValueError: '.png' 미리보기 이미지 또는 이 클래스가 저장하지 않은 PNG인 경우.
+
+        """
+        fmt: str = self.format_of(path)
+        if fmt == 'png16':
+            return self._read_png(path)
+        if fmt == 'npy':
+            return np.load(path)
+        if fmt == 'npz':
+            with np.load(path) as data:
+                return data['image']
+        if fmt == 'raw':
+            with open(f'{path}.json', encoding='UTF8') as file:
+                meta: Dict[str, Any] = json.load(file)
+            return np.memmap(path, dtype=np.dtype(meta['dtype']), mode='r', shape=tuple(meta['shape']))
+        raise ValueError(f"Preview images can't be read back as map values: {path}")
+
+    def _read_png(self, path: str) -> np.ndarray:
+        with open(path, 'rb') as file:
+            data: bytes = file.read()
+        if not data.startswith(PNG_SIGNATURE):
+            raise ValueError(f"Not a PNG file: {path}")
+
+        position: int = len(PNG_SIGNATURE)
+        header: Tuple[int, ...] = ()
+        text: Dict[str, str] = {}
+        idat: bytearray = bytearray()
+        while position < len(data):
+            length: int = struct.unpack('>I', data[position:position + 4])[0]
+            kind: bytes = data[position + 4:position + 8]
+            body: bytes = data[position + 8:position + 8 + length]
+            position += 12 + length
+            if kind == b'IHDR':
+                header = struct.unpack('>IIBBBBB', body)
+            elif kind == b'tEXt':
+                key, value = body.split(b'\x00', 1)
+                text[key.decode('latin-1')] = value.decode('latin-1')
+            elif kind == b'IDAT':
+                idat += body
+
+        width, height, bit_depth, color_type = header[:4]
+        channels: int = 3 if color_type == 2 else 1
+        raw: np.ndarray = np.frombuffer(zlib.decompress(bytes(idat)), dtype=np.uint8).reshape(height, -1)
+        if np.any(raw[:, 0] != 0):
+            raise ValueError(f"Only PNG files written by MapWriter are supported: {path}")
+
+        if bit_depth == 8:
+            return raw[:, 1:].reshape((height, width, 3) if channels == 3 else (height, width)).copy()
+        values: np.ndarray = raw[:, 1:].copy().view('>u2').reshape(height, width)
+        return (values * float(text.get('scale', 1.0)) + float(text.get('offset', 0.0))).astype(np.float32)
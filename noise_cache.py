@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple
+
+from logger import Logger
+
+
+class NoiseCache:
+    def __init__(self, path: str, max_size_mb: float, logger: Logger) -> None:
+        """노이즈 제거 결과(유지할 포인트 인덱스)를 디스크에 저장하는 content-addressed 캐시 클래스.
+
+        key는 입력 파일 내용의 해시, 알고리즘 이름, 파라미터로 만든다. 파일 경로나 수정 시간이 아니라
+        내용으로 key를 만들기 때문에, 같은 스캔을 다른 경로로 복사해도 캐시를 사용할 수 있다.
+        인덱스는 uint32 .npy 파일로 저장하며, 전체 크기가 max_size_mb를 넘으면
+        가장 오래 사용하지 않은 파일부터 삭제한다(LRU). 사용 시점은 파일 수정 시간으로 기록한다.
+
+        Args:
+            path        : 캐시 디렉토리.
+            max_size_mb : 캐시 최대 크기(MB).
+            logger      : 캐시 hit, miss, 절약한 바이트 수를 기록할 Logger 인스턴스.
+
+        """
+        self.path: str = path
+        self.max_bytes: int = int(max_size_mb * 1024 * 1024)
+        self.logger: Logger = logger
+        os.makedirs(self.path, exist_ok=True)
+
+    def make_key(
+            self,
+            file_path: str,
+            algorithm: str,
+            params: Dict[str, Any],
+            extra: Optional[Dict[str, Any]] = None
+        ) -> str:
+        """입력 파일 내용, 알고리즘, 파라미터로 캐시 key를 만든다.
+
+        Args:
+            file_path : 입력 PCD 또는 PLY 파일 경로.
+            algorithm : 노이즈 제거 알고리즘.
+            params    : 알고리즘 파라미터.
+            extra     : 결과에 영향을 주는 그 밖의 설정(예: 타일 분할 설정).
+        Returns:
+            16진수 문자열 key.
+
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        settings: str = json.dumps({'algorithm': algorithm, 'params': params, 'extra': extra}, sort_keys=True)
+        digest.update(settings.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}.npy')
+
+    def get(self, key: str, file_path: str) -> Optional[np.ndarray]:
+        """캐시된 인덱스를 읽는다. 사용한 파일은 LRU 순서를 위해 수정 시간을 갱신한다.
+
+        Args:
+            key       : make_key로 만든 key.
+            file_path : 로그 기록용 입력 파일 경로.
+        Returns:
+            유지할 포인트 인덱스. 캐시에 없거나 읽을 수 없으면 None.
+
+        """
+        entry: str = self._entry(key)
+        try:
+            indices: np.ndarray = np.load(entry)
+            os.utime(entry)
+        except (OSError, ValueError):
+            self.logger.info(f'Noise cache miss: {file_path} ({key[:12]})')
+            return None
+
+        self.logger.info(
+            f'Noise cache hit: {file_path} ({key[:12]}), {len(indices)} points, '
+            f'{os.path.getsize(file_path)} input bytes not re-filtered'
+        )
+        return indices
+
+    def put(self, key: str, indices: np.ndarray) -> None:
+        """유지할 포인트 인덱스를 저장하고, 최대 크기를 넘으면 오래된 항목을 삭제한다.
+        다른 프로세스가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꾼다.
+
+        Args:
+            key     : make_key로 만든 key.
+            indices : 유지할 포인트 인덱스.
+        Returns:
+            없음.
+
+        """
+        entry: str = self._entry(key)
+        temp: str = f'{entry}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as file:
+            np.save(file, np.asarray(indices, dtype=np.uint32))
+        os.replace(temp, entry)
+        self.logger.info(f'Noise cache stored: {key[:12]}, {os.path.getsize(entry)} bytes')
+        self.evict()
+
+    def get_voxel_size(self, key: str) -> Optional[float]:
+        """put_voxel_size로 저장한 voxel 크기를 읽는다. 캐시된 인덱스는 이 크기로 다운샘플링한 클라우드의 인덱스이다.
+
+        Args:
+            key : make_key로 만든 key.
+        Returns:
+            voxel 크기. 저장되어 있지 않거나 삭제된 경우 None.
+
+        """
+        entry: str = self._entry(f'{key}_voxel')
+        try:
+            voxel_size: float = float(np.load(entry)[0])
+            os.utime(entry)
+        except (OSError, ValueError, IndexError):
+            return None
+        return voxel_size
+
+    def put_voxel_size(self, key: str, voxel_size: float) -> None:
+        """인덱스를 계산할 때 사용한 voxel 크기를 저장한다. time_budget, target_points로 고른 크기는
+        실행마다 달라질 수 있으므로, key는 설정으로 만들고 실제 크기는 여기에 저장하여 캐시 hit에서 다시 사용한다.
+
+        Args:
+            key        : make_key로 만든 key.
+            voxel_size : 다운샘플링에 사용한 voxel 크기. 0이면 다운샘플링하지 않았다.
+        Returns:
+            없음.
+
+        """
+        entry: str = self._entry(f'{key}_voxel')
+        temp: str = f'{entry}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as file:
+            np.save(file, np.array([voxel_size], dtype=np.float64))
+        os.replace(temp, entry)
+
+    def evict(self) -> None:
+        """캐시 전체 크기가 max_size_mb 이하가 될 때까지 가장 오래 사용하지 않은 항목부터 삭제한다."""
+        entries: List[Tuple[float, int, str]] = []
+        for name in os.listdir(self.path):
+            if name.endswith('.npy'):
+                stat = os.stat(os.path.join(self.path, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.path, name))
+            total -= size
+            self.logger.info(f'Noise cache evicted: {name}, {size} bytes')
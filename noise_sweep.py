@@ -0,0 +1,102 @@
+import numpy as np
+import open3d as o3d
+from typing import Dict, Any, List, Iterator, Tuple
+
+from logger import Logger
+
+
+class NoiseSweep:
+    def __init__(self, points: np.ndarray, logger: Logger) -> None:
+        """노이즈 제거 파라미터 조합마다 remove_noise를 다시 실행하지 않고,
+        이웃 탐색 인덱스를 한 번만 만들어 모든 조합의 결과를 구하는 클래스.
+
+        statistical은 가장 큰 nb_neighbors로 kNN 탐색을 한 번 실행하고, 정렬된 이웃 거리의 누적합으로
+        모든 nb_neighbors의 평균 거리를 구한다. 기준값 계산은 open3d remove_statistical_outlier와 같다.
+        radius는 가장 큰 radius로 반경 탐색을 한 번 실행하고, radius마다 이웃 개수만 다시 센다.
+        open3d remove_radius_outlier와 같이 자기 자신을 포함한 이웃 개수가 nb_points보다 많아야 유지한다.
+
+        Args:
+            points : (N, 3) 형태의 포인트.
+            logger : 로그 기록용 Logger 인스턴스.
+
+        """
+        self.points: np.ndarray = np.ascontiguousarray(points, dtype=np.float64)
+        self.logger: Logger = logger
+        self.nns = o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor(self.points))
+
+    def statistical_masks(
+            self,
+            nb_neighbors: List[int],
+            std_ratio: List[float]
+        ) -> Iterator[Tuple[Dict[str, Any], np.ndarray]]:
+        """모든 (nb_neighbors, std_ratio) 조합의 statistical outlier 마스크를 구한다.
+
+        Args:
+            nb_neighbors : nb_neighbors 후보 목록.
+            std_ratio    : std_ratio 후보 목록.
+        Returns:
+            (파라미터 딕셔너리, 유지할 포인트 bool 마스크) iterator.
+
+        """
+        k_max: int = max(nb_neighbors)
+        self.nns.knn_index()
+        _, distances = self.nns.knn_search(o3d.core.Tensor(self.points), k_max)  # 거리 오름차순 정렬
+        cumulative: np.ndarray = np.cumsum(np.sqrt(distances.numpy()), axis=1)
+        self.logger.info(f'Sweep kNN search done: {len(self.points)} points, k={k_max}')
+
+        for k in nb_neighbors:
+            mean_distance: np.ndarray = cumulative[:, k - 1] / k
+            average: float = mean_distance.mean()
+            std: float = mean_distance.std(ddof=1)
+            for ratio in std_ratio:
+                yield {'nb_neighbors': k, 'std_ratio': ratio}, mean_distance < average + ratio * std
+
+    def radius_masks(
+            self,
+            nb_points: List[int],
+            radius: List[float]
+        ) -> Iterator[Tuple[Dict[str, Any], np.ndarray]]:
+        """모든 (nb_points, radius) 조합의 radius outlier 마스크를 구한다.
+
+        Args:
+            nb_points : nb_points 후보 목록.
+            radius    : radius 후보 목록.
+        Returns:
+            (파라미터 딕셔너리, 유지할 포인트 bool 마스크) iterator.
+
+        """
+        r_max: float = max(radius)
+        self.nns.fixed_radius_index(r_max)
+        _, distances, splits = self.nns.fixed_radius_search(o3d.core.Tensor(self.points), r_max)
+        distances = distances.numpy()
+        rows: np.ndarray = np.repeat(np.arange(len(self.points)), np.diff(splits.numpy()))
+        self.logger.info(f'Sweep radius search done: {len(self.points)} points, radius={r_max}, {len(distances)} pairs')
+
+        for r in radius:
+            counts: np.ndarray = np.bincount(rows, weights=distances <= r * r, minlength=len(self.points))
+            for nb in nb_points:
+                yield {'nb_points': nb, 'radius': r}, counts > nb
+
+    def run(self, grids: Dict[str, Dict[str, List[Any]]]) -> Iterator[Tuple[str, Dict[str, Any], np.ndarray]]:
+        """알고리즘별 파라미터 grid의 모든 조합을 실행하고 유지되는 포인트 개수를 로그에 기록한다.
+
+        Args:
+            grids : {'statistical': {'nb_neighbors': [...], 'std_ratio': [...]},
+                     'radius': {'nb_points': [...], 'radius': [...]}} 형태. 한 가지만 지정해도 된다.
+        Returns:
+            (알고리즘 이름, 파라미터 딕셔너리, 유지할 포인트 bool 마스크) iterator.
+
+        """
+        for algorithm, grid in grids.items():
+            if algorithm == 'statistical':
+                masks = self.statistical_masks(grid['nb_neighbors'], grid['std_ratio'])
+            elif algorithm == 'radius':
+                masks = self.radius_masks(grid['nb_points'], grid['radius'])
+            else:
+                raise ValueError("Unknown noise removal algorithm")
+
+            for params, mask in masks:
+                kept: int = int(np.count_nonzero(mask))
+                self.logger.info(f'Sweep {algorithm} {params}: kept {kept} / {len(self.points)} points')
+                yield algorithm, params, mask
+
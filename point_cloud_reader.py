@@ -0,0 +1,198 @@
+import numpy as np
+import open3d as o3d
+from typing import Dict, Any, List, Tuple, Optional, Iterator
+
+from logger import Logger
+
+
+# PCD TYPE/SIZE, PLY property 타입을 numpy dtype으로 변환하기 위한 테이블
+PCD_TYPES: Dict[Tuple[str, int], str] = {
+    ('F', 4): '<f4', ('F', 8): '<f8',
+    ('I', 1): '<i1', ('I', 2): '<i2', ('I', 4): '<i4', ('I', 8): '<i8',
+    ('U', 1): '<u1', ('U', 2): '<u2', ('U', 4): '<u4', ('U', 8): '<u8',
+}
+PLY_TYPES: Dict[str, str] = {
+    'char': '<i1', 'int8': '<i1', 'uchar': '<u1', 'uint8': '<u1',
+    'short': '<i2', 'int16': '<i2', 'ushort': '<u2', 'uint16': '<u2',
+    'int': '<i4', 'int32': '<i4', 'uint': '<u4', 'uint32': '<u4',
+    'float': '<f4', 'float32': '<f4', 'double': '<f8', 'float64': '<f8',
+}
+
+
+class PointCloudReader:
+    def __init__(self, logger: Logger) -> None:
+        """binary PCD, binary little endian PLY 파일을 np.memmap 으로 읽는 클래스.
+        헤더만 파싱하고 포인트 데이터는 복사하지 않으므로, open3d가 필요 없는 투영, 래스터화 단계에서
+        파일 내용을 메모리에 올리지 않고 바로 사용할 수 있다.
+        ASCII, binary_compressed PCD 또는 지원하지 않는 PLY는 open3d로 읽는다.
+
+        Args:
+            logger : 로그 기록용 Logger 인스턴스.
+
+        """
+        self.logger: Logger = logger
+
+    def read_header(self, path: str) -> Optional[Dict[str, Any]]:
+        """파일 헤더를 읽어 memmap에 필요한 정보를 구한다.
+
+        Args:
+            path : PCD 또는 PLY 파일 경로.
+        Returns:
+            포인트 개수(points), 포인트 하나의 numpy dtype(dtype), 데이터 시작 위치(offset)를 담은 딕셔너리.
+            memmap으로 읽을 수 없는 형식인 경우 None.
+
+        """
+        with open(path, 'rb') as file:
+            first: bytes = file.readline()
+            if first.strip() == b'ply':
+                return self._read_ply_header(file)
+            file.seek(0)
+            return self._read_pcd_header(file)
+
+    def _read_pcd_header(self, file) -> Optional[Dict[str, Any]]:
+        header: Dict[str, List[str]] = {}
+        while True:
+            line: bytes = file.readline()
+            if not line:
+                return None
+            tokens: List[str] = line.decode('ascii', errors='replace').split()
+            if not tokens or tokens[0].startswith('#'):
+                continue
+            header[tokens[0].upper()] = tokens[1:]
+            if tokens[0].upper() == 'DATA':
+                break
+
+        if header['DATA'][0].lower() != 'binary':  # ascii, binary_compressed
+            return None
+
+        fields: List[Tuple[Any, ...]] = []
+        counts: List[str] = header.get('COUNT', ['1'] * len(header['FIELDS']))
+        for i, (name, size, kind, count) in enumerate(zip(header['FIELDS'], header['SIZE'], header['TYPE'], counts)):
+            dtype: Optional[str] = PCD_TYPES.get((kind.upper(), int(size)))
+            if dtype is None:
+                return None
+            name = name if name != '_' else f'_pad{i}'  # PCL 패딩 필드 이름 중복 방지
+            fields.append((name, dtype) if int(count) == 1 else (name, dtype, (int(count),)))
+
+        points: int = int(header['POINTS'][0]) if 'POINTS' in header \
+            else int(header['WIDTH'][0]) * int(header['HEIGHT'][0])
+        return {'points': points, 'dtype': np.dtype(fields), 'offset': file.tell()}
+
+    def _read_ply_header(self, file) -> Optional[Dict[str, Any]]:
+        fmt: str = ''
+        element: Optional[str] = None
+        vertex_first: Optional[bool] = None
+        points: int = 0
+        fields: List[Tuple[str, str]] = []
+
+        while True:
+            line: bytes = file.readline()
+            if not line:
+                return None
+            tokens: List[str] = line.decode('ascii', errors='replace').split()
+            if not tokens:
+                continue
+            if tokens[0] == 'format':
+                fmt = tokens[1]
+            elif tokens[0] == 'element':
+                element = tokens[1]
+                if vertex_first is None:
+                    vertex_first = element == 'vertex'
+                if element == 'vertex':
+                    points = int(tokens[2])
+            elif tokens[0] == 'property' and element == 'vertex':
+                if tokens[1] == 'list' or tokens[1] not in PLY_TYPES:
+                    return None
+                fields.append((tokens[2], PLY_TYPES[tokens[1]]))
+            elif tokens[0] == 'end_header':
+                break
+
+        # vertex 이외의 element가 먼저 나오면 데이터 시작 위치를 알 수 없다
+        if fmt != 'binary_little_endian' or not vertex_first or not fields:
+            return None
+        return {'points': points, 'dtype': np.dtype(fields), 'offset': file.tell()}
+
+    def open_memmap(self, path: str) -> Optional[np.memmap]:
+        """헤더를 읽고 포인트 데이터 영역을 structured np.memmap으로 연다.
+
+        Args:
+            path : PCD 또는 PLY 파일 경로.
+        Returns:
+            포인트별 레코드를 가진 읽기 전용 memmap. memmap으로 읽을 수 없는 형식이면 None.
+
+        """
+        header: Optional[Dict[str, Any]] = self.read_header(path)
+        if header is None or not {'x', 'y', 'z'} <= set(header['dtype'].names):
+            return None
+        if header['points'] == 0:
+            return np.zeros(0, dtype=header['dtype'])
+        return np.memmap(path, dtype=header['dtype'], mode='r', offset=header['offset'], shape=(header['points'],))
+
+    def xyz_view(self, records: np.ndarray) -> np.ndarray:
+        """structured 레코드에서 x, y, z 필드를 (N, 3) 배열로 꺼낸다.
+        x, y, z가 같은 타입으로 연속해서 저장된 경우 stride를 이용한 view이므로 복사가 일어나지 않는다.
+
+        Args:
+            records : open_memmap 으로 연 structured 배열.
+        Returns:
+            (N, 3) 형태의 xyz 좌표 배열.
+
+        """
+        dtype: np.dtype = records.dtype
+        x_type, x_offset = dtype.fields['x'][:2]
+        y_type, y_offset = dtype.fields['y'][:2]
+        z_type, z_offset = dtype.fields['z'][:2]
+
+        if x_type == y_type == z_type and y_offset == x_offset + x_type.itemsize \
+                and z_offset == y_offset + x_type.itemsize:
+            return np.ndarray(
+                shape=(len(records), 3),
+                dtype=x_type,
+                buffer=records,
+                offset=x_offset,
+                strides=(dtype.itemsize, x_type.itemsize),
+            )
+
+        self.logger.warning('x, y, z fields are not contiguous. Copying xyz points')
+        return np.stack([records['x'], records['y'], records['z']], axis=1)
+
+    def read(self, path: str) -> np.ndarray:
+        """PCD 또는 PLY 파일의 xyz 좌표를 읽는다.
+        binary 형식이면 memmap view를, 그 외 형식이면 open3d로 읽은 배열을 반환한다.
+
+        Args:
+            path : PCD 또는 PLY 파일 경로.
+        Returns:
+            (N, 3) 형태의 xyz 좌표 배열.
+
+        """
+        records: Optional[np.ndarray] = self.open_memmap(path)
+        if records is None:
+            self.logger.info(f'Unsupported format for memmap. Reading with open3d: {path}')
+            return np.asarray(o3d.io.read_point_cloud(path).points)
+
+        self.logger.info(f'Memory mapped {len(records)} points from {path}')
+        return self.xyz_view(records)
+
+    def iter_chunks(self, path: str, chunk_size: int) -> Iterator[np.ndarray]:
+        """PCD 또는 PLY 파일의 xyz 좌표를 최대 chunk_size 개씩 나누어 읽는다.
+        memmap으로 읽을 수 있는 형식이면 한 번에 chunk 하나 분량만 메모리에 올라온다.
+        memmap으로 읽을 수 없는 형식은 open3d로 전체를 읽은 뒤 나누므로 메모리 제한이 적용되지 않는다.
+
+        Args:
+            path       : PCD 또는 PLY 파일 경로.
+            chunk_size : chunk 하나의 최대 포인트 개수.
+        Returns:
+            (chunk 포인트 개수, 3) 형태의 xyz 좌표 배열 iterator.
+
+        """
+        records: Optional[np.ndarray] = self.open_memmap(path)
+        if records is None:
+            self.logger.warning(f'Unsupported format for memmap. Chunks are sliced from a full open3d read: {path}')
+            points: np.ndarray = np.asarray(o3d.io.read_point_cloud(path).points)
+            for start in range(0, len(points), chunk_size):
+                yield points[start:start + chunk_size]
+            return
+
+        for start in range(0, len(records), chunk_size):
+            yield self.xyz_view(records[start:start + chunk_size])
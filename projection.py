@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict, Any, Tuple, Union, Optional, List, Iterable
+
+
+# 이름만으로 지정할 수 있는 orthographic view: 이름 -> (보는 방향, 이미지 위쪽 방향)
+VIEW_PRESETS: Dict[str, Tuple[Tuple[float, float, float], Tuple[float, float, float]]] = {
+    'top': ((0, 0, -1), (0, 1, 0)),
+    'bottom': ((0, 0, 1), (0, 1, 0)),
+    'front': ((0, 1, 0), (0, 0, 1)),
+    'back': ((0, -1, 0), (0, 0, 1)),
+    'side': ((-1, 0, 0), (0, 0, 1)),
+    'left': ((1, 0, 0), (0, 0, 1)),
+}
+
+PROJECTION_TYPES: Tuple[str, ...] = ('orthographic', 'pinhole')
+
+
+class ProjectionEngine:
+    def __init__(self, views: Iterable[Union[str, Dict[str, Any]]]) -> None:
+        """여러 view의 orthographic, pinhole 투영을 행렬 곱 한 번으로 계산하는 클래스.
+
+        view마다 (오른쪽, 위쪽, 보는 방향) 3개의 단위 벡터로 3x3 기저를 만들고, N개 view의 기저를 이어 붙인
+        3 x 3N 행렬을 포인트 배열에 한 번 곱한다. 따라서 view가 늘어나도 포인트 클라우드는 한 번만 읽는다.
+        pinhole view는 카메라 위치를 뺀 카메라 좌표를 보는 방향 거리(depth)로 나눈다.
+        카메라 위치는 기저를 곱한 뒤 열마다 상수로 빼므로 포인트 배열을 복사하지 않는다.
+
+        view 예)
+            'top'
+            {'name': 'top', 'direction': [0, 0, -1], 'up': [0, 1, 0]}
+            {'name': 'camera', 'type': 'pinhole', 'position': [0, 0, 2], 'direction': [0, 0, -1], 'up': [0, 1, 0], 'fov': 60}
+        up을 생략하면 (0, 0, 1)이고, z축 방향으로 보는 경우에는 (0, 1, 0)이다.
+
+        Args:
+            views : VIEW_PRESETS 이름 또는 view 설정 딕셔너리 목록.
+        Raises:
+            ValueError: 알 수 없는 view 이름, 투영 종류, 잘못된 방향 벡터, 중복된 view 이름이 있는 경우.
+
+        """
+        self.views: List[Dict[str, Any]] = [self._parse(view, index) for index, view in enumerate(views)]
+        if not self.views:
+            raise ValueError("At least one view is required")
+        names: List[str] = [view['name'] for view in self.views]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate view names: {names}")
+
+        self.basis: np.ndarray = np.hstack([view['rotation'] for view in self.views])  # (3, 3N)
+        self.offset: np.ndarray = np.concatenate([view['position'] @ view['rotation'] for view in self.views])  # (3N,)
+
+    def _parse(self, view: Union[str, Dict[str, Any]], index: int) -> Dict[str, Any]:
+        """view 설정을 확인하고 기저 행렬을 계산한다."""
+        if isinstance(view, str):
+            if view not in VIEW_PRESETS:
+                raise ValueError(f"Unknown view preset '{view}' (available: {', '.join(VIEW_PRESETS)})")
+            view = {'name': view}
+        name: str = view.get('name', '')
+        preset: Tuple[Any, Any] = VIEW_PRESETS.get(name, (None, None))
+        kind: str = view.get('type', 'orthographic')
+        if kind not in PROJECTION_TYPES:
+            raise ValueError(f"Unknown projection type '{kind}' (available: {', '.join(PROJECTION_TYPES)})")
+
+        direction: np.ndarray = np.asarray(view.get('direction', preset[0]), dtype=np.float64)
+        up: np.ndarray = np.asarray(view.get('up', preset[1] if preset[1] is not None else (0, 0, 1)), dtype=np.float64)
+        if direction.shape != (3,) or not np.any(direction):
+            raise ValueError(f"View '{name}' needs a non-zero 3D direction: {view.get('direction')}")
+
+        forward: np.ndarray = direction / np.linalg.norm(direction)
+        if 'up' not in view and preset[1] is None and np.linalg.norm(np.cross(forward, up)) < 1e-9:
+            up = np.array([0.0, 1.0, 0.0])  # 위쪽 방향을 지정하지 않고 z축 방향으로 보는 경우
+        right: np.ndarray = np.cross(forward, up)
+        if np.linalg.norm(right) < 1e-9:
+            raise ValueError(f"View '{name}' up vector is parallel to direction: {up}")
+        right /= np.linalg.norm(right)
+        true_up: np.ndarray = np.cross(right, forward)
+
+        position: np.ndarray = np.asarray(view.get('position', (0, 0, 0)), dtype=np.float64)
+        return {
+            'name': name or f'view{index}',  # 이름이 없으면 순서 번호
+            'type': kind,
+            'rotation': np.stack([right, true_up, forward], axis=1),  # 열: 오른쪽, 위쪽, 보는 방향
+            'position': position if kind == 'pinhole' else np.zeros(3),
+            'fov': float(view.get('fov', 60)),
+            'near': float(view.get('near', 1e-6)),
+        }
+
+    def project(self, points: np.ndarray) -> Dict[str, np.ndarray]:
+        """모든 view의 투영을 한 번에 계산한다.
+
+        Args:
+            points : (N, 3) 형태의 xyz 좌표 배열. float32 배열은 float32로 계산한다.
+        Returns:
+            view 이름을 key로, (u, v, depth) 3열 배열을 value로 가지는 딕셔너리.
+            orthographic view는 모든 포인트를, pinhole view는 카메라 앞(depth > near)의 포인트만 담는다.
+
+        """
+        dtype: np.dtype = np.result_type(points.dtype, np.float32)  # float32 포인트는 float32로 투영
+        camera: np.ndarray = points @ self.basis.astype(dtype, copy=False)  # (N, 3N) 행렬 곱 한 번
+        camera -= self.offset.astype(dtype, copy=False)
+
+        projected: Dict[str, np.ndarray] = {}
+        for i, view in enumerate(self.views):
+            block: np.ndarray = camera[:, 3 * i:3 * i + 3]
+            if view['type'] == 'pinhole':
+                block = block[block[:, 2] > view['near']]
+                block[:, :2] /= block[:, 2:3]  # 이미지 평면 좌표 (x / z, y / z)
+            projected[view['name']] = block
+        return projected
+
+    def bounds(self, name: str) -> Optional[Tuple[float, float, float, float]]:
+        """view의 이미지 평면 범위 (u 최소, u 최대, v 최소, v 최대)를 반환한다.
+
+        Args:
+            name : view 이름.
+        Returns:
+            pinhole view는 시야각(fov)으로 정해지는 범위. orthographic view는 None(투영된 포인트 범위 사용).
+
+        """
+        view: Dict[str, Any] = next(view for view in self.views if view['name'] == name)
+        if view['type'] != 'pinhole':
+            return None
+        half: float = float(np.tan(np.radians(view['fov']) / 2))
+        return -half, half, -half, half
@@ -0,0 +1,735 @@
+import numpy as np
+from typing import Tuple, Dict, Iterable, Optional, List, Iterator, Union
+
+
+# 2Dfile_paths 에 지정할 수 있는 맵 이름과 저장 시 사용할 colormap
+MAP_TYPES: Dict[str, Optional[str]] = {
+    'depth_map': 'gray',
+    'heat_map': None,
+    'density_map': 'gray',
+    'min_depth_map': 'gray',
+    'max_depth_map': 'gray',
+    'std_map': 'gray',
+}
+
+# low_memory 모드에서 포인트 하나가 처리 중 차지하는 대략적인 byte 수
+# (float32 변환 12, (u, v, depth) 투영 12, 정규화 좌표 8, 범위 마스크, 픽셀 인덱스, depth 값 등 임시 배열 16)
+LOW_MEMORY_POINT_BYTES: int = 48
+
+# backend 'auto'에서 (포인트 개수 / 픽셀 개수)가 이 값보다 작으면 sparse 누적을 사용한다
+SPARSE_POINT_RATIO: float = 0.05
+ACCUMULATOR_BACKENDS: Tuple[str, ...] = ('auto', 'dense', 'sparse')
+
+
+class Rasterizer:
+    def __init__(self, image_size: Tuple[int, int] = (100, 100), low_memory: bool = False, backend: str = 'auto') -> None:
+        """투영된 포인트들을 2D 픽셀 격자에 배열 연산으로 한 번에 기록하는 클래스.
+        포인트마다 Python 루프를 돌지 않고, 모든 픽셀 인덱스를 한 번에 계산한 뒤
+        bincount, np.add.at 으로 누적한다.
+
+        Args:
+            image_size : (높이, 너비) 형태의 이미지 크기.
+            low_memory : True이면 정규화를 float32 배열 하나에서 제자리(in place) 연산으로 하고,
+                         픽셀 인덱스는 이미지 크기에 맞는 가장 작은 정수 타입을 사용한다.
+                         반올림 순서가 달라 기본 모드와 경계 픽셀이 다를 수 있다.
+            backend    : 픽셀별 누적 방식. 'dense'는 MapAccumulator, 'sparse'는 SparseMapAccumulator,
+                         'auto'는 포인트 개수가 픽셀 개수의 SPARSE_POINT_RATIO배보다 적으면 sparse를 사용한다.
+        Raises:
+            ValueError: 알 수 없는 backend인 경우.
+
+        """
+        if backend not in ACCUMULATOR_BACKENDS:
+            raise ValueError(f"Unknown accumulator backend '{backend}' (available: {', '.join(ACCUMULATOR_BACKENDS)})")
+        self.image_size: Tuple[int, int] = image_size
+        self.low_memory: bool = low_memory
+        self.backend: str = backend
+
+    def accumulator(
+            self,
+            map_names: Iterable[str],
+            points: int,
+            count_dtype: type = int
+        ) -> Union['MapAccumulator', 'SparseMapAccumulator']:
+        """backend 설정과 포인트 개수에 맞는 누적 객체를 만든다.
+
+        Args:
+            map_names   : 생성할 맵 이름 목록.
+            points      : 누적할 포인트 개수.
+            count_dtype : 픽셀별 포인트 개수 타입.
+        Returns:
+            MapAccumulator 또는 SparseMapAccumulator.
+
+        """
+        pixels: int = self.image_size[0] * self.image_size[1]
+        sparse: bool = self.backend == 'sparse' or (self.backend == 'auto' and points < pixels * SPARSE_POINT_RATIO)
+        return (SparseMapAccumulator if sparse else MapAccumulator)(self.image_size, map_names, count_dtype)
+
+    @staticmethod
+    def depths(projected_points: np.ndarray) -> np.ndarray:
+        """투영된 포인트들의 depth 값 열을 반환한다.
+        project_to_2d의 (u, v, depth) 3열 배열은 세 번째 열, legacy 2열 배열은 첫 번째 열이다."""
+        return projected_points[:, 2] if projected_points.shape[1] == 3 else projected_points[:, 0]
+
+    @staticmethod
+    def extend_bounds(
+            bounds: Optional[Tuple[float, float, float, float]],
+            projected_view: np.ndarray
+        ) -> Optional[Tuple[float, float, float, float]]:
+        """(u, v, depth) 포인트들의 u, v 범위를 bounds에 합친다. chunk, 프레임으로 나누어 같은 범위를 쓸 때 사용한다.
+
+        Args:
+            bounds         : 지금까지의 (u 최소, u 최대, v 최소, v 최대) 범위. 처음에는 None.
+            projected_view : (u, v, depth) 3열 배열.
+        Returns:
+            합친 범위. 포인트가 없으면 bounds 그대로.
+
+        """
+        if not len(projected_view):
+            return bounds
+        u, v = projected_view[:, 0], projected_view[:, 1]
+        current: Tuple[float, float, float, float] = (float(np.min(u)), float(np.max(u)), float(np.min(v)), float(np.max(v)))
+        if bounds is None:
+            return current
+        return min(bounds[0], current[0]), max(bounds[1], current[1]), min(bounds[2], current[2]), max(bounds[3], current[3])
+
+    def compute_indices(
+            self,
+            projected_points: np.ndarray,
+            max_depth: float,
+            min_depth: float,
+            bounds: Optional[Tuple[float, float, float, float]] = None
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """모든 포인트의 픽셀 위치를 한 번에 계산한다.
+
+        project_to_2d의 (u, v, depth) 3열 배열은 compute_view_indices로 u, v 범위(bounds)에 맞추고,
+        max_depth, min_depth는 사용하지 않는다.
+        legacy 2열 배열은 두 열 모두 최대 최소 depth로 정규화한다.
+        기존 루프의 int() 변환과 동일하게 0 방향으로 버림(truncation)하며,
+        정수 변환 전에 실수 값으로 범위를 검사하여 오버플로를 막는다.
+        int(f)가 [0, n) 범위에 들어가는 조건은 -1 < f < n 이다.
+
+        Args:
+            projected_points : 투영된 포인트. (u, v, depth) 3열 또는 legacy 2열 배열.
+            max_depth        : legacy 2열 배열의 정규화에 사용할 최대 depth 값.
+            min_depth        : legacy 2열 배열의 정규화에 사용할 최소 depth 값.
+            bounds           : 3열 배열의 (u 최소, u 최대, v 최소, v 최대) 이미지 범위. None이면 포인트 범위를 사용한다.
+        Returns:
+            이미지 범위 안에 들어가는 포인트들의 1차원 픽셀 인덱스(y * 너비 + x)와
+            각 포인트가 범위 안에 들어가는지 나타내는 bool 마스크.
+        Raises:
+            ValueError: 최대 depth와 최소 depth가 같거나 u, v 범위의 크기가 0이어서 정규화할 수 없는 경우.
+
+        """
+        if projected_points.shape[1] == 3:
+            return self.compute_view_indices(projected_points, bounds)
+        if max_depth == min_depth:
+            raise ValueError(f"Max depth and min depth are equal: {max_depth}")
+
+        height, width = self.image_size
+        scale: float = max_depth - min_depth
+        if self.low_memory:
+            return self._compute_indices_in_place(projected_points, min_depth, scale)
+        fx: np.ndarray = (projected_points[:, 0] - min_depth) / scale * (width - 1)
+        fy: np.ndarray = (projected_points[:, 1] - min_depth) / scale * (height - 1)
+
+        valid: np.ndarray = (fx > -1) & (fx < width) & (fy > -1) & (fy < height)
+        linear_index: np.ndarray = fy[valid].astype(np.int64) * width + fx[valid].astype(np.int64)
+        return linear_index, valid
+
+    def _compute_indices_in_place(
+            self,
+            projected_points: np.ndarray,
+            min_depth: float,
+            scale: float
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """compute_indices의 low_memory 버전. 좌표마다 float32 배열 하나만 만들고 나머지 연산은 제자리에서 한다."""
+        height, width = self.image_size
+        index_type: type = np.min_scalar_type(-height * width)  # 픽셀 인덱스가 들어가는 가장 작은 signed 타입 (-1 < f < 0 버림 대비)
+        fx: np.ndarray = np.subtract(projected_points[:, 0], min_depth, dtype=np.float32)
+        fx *= np.float32((width - 1) / scale)
+        fy: np.ndarray = np.subtract(projected_points[:, 1], min_depth, dtype=np.float32)
+        fy *= np.float32((height - 1) / scale)
+
+        valid: np.ndarray = (fx > -1) & (fx < width) & (fy > -1) & (fy < height)
+        linear_index: np.ndarray = fy[valid].astype(index_type)
+        linear_index *= width
+        linear_index += fx[valid].astype(index_type)
+        return linear_index, valid
+
+    def count_map(self, linear_index: np.ndarray) -> np.ndarray:
+        """픽셀마다 몇 개의 포인트가 떨어졌는지 센다.
+
+        Args:
+            linear_index : compute_indices로 계산한 1차원 픽셀 인덱스.
+        Returns:
+            (높이, 너비) 형태의 int 카운트 배열.
+
+        """
+        height, width = self.image_size
+        return np.bincount(linear_index, minlength=height * width).astype(int).reshape(height, width)
+
+    def depth_map(
+            self,
+            projected_points: np.ndarray,
+            max_depth: float,
+            min_depth: float
+        ) -> np.ndarray:
+        """픽셀마다 떨어진 포인트들의 평균 depth 값을 구한다.
+
+        합계는 MapAccumulator가 float32 배열에 np.add.at 으로 포인트 순서대로 누적한다.
+        기존 루프(float32 += float64)와 같은 순서, 같은 반올림으로 계산되므로 결과가 비트 단위로 같다.
+
+        Args:
+            projected_points : 2D 배열로 변환된 투영된 포인트.
+            max_depth        : 정규화에 사용할 최대 depth 값.
+            min_depth        : 정규화에 사용할 최소 depth 값.
+        Returns:
+            float32 타입의 depth map.
+
+        """
+        return self.rasterize(projected_points, max_depth, min_depth, ['depth_map'])['depth_map']
+
+    def heat_map(
+            self,
+            projected_points: np.ndarray,
+            max_depth: float,
+            min_depth: float,
+            color: Tuple[int, int, int] = (255, 0, 0)
+        ) -> np.ndarray:
+        """포인트가 하나라도 떨어진 픽셀을 지정한 색으로 칠한다.
+
+        Args:
+            projected_points : 2D 배열로 변환된 투영된 포인트.
+            max_depth        : 정규화에 사용할 최대 depth 값.
+            min_depth        : 정규화에 사용할 최소 depth 값.
+            color            : 칠할 RGB 색상. 기본값은 붉은색.
+        Returns:
+            uint8 3채널 RGB heat map.
+
+        """
+        linear_index, _ = self.compute_indices(projected_points, max_depth, min_depth)
+        return self._paint(linear_index, color)
+
+    def rasterize(
+            self,
+            projected_points: np.ndarray,
+            max_depth: float,
+            min_depth: float,
+            map_names: Iterable[str],
+            bounds: Optional[Tuple[float, float, float, float]] = None
+        ) -> Dict[str, np.ndarray]:
+        """픽셀 인덱스와 카운트를 한 번만 계산하고, 요청된 모든 맵을 그 결과로부터 만든다.
+
+        맵이 하나 추가될 때마다 포인트 클라우드 전체를 다시 정규화하지 않고,
+        이미 계산된 픽셀 인덱스 위에서 MapAccumulator가 해당 맵의 reduction만 추가로 수행한다.
+        지원하는 맵은 MAP_TYPES 참고.
+            depth_map     : 픽셀별 평균 depth (float32)
+            heat_map      : 포인트가 있는 픽셀을 붉은색으로 표시 (uint8 RGB)
+            density_map   : 픽셀별 포인트 개수 (float32)
+            min_depth_map : 픽셀별 최소 depth (float32)
+            max_depth_map : 픽셀별 최대 depth (float32)
+            std_map       : 픽셀별 depth 표준편차 (float32)
+        포인트가 없는 픽셀은 모두 0이다.
+
+        Args:
+            projected_points : 2D 배열로 변환된 투영된 포인트.
+            max_depth        : 정규화에 사용할 최대 depth 값.
+            min_depth        : 정규화에 사용할 최소 depth 값.
+            map_names        : 생성할 맵 이름 목록.
+            bounds           : (u, v, depth) 3열 배열의 이미지 범위. compute_indices 참고.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 전달된 경우.
+
+        """
+        linear_index, valid = self.compute_indices(projected_points, max_depth, min_depth, bounds)
+        accumulator: Union[MapAccumulator, SparseMapAccumulator] = self.accumulator(
+            map_names, len(linear_index), count_dtype=np.min_scalar_type(len(projected_points)) if self.low_memory else int
+        )
+        accumulator.add(linear_index, self.depths(projected_points)[valid])
+        return accumulator.maps()
+
+    def compute_view_indices(
+            self,
+            projected_view: np.ndarray,
+            bounds: Optional[Tuple[float, float, float, float]] = None
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """ProjectionEngine으로 투영한 (u, v, depth) 포인트들의 픽셀 위치를 한 번에 계산한다.
+        u는 열, v는 행 방향이며 v가 클수록(view의 위쪽) 이미지 위쪽에 놓인다. 버림 방식은 compute_indices와 같다.
+        low_memory이면 좌표마다 float32 배열 하나만 만들고 나머지 연산은 제자리에서 한다.
+
+        Args:
+            projected_view : (u, v, depth) 3열 배열.
+            bounds         : (u 최소, u 최대, v 최소, v 최대) 이미지 범위. None이면 포인트 범위를 사용한다.
+        Returns:
+            이미지 범위 안에 들어가는 포인트들의 1차원 픽셀 인덱스와 bool 마스크.
+        Raises:
+            ValueError: u 또는 v 범위의 크기가 0인 경우.
+
+        """
+        u: np.ndarray = projected_view[:, 0]
+        v: np.ndarray = projected_view[:, 1]
+        if bounds is None:
+            bounds = (float(np.min(u)), float(np.max(u)), float(np.min(v)), float(np.max(v)))
+        min_u, max_u, min_v, max_v = bounds
+        if max_u == min_u or max_v == min_v:
+            raise ValueError(f"View bounds are degenerate: {bounds}")
+
+        height, width = self.image_size
+        if self.low_memory:
+            index_type: type = np.min_scalar_type(-height * width)
+            fx: np.ndarray = np.subtract(u, min_u, dtype=np.float32)
+            fx *= np.float32((width - 1) / (max_u - min_u))
+            fy: np.ndarray = np.subtract(max_v, v, dtype=np.float32)
+            fy *= np.float32((height - 1) / (max_v - min_v))
+            valid: np.ndarray = (fx > -1) & (fx < width) & (fy > -1) & (fy < height)
+            linear_index: np.ndarray = fy[valid].astype(index_type)
+            linear_index *= width
+            linear_index += fx[valid].astype(index_type)
+            return linear_index, valid
+
+        fx = (u - min_u) / (max_u - min_u) * (width - 1)
+        fy = (max_v - v) / (max_v - min_v) * (height - 1)
+
+        valid = (fx > -1) & (fx < width) & (fy > -1) & (fy < height)
+        linear_index = fy[valid].astype(np.int64) * width + fx[valid].astype(np.int64)
+        return linear_index, valid
+
+    def rasterize_view(
+            self,
+            projected_view: np.ndarray,
+            map_names: Iterable[str],
+            bounds: Optional[Tuple[float, float, float, float]] = None
+        ) -> Dict[str, np.ndarray]:
+        """(u, v, depth) 포인트들로 요청된 모든 맵을 만든다. depth는 view의 보는 방향 거리이다.
+
+        Args:
+            projected_view : (u, v, depth) 3열 배열.
+            map_names      : 생성할 맵 이름 목록.
+            bounds         : (u 최소, u 최대, v 최소, v 최대) 이미지 범위. None이면 포인트 범위를 사용한다.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+
+        """
+        linear_index, valid = self.compute_view_indices(projected_view, bounds)
+        accumulator: Union[MapAccumulator, SparseMapAccumulator] = self.accumulator(map_names, len(linear_index))
+        accumulator.add(linear_index, projected_view[valid, 2])
+        return accumulator.maps()
+
+    def z_buffer(
+            self,
+            linear_index: np.ndarray,
+            depths: np.ndarray,
+            nearest: bool = True
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """픽셀마다 가장 가까운(또는 가장 먼) 포인트 하나만 남긴다(z-buffer).
+
+        평균 depth map과 달리 보이는 면 뒤의 포인트가 섞이지 않는다. np.minimum.at(np.maximum.at)으로
+        픽셀별 최소(최대) depth를 구한 뒤, 그 depth와 같은 포인트들 중 인덱스가 가장 작은 포인트를
+        np.minimum.at으로 한 번 더 골라 이긴 포인트를 정한다. 포인트 순서와 관계없이 결과가 같다.
+
+        Args:
+            linear_index : compute_indices로 계산한 1차원 픽셀 인덱스.
+            depths       : 각 인덱스에 해당하는 depth 값.
+            nearest      : True이면 depth가 가장 작은 포인트, False이면 가장 큰 포인트를 남긴다.
+        Returns:
+            (높이, 너비) 형태의 float32 depth map과 이긴 포인트의 depths 내 인덱스(int64) 배열.
+            포인트가 없는 픽셀의 depth는 0, 인덱스는 -1이다.
+
+        """
+        height, width = self.image_size
+        pixels: int = height * width
+        best: np.ndarray = np.full(pixels, np.inf if nearest else -np.inf, dtype=np.result_type(depths.dtype, np.float32))
+        (np.minimum if nearest else np.maximum).at(best, linear_index, depths)
+
+        candidates: np.ndarray = np.flatnonzero(depths == best[linear_index])  # 픽셀의 최소(최대) depth를 가진 포인트들
+        winner: np.ndarray = np.full(pixels, len(depths), dtype=np.int64)
+        np.minimum.at(winner, linear_index[candidates], candidates)  # 같은 depth이면 인덱스가 작은 포인트
+
+        empty: np.ndarray = winner == len(depths)
+        winner[empty] = -1
+        depth_image: np.ndarray = best.astype(np.float32)
+        depth_image[empty] = 0
+        return depth_image.reshape(height, width), winner.reshape(height, width)
+
+    def z_buffer_map(
+            self,
+            projected_points: np.ndarray,
+            max_depth: float,
+            min_depth: float,
+            nearest: bool = True
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """투영된 포인트들로 z-buffer depth map을 만든다. 픽셀 위치는 depth_map과 같다.
+
+        Args:
+            projected_points : 2D 배열로 변환된 투영된 포인트.
+            max_depth        : 정규화에 사용할 최대 depth 값.
+            min_depth        : 정규화에 사용할 최소 depth 값.
+            nearest          : True이면 가장 가까운 포인트, False이면 가장 먼 포인트를 남긴다.
+        Returns:
+            float32 depth map과 픽셀별 이긴 포인트의 projected_points 행 번호(없으면 -1).
+
+        """
+        linear_index, valid = self.compute_indices(projected_points, max_depth, min_depth)
+        return self._z_buffer_rows(linear_index, valid, self.depths(projected_points)[valid], nearest)
+
+    def z_buffer_view(
+            self,
+            projected_view: np.ndarray,
+            bounds: Optional[Tuple[float, float, float, float]] = None,
+            nearest: bool = True
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """(u, v, depth) 포인트들로 z-buffer depth map을 만든다. 픽셀 위치는 rasterize_view와 같다.
+
+        Args:
+            projected_view : (u, v, depth) 3열 배열.
+            bounds         : (u 최소, u 최대, v 최소, v 최대) 이미지 범위. None이면 포인트 범위를 사용한다.
+            nearest        : True이면 카메라에 가장 가까운 포인트, False이면 가장 먼 포인트를 남긴다.
+        Returns:
+            float32 depth map과 픽셀별 이긴 포인트의 projected_view 행 번호(없으면 -1).
+
+        """
+        linear_index, valid = self.compute_view_indices(projected_view, bounds)
+        return self._z_buffer_rows(linear_index, valid, projected_view[valid, 2], nearest)
+
+    def _z_buffer_rows(
+            self,
+            linear_index: np.ndarray,
+            valid: np.ndarray,
+            depths: np.ndarray,
+            nearest: bool
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """z_buffer의 인덱스(범위 안 포인트 기준)를 입력 배열의 행 번호로 바꾼다."""
+        depth_image, winner = self.z_buffer(linear_index, depths, nearest)
+        rows: np.ndarray = np.flatnonzero(valid)
+        hit: np.ndarray = winner >= 0
+        winner[hit] = rows[winner[hit]]
+        return depth_image, winner
+
+    def _paint(self, linear_index: np.ndarray, color: Tuple[int, int, int]) -> np.ndarray:
+        """포인트가 떨어진 픽셀들을 한 번에 칠한다."""
+        height, width = self.image_size
+        heat_map_image: np.ndarray = np.zeros((height * width, 3), dtype=np.uint8)  # 3채널 RGB 이미지 초기화
+        heat_map_image[linear_index] = color
+        return heat_map_image.reshape(height, width, 3)
+
+
+class MapAccumulator:
+    def __init__(self, image_size: Tuple[int, int], map_names: Iterable[str], count_dtype: type = int) -> None:
+        """픽셀별 누적값(카운트, depth 합계, 최소, 최대, 제곱합)을 보관하는 클래스.
+        요청된 맵에 필요한 누적 배열만 만들며, add를 여러 번 호출하여 포인트를 나누어 누적할 수 있다.
+        포인트 클라우드 전체를 한 번에 누적하든 chunk 단위로 나누어 누적하든
+        포인트 순서가 같으면 depth map은 비트 단위로 같은 결과가 나온다.
+
+        Args:
+            image_size  : (높이, 너비) 형태의 이미지 크기.
+            map_names   : 생성할 맵 이름 목록. MAP_TYPES 참고.
+            count_dtype : 픽셀별 포인트 개수 타입. 누적할 전체 포인트 개수가 들어가는 타입이어야 한다.
+                          예) np.min_scalar_type(포인트 개수)
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 전달된 경우.
+
+        """
+        self.map_names: List[str] = list(map_names)
+        unknown: List[str] = [name for name in self.map_names if name not in MAP_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown map type: {unknown}")
+
+        self.image_size: Tuple[int, int] = image_size
+        pixels: int = image_size[0] * image_size[1]
+        self.count: np.ndarray = np.zeros(pixels, dtype=count_dtype)
+        self.depth_sum: Optional[np.ndarray] = np.zeros(pixels, dtype=np.float32) if 'depth_map' in self.map_names else None
+        self.min_depth: Optional[np.ndarray] = np.full(pixels, np.inf) if 'min_depth_map' in self.map_names else None
+        self.max_depth: Optional[np.ndarray] = np.full(pixels, -np.inf) if 'max_depth_map' in self.map_names else None
+        self.total: Optional[np.ndarray] = np.zeros(pixels) if 'std_map' in self.map_names else None
+        self.total_sq: Optional[np.ndarray] = np.zeros(pixels) if 'std_map' in self.map_names else None
+
+    @property
+    def nbytes(self) -> int:
+        """누적 배열들이 차지하는 byte 수."""
+        arrays = (self.count, self.depth_sum, self.min_depth, self.max_depth, self.total, self.total_sq)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def add(self, linear_index: np.ndarray, depths: np.ndarray) -> None:
+        """픽셀 인덱스와 depth 값을 누적한다.
+
+        Args:
+            linear_index : Rasterizer.compute_indices로 계산한 1차원 픽셀 인덱스.
+            depths       : 각 인덱스에 해당하는 depth 값.
+        Returns:
+            없음.
+
+        """
+        pixels: int = len(self.count)
+        np.add(self.count, np.bincount(linear_index, minlength=pixels), out=self.count, casting='unsafe')  # count_dtype 유지
+        if self.depth_sum is not None:
+            np.add.at(self.depth_sum, linear_index, depths)  # depth 값을 해당 위치에 누적
+        if self.min_depth is not None:
+            np.minimum.at(self.min_depth, linear_index, depths)
+        if self.max_depth is not None:
+            np.maximum.at(self.max_depth, linear_index, depths)
+        if self.total is not None:
+            self.total += np.bincount(linear_index, weights=depths, minlength=pixels)
+            self.total_sq += np.bincount(linear_index, weights=depths * depths, minlength=pixels)
+
+    def downsample(self) -> 'MapAccumulator':
+        """2x2 픽셀 블록을 하나로 합친 절반 크기의 누적값을 만든다. 포인트를 다시 훑지 않는다.
+        카운트, 합계, 제곱합은 더하고 최소, 최대는 블록 안의 최소, 최대를 사용한다.
+        홀수 크기인 경우 마지막 행, 열은 빈 픽셀과 합쳐진다.
+
+        Args:
+            없음.
+        Returns:
+            ((높이 + 1) // 2, (너비 + 1) // 2) 크기의 MapAccumulator.
+
+        """
+        height, width = self.image_size
+        result: MapAccumulator = MapAccumulator(((height + 1) // 2, (width + 1) // 2), self.map_names, self.count.dtype)
+        result.count = self._block_reduce(self.count, np.add, 0)
+        if self.depth_sum is not None:
+            result.depth_sum = self._block_reduce(self.depth_sum, np.add, 0)
+        if self.min_depth is not None:
+            result.min_depth = self._block_reduce(self.min_depth, np.minimum, np.inf)
+        if self.max_depth is not None:
+            result.max_depth = self._block_reduce(self.max_depth, np.maximum, -np.inf)
+        if self.total is not None:
+            result.total = self._block_reduce(self.total, np.add, 0)
+            result.total_sq = self._block_reduce(self.total_sq, np.add, 0)
+        return result
+
+    def _block_reduce(self, values: np.ndarray, ufunc: np.ufunc, fill: float) -> np.ndarray:
+        """1차원 누적 배열을 2x2 블록 단위로 ufunc reduction 한다. 홀수 크기는 fill 값으로 채운다."""
+        height, width = self.image_size
+        padded: np.ndarray = np.full((height + height % 2, width + width % 2), fill, dtype=values.dtype)
+        padded[:height, :width] = values.reshape(height, width)
+        blocks: np.ndarray = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+        return ufunc.reduce(ufunc.reduce(blocks, axis=3), axis=1).ravel()
+
+    def maps(self) -> Dict[str, np.ndarray]:
+        """누적값으로부터 요청된 맵들을 만든다. 각 맵은 마지막 reduction만 수행한다.
+        포인트가 없는 픽셀은 모두 0이다.
+
+        Args:
+            없음.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+
+        """
+        height, width = self.image_size
+        count_map: np.ndarray = self.count.reshape(height, width)
+        occupied: np.ndarray = count_map > 0
+
+        maps: Dict[str, np.ndarray] = {}
+        for name in self.map_names:
+            if name == 'depth_map':
+                depth_map_image: np.ndarray = self.depth_sum.reshape(height, width).copy()
+                depth_map_image[occupied] /= count_map[occupied]  # 평균화
+                maps[name] = depth_map_image
+            elif name == 'heat_map':
+                heat_map_image: np.ndarray = np.zeros((height, width, 3), dtype=np.uint8)
+                heat_map_image[occupied] = (255, 0, 0)  # 붉은색으로 표시
+                maps[name] = heat_map_image
+            elif name == 'density_map':
+                maps[name] = count_map.astype(np.float32)
+            elif name in ('min_depth_map', 'max_depth_map'):
+                extreme: np.ndarray = (self.min_depth if name == 'min_depth_map' else self.max_depth).reshape(height, width)
+                maps[name] = np.where(occupied, extreme, 0).astype(np.float32)
+            elif name == 'std_map':
+                counts: np.ndarray = np.maximum(self.count, 1)
+                mean: np.ndarray = self.total / counts
+                variance: np.ndarray = np.maximum(self.total_sq / counts - mean * mean, 0)  # 반올림 오차로 음수가 되는 것 방지
+                maps[name] = np.sqrt(variance).reshape(height, width).astype(np.float32)
+
+        return maps
+
+
+class SparseMapAccumulator:
+    def __init__(self, image_size: Tuple[int, int], map_names: Iterable[str], count_dtype: type = int) -> None:
+        """포인트가 있는 픽셀의 누적값만 1차원 픽셀 인덱스(key) 순서로 보관하는 MapAccumulator.
+
+        출력 해상도가 크고 포인트가 닿는 픽셀이 적은 경우(예: 50k x 50k 중 1% 미만) 이미지 크기의 배열을 만들지 않는다.
+        add는 픽셀 인덱스를 정렬하여 같은 픽셀의 포인트를 연속 구간으로 모은 뒤, 구간마다 reduceat으로
+        개수, 최소, 최대, 합계, 제곱합을 구한다. depth 합계(float32)는 MapAccumulator와 같은 순서, 같은 반올림이 되도록
+        구간 번호로 np.add.at 누적하므로 depth map이 비트 단위로 같다.
+        이미지 배열은 tile, tiles, maps로 출력할 때에만 해당 영역 크기로 만든다.
+
+        Args:
+            image_size  : (높이, 너비) 형태의 이미지 크기.
+            map_names   : 생성할 맵 이름 목록. MAP_TYPES 참고.
+            count_dtype : 픽셀별 포인트 개수 타입.
+        Raises:
+            ValueError: 지원하지 않는 맵 이름이 전달된 경우.
+
+        """
+        self.map_names: List[str] = list(map_names)
+        unknown: List[str] = [name for name in self.map_names if name not in MAP_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown map type: {unknown}")
+
+        self.image_size: Tuple[int, int] = image_size
+        self.keys: np.ndarray = np.zeros(0, dtype=np.int64)  # 포인트가 있는 픽셀의 1차원 인덱스 (정렬됨)
+        self.count: np.ndarray = np.zeros(0, dtype=count_dtype)
+        self.depth_sum: Optional[np.ndarray] = np.zeros(0, dtype=np.float32) if 'depth_map' in self.map_names else None
+        self.min_depth: Optional[np.ndarray] = np.zeros(0) if 'min_depth_map' in self.map_names else None
+        self.max_depth: Optional[np.ndarray] = np.zeros(0) if 'max_depth_map' in self.map_names else None
+        self.total: Optional[np.ndarray] = np.zeros(0) if 'std_map' in self.map_names else None
+        self.total_sq: Optional[np.ndarray] = np.zeros(0) if 'std_map' in self.map_names else None
+
+    @property
+    def nbytes(self) -> int:
+        """누적 배열들이 차지하는 byte 수."""
+        arrays = (self.keys, self.count, self.depth_sum, self.min_depth, self.max_depth, self.total, self.total_sq)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def _fields(self) -> List[Tuple[str, np.ufunc, float]]:
+        """보관 중인 누적 배열의 (속성 이름, 합치는 ufunc, 빈 픽셀 값) 목록."""
+        fields: List[Tuple[str, np.ufunc, float]] = [('count', np.add, 0)]
+        for name, ufunc, fill in (('depth_sum', np.add, 0), ('min_depth', np.minimum, np.inf), ('max_depth', np.maximum, -np.inf),
+                                  ('total', np.add, 0), ('total_sq', np.add, 0)):
+            if getattr(self, name) is not None:
+                fields.append((name, ufunc, fill))
+        return fields
+
+    def _merge_keys(self, keys: np.ndarray) -> np.ndarray:
+        """새 key들을 보관 중인 key와 합치고, 새 key들의 위치를 반환한다. 새 픽셀의 누적값은 빈 픽셀 값으로 채운다."""
+        # 두 key 배열 모두 정렬되어 있고 중복이 없으므로 이어 붙여 정렬한 뒤 연속 중복만 제거한다
+        merged: np.ndarray = np.sort(np.concatenate((self.keys, keys)), kind='stable')
+        merged = merged[np.concatenate(([True], merged[1:] != merged[:-1]))]
+        if len(merged) != len(self.keys):
+            position: np.ndarray = np.searchsorted(merged, self.keys)
+            for name, _, fill in self._fields():
+                old: np.ndarray = getattr(self, name)
+                values: np.ndarray = np.full(len(merged), fill, dtype=old.dtype)
+                values[position] = old
+                setattr(self, name, values)
+            self.keys = merged
+        return np.searchsorted(self.keys, keys)
+
+    def add(self, linear_index: np.ndarray, depths: np.ndarray) -> None:
+        """픽셀 인덱스와 depth 값을 누적한다.
+
+        Args:
+            linear_index : Rasterizer.compute_indices로 계산한 1차원 픽셀 인덱스.
+            depths       : 각 인덱스에 해당하는 depth 값.
+        Returns:
+            없음.
+
+        """
+        if not len(linear_index):
+            return
+        order: np.ndarray = np.argsort(linear_index, kind='stable')  # 같은 픽셀 안에서는 포인트 순서 유지
+        sorted_index: np.ndarray = linear_index[order]
+        sorted_depths: np.ndarray = depths[order]
+        starts: np.ndarray = np.flatnonzero(np.concatenate(([True], sorted_index[1:] != sorted_index[:-1])))
+        position: np.ndarray = self._merge_keys(sorted_index[starts].astype(np.int64))
+
+        np.add.at(self.count, position, np.diff(np.append(starts, len(sorted_index))).astype(self.count.dtype))
+        if self.depth_sum is not None:
+            segment: np.ndarray = np.repeat(position, np.diff(np.append(starts, len(sorted_index))))
+            np.add.at(self.depth_sum, segment, sorted_depths)  # MapAccumulator와 같은 float32 누적 순서
+        if self.min_depth is not None:
+            self.min_depth[position] = np.minimum(self.min_depth[position], np.minimum.reduceat(sorted_depths, starts))
+        if self.max_depth is not None:
+            self.max_depth[position] = np.maximum(self.max_depth[position], np.maximum.reduceat(sorted_depths, starts))
+        if self.total is not None:
+            self.total[position] += np.add.reduceat(sorted_depths, starts)
+            self.total_sq[position] += np.add.reduceat(sorted_depths * sorted_depths, starts)
+
+    def downsample(self) -> 'SparseMapAccumulator':
+        """2x2 픽셀 블록을 하나로 합친 절반 크기의 누적값을 만든다. MapAccumulator.downsample과 같다.
+
+        Args:
+            없음.
+        Returns:
+            ((높이 + 1) // 2, (너비 + 1) // 2) 크기의 SparseMapAccumulator.
+
+        """
+        height, width = self.image_size
+        result: SparseMapAccumulator = SparseMapAccumulator(((height + 1) // 2, (width + 1) // 2), self.map_names, self.count.dtype)
+        if not len(self.keys):
+            return result
+        parents: np.ndarray = (self.keys // width // 2) * result.image_size[1] + (self.keys % width) // 2
+        order: np.ndarray = np.argsort(parents, kind='stable')
+        sorted_parents: np.ndarray = parents[order]
+        starts: np.ndarray = np.flatnonzero(np.concatenate(([True], sorted_parents[1:] != sorted_parents[:-1])))
+        result.keys = sorted_parents[starts]
+        for name, ufunc, _ in self._fields():
+            setattr(result, name, ufunc.reduceat(getattr(self, name)[order], starts))
+        return result
+
+    def tile(self, row: int, col: int, height: int, width: int) -> MapAccumulator:
+        """(row, col)에서 시작하는 height x width 영역의 누적값을 dense MapAccumulator로 만든다.
+        key가 행 우선 순서로 정렬되어 있으므로 해당 행 범위는 searchsorted로 바로 찾는다.
+
+        Args:
+            row    : 영역의 첫 번째 행.
+            col    : 영역의 첫 번째 열.
+            height : 영역 높이. 이미지 밖은 잘린다.
+            width  : 영역 너비. 이미지 밖은 잘린다.
+        Returns:
+            영역 크기의 MapAccumulator. maps()로 맵 배열을 만든다.
+
+        """
+        image_height, image_width = self.image_size
+        height, width = min(height, image_height - row), min(width, image_width - col)
+        dense: MapAccumulator = MapAccumulator((height, width), self.map_names, self.count.dtype)
+
+        lo, hi = np.searchsorted(self.keys, [row * image_width, (row + height) * image_width])
+        rows: np.ndarray = self.keys[lo:hi] // image_width - row
+        cols: np.ndarray = self.keys[lo:hi] % image_width - col
+        inside: np.ndarray = (cols >= 0) & (cols < width)
+        local: np.ndarray = rows[inside] * width + cols[inside]
+        for name, _, _ in self._fields():
+            getattr(dense, name)[local] = getattr(self, name)[lo:hi][inside]
+        return dense
+
+    def tiles(self, tile_size: int) -> Iterator[Tuple[int, int, MapAccumulator]]:
+        """포인트가 있는 tile_size x tile_size 타일만 dense MapAccumulator로 만든다. 마지막 행, 열의 타일은 더 작을 수 있다.
+
+        Args:
+            tile_size : 타일 한 변의 픽셀 개수.
+        Returns:
+            (타일 행 번호, 타일 열 번호, 타일 MapAccumulator) iterator. 행 우선 순서이다.
+
+        """
+        width: int = self.image_size[1]
+        tile_ids: np.ndarray = np.unique((self.keys // width // tile_size) * -(-width // tile_size) + (self.keys % width) // tile_size)
+        for tile_id in tile_ids:
+            tile_row, tile_col = divmod(int(tile_id), -(-width // tile_size))
+            yield tile_row, tile_col, self.tile(tile_row * tile_size, tile_col * tile_size, tile_size, tile_size)
+
+    def maps(self) -> Dict[str, np.ndarray]:
+        """이미지 전체 크기의 맵들을 만든다. MapAccumulator.maps와 같은 결과이다.
+        이미지 크기의 누적 배열(카운트, 합계, 최소, 최대, 제곱합)은 만들지 않고,
+        요청된 맵마다 0으로 채운 출력 배열 하나를 만들어 포인트가 있는 픽셀(key)에만 값을 쓴다.
+
+        Args:
+            없음.
+        Returns:
+            맵 이름을 key로, 맵 배열을 value로 가지는 딕셔너리.
+
+        """
+        height, width = self.image_size
+        maps: Dict[str, np.ndarray] = {}
+        for name in self.map_names:
+            if name == 'heat_map':
+                heat_map_image: np.ndarray = np.zeros((height * width, 3), dtype=np.uint8)
+                heat_map_image[self.keys] = (255, 0, 0)  # 붉은색으로 표시
+                maps[name] = heat_map_image.reshape(height, width, 3)
+                continue
+
+            if name == 'depth_map':
+                values: np.ndarray = self.depth_sum / self.count  # 평균화 (MapAccumulator와 같은 dtype 계산)
+            elif name == 'density_map':
+                values = self.count
+            elif name in ('min_depth_map', 'max_depth_map'):
+                values = self.min_depth if name == 'min_depth_map' else self.max_depth
+            else:  # std_map
+                mean: np.ndarray = self.total / self.count
+                values = np.sqrt(np.maximum(self.total_sq / self.count - mean * mean, 0))  # 반올림 오차로 음수가 되는 것 방지
+            image: np.ndarray = np.zeros(height * width, dtype=np.float32)
+            image[self.keys] = values
+            maps[name] = image.reshape(height, width)
+
+        return maps
@@ -0,0 +1,146 @@
+import numpy as np
+from typing import Dict, Any, Tuple, List, Iterable
+
+from logger import Logger
+
+
+# ROI 종류별 필수 키
+ROI_TYPES: Dict[str, Tuple[str, ...]] = {
+    'box': ('min', 'max'),
+    'oriented_box': ('center', 'extent'),
+    'polygon': ('polygon', 'z_range'),
+}
+
+
+class RoiFilter:
+    def __init__(self, roi: Dict[str, Any], logger: Logger) -> None:
+        """관심 영역(ROI) 안의 포인트만 남기는 클래스.
+
+        ROI는 축 정렬 상자(box), 회전된 상자(oriented_box), xy 다각형을 z 범위로 세운 기둥(polygon) 중 하나이다.
+        포인트별 판정은 배열 연산 한 번으로 계산한 mask로 하며, 먼저 ROI를 감싸는 축 정렬 범위(bounds)로
+        후보를 줄인 뒤 회전 상자, 다각형 판정은 후보에만 계산한다.
+        chunk 단위로 읽는 경우 chunk의 최대 최소 좌표가 ROI 범위와 겹치지 않으면 chunk 전체를 건너뛴다.
+
+        roi 예)
+            {'type': 'box', 'min': [0, 0, 0], 'max': [1, 1, 1]}
+            {'type': 'oriented_box', 'center': [0, 0, 0], 'extent': [2, 1, 1], 'rotation': [[1, 0, 0], [0, 1, 0], [0, 0, 1]]}
+            {'type': 'polygon', 'polygon': [[0, 0], [1, 0], [0, 1]], 'z_range': [0, 1]}
+
+        Args:
+            roi    : ROI 설정. 'type'과 ROI_TYPES의 필수 키. oriented_box의 'rotation'은 열이 상자의 축인 3x3 행렬(선택).
+            logger : 로그 기록용 Logger 인스턴스.
+        Raises:
+            ValueError: 알 수 없는 ROI 종류이거나 필수 키, 좌표 형태가 잘못된 경우.
+
+        """
+        self.logger: Logger = logger
+        self.kind: str = roi.get('type', 'box')
+        if self.kind not in ROI_TYPES:
+            raise ValueError(f"Unknown ROI type '{self.kind}' (available: {', '.join(ROI_TYPES)})")
+        missing: List[str] = [key for key in ROI_TYPES[self.kind] if roi.get(key) is None]
+        if missing:
+            raise ValueError(f"ROI type '{self.kind}' needs {', '.join(missing)}")
+
+        if self.kind == 'box':
+            self.lower: np.ndarray = self._vector(roi['min'], 3, 'min')
+            self.upper: np.ndarray = self._vector(roi['max'], 3, 'max')
+
+        elif self.kind == 'oriented_box':
+            self.center: np.ndarray = self._vector(roi['center'], 3, 'center')
+            self.half: np.ndarray = self._vector(roi['extent'], 3, 'extent') / 2
+            self.rotation: np.ndarray = np.asarray(roi.get('rotation', np.eye(3)), dtype=np.float64)
+            if self.rotation.shape != (3, 3):
+                raise ValueError(f"ROI rotation must be a 3x3 matrix: {roi.get('rotation')}")
+            reach: np.ndarray = np.abs(self.rotation) @ self.half  # 회전된 상자를 감싸는 축 정렬 범위의 절반
+            self.lower, self.upper = self.center - reach, self.center + reach
+
+        else:
+            self.polygon: np.ndarray = np.asarray(roi['polygon'], dtype=np.float64)
+            if self.polygon.ndim != 2 or self.polygon.shape[1] != 2 or len(self.polygon) < 3:
+                raise ValueError(f"ROI polygon needs at least 3 [x, y] vertices: {roi['polygon']}")
+            z_range: np.ndarray = self._vector(roi['z_range'], 2, 'z_range')
+            self.lower = np.append(self.polygon.min(axis=0), z_range[0])
+            self.upper = np.append(self.polygon.max(axis=0), z_range[1])
+
+        if np.any(self.lower > self.upper):
+            raise ValueError(f"ROI lower bound must not exceed upper bound: {self.lower} > {self.upper}")
+
+    def _vector(self, value: Any, size: int, name: str) -> np.ndarray:
+        """설정 값을 길이 size의 float64 배열로 변환한다."""
+        vector: np.ndarray = np.asarray(value, dtype=np.float64)
+        if vector.shape != (size,):
+            raise ValueError(f"ROI {name} must have {size} numbers: {value}")
+        return vector
+
+    def mask(self, points: np.ndarray) -> np.ndarray:
+        """ROI 안에 있는 포인트를 True로 표시한다. 경계 위의 포인트는 ROI 안으로 본다.
+
+        Args:
+            points : (N, 3) 형태의 xyz 좌표 배열.
+        Returns:
+            (N,) 형태의 bool 배열.
+
+        """
+        inside: np.ndarray = np.all((points >= self.lower) & (points <= self.upper), axis=1)
+        if self.kind == 'box':
+            return inside
+
+        candidates: np.ndarray = np.flatnonzero(inside)
+        selected: np.ndarray = points[candidates]
+        if self.kind == 'oriented_box':
+            local: np.ndarray = (selected - self.center) @ self.rotation  # 상자 축 좌표
+            inside[candidates] = np.all(np.abs(local) <= self.half, axis=1)
+        else:
+            inside[candidates] = self._in_polygon(selected[:, 0], selected[:, 1])
+        return inside
+
+    def _in_polygon(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """even-odd 규칙으로 (x, y)가 다각형 안에 있는지 판정한다. 변마다 모든 포인트를 한 번에 계산한다."""
+        inside: np.ndarray = np.zeros(len(x), dtype=bool)
+        for (x1, y1), (x2, y2) in zip(self.polygon, np.roll(self.polygon, -1, axis=0)):
+            if y1 == y2:  # 수평 변은 교차 판정에 영향이 없음
+                continue
+            crosses: np.ndarray = (y1 > y) != (y2 > y)
+            inside ^= crosses & (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+        return inside
+
+    def crop(self, points: np.ndarray) -> np.ndarray:
+        """ROI 안의 포인트만 남긴다.
+
+        Args:
+            points : (N, 3) 형태의 xyz 좌표 배열.
+        Returns:
+            ROI 안의 포인트 배열(복사본).
+
+        """
+        kept: np.ndarray = points[self.mask(points)]
+        self.logger.info('ROI crop (%s): kept %s of %s points (%.1f%%)', args=(self.kind, len(kept), len(points), 100 * len(kept) / max(len(points), 1)))
+        return kept
+
+    def crop_chunks(self, chunks: Iterable[np.ndarray]) -> np.ndarray:
+        """chunk 단위로 읽은 포인트 중 ROI 안의 포인트만 모은다.
+
+        chunk마다 mask 한 번으로 판정하므로 memmap chunk는 한 번만 읽히고, ROI 안의 포인트만 메모리에 복사된다.
+        chunk 범위로 건너뛰려면 범위를 구하기 위해 chunk 전체를 읽어야 하므로 범위 판정은 하지 않는다.
+
+        Args:
+            chunks : (chunk 포인트 개수, 3) 형태의 xyz 좌표 배열 iterator.
+        Returns:
+            ROI 안의 포인트 배열.
+
+        """
+        kept: List[np.ndarray] = []
+        total: int = 0
+        count: int = 0
+        for chunk in chunks:
+            count += 1
+            total += len(chunk)
+            if len(chunk):
+                kept.append(chunk[self.mask(chunk)])
+
+        points: np.ndarray = np.concatenate(kept) if kept else np.zeros((0, 3))
+        self.logger.info(
+            'ROI crop (%s): kept %s of %s points (%.1f%%) in %s chunks',
+            args=(self.kind, len(points), total, 100 * len(points) / max(total, 1), count)
+        )
+        return points
@@ -0,0 +1,169 @@
+import numpy as np
+import open3d as o3d
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple, Optional
+
+from logger import Logger
+
+
+def knn_mean_distances(points: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """queries 각 포인트에서 points 중 가장 가까운 k개 포인트까지의 평균 거리를 구한다.
+    open3d remove_statistical_outlier와 같이 자기 자신(거리 0)도 k개 안에 포함된다.
+
+    Args:
+        points  : 탐색 대상 포인트.
+        queries : 평균 거리를 구할 포인트.
+        k       : 이웃 개수.
+    Returns:
+        queries 포인트별 평균 이웃 거리.
+
+    """
+    if len(queries) == 0:
+        return np.zeros(0)
+    nns = o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor(np.ascontiguousarray(points, dtype=np.float64)))
+    nns.knn_index()
+    _, distances = nns.knn_search(o3d.core.Tensor(np.ascontiguousarray(queries, dtype=np.float64)), k)
+    return np.sqrt(distances.numpy()).mean(axis=1)
+
+
+def _tile_statistical(points: np.ndarray, core: np.ndarray, nb_neighbors: int) -> np.ndarray:
+    """타일(halo 포함) 안에서 core 포인트들의 평균 이웃 거리를 구한다. 프로세스 풀 워커에서 실행된다."""
+    return knn_mean_distances(points, points[core], nb_neighbors)
+
+
+def _tile_radius(points: np.ndarray, core: np.ndarray, nb_points: int, radius: float) -> np.ndarray:
+    """타일(halo 포함) 안에서 radius outlier removal을 실행하고, core 포인트들의 유지 여부를 반환한다.
+    halo가 radius 이상이면 core 포인트의 결과는 전체 클라우드에 실행한 것과 같다."""
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
+    _, ind = pcd.remove_radius_outlier(nb_points=nb_points, radius=radius)
+    keep: np.ndarray = np.zeros(len(points), dtype=bool)
+    keep[np.asarray(ind, dtype=np.int64)] = True
+    return keep[core]
+
+
+class TiledNoiseFilter:
+    def __init__(self, logger: Logger) -> None:
+        """포인트 클라우드를 공간 타일로 나누어 outlier removal을 병렬로 실행하는 클래스.
+
+        각 타일은 경계 밖의 이웃을 찾을 수 있도록 halo 영역을 함께 가진다.
+        'radius'는 halo를 radius로 두어 타일마다 open3d remove_radius_outlier를 실행하므로
+        결과가 전체 클라우드에 한 번 실행한 것과 같다.
+        'statistical'은 평균, 표준편차 기준값이 클라우드 전체로 계산되므로, 타일에서는 포인트별 평균
+        이웃 거리만 구하고 기준값은 모든 타일의 결과를 모은 뒤에 계산한다.
+        halo보다 멀리 있는 이웃이 필요한 타일 경계 포인트만 결과가 달라질 수 있다.
+
+        Args:
+            logger : 로그 기록용 Logger 인스턴스.
+
+        """
+        self.logger: Logger = logger
+
+    def estimate_halo(self, points: np.ndarray, nb_neighbors: int, samples: int = 1000) -> float:
+        """statistical 알고리즘용 halo 크기를 추정한다.
+        최대 100000개의 부분 집합 안에서 k번째 이웃 거리를 구하므로, 실제 이웃 거리보다 크게(안전하게) 추정된다.
+
+        Args:
+            points       : 전체 포인트.
+            nb_neighbors : 이웃 개수.
+            samples      : 거리를 측정할 포인트 개수.
+        Returns:
+            k번째 이웃 거리의 95 percentile. 이보다 먼 이웃을 가진 포인트는 대부분 제거될 noise 이다.
+
+        """
+        rng: np.random.Generator = np.random.default_rng(0)
+        subset: np.ndarray = points[rng.choice(len(points), min(len(points), 100000), replace=False)]
+        queries: np.ndarray = subset[:samples]
+        nns = o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor(np.ascontiguousarray(subset, dtype=np.float64)))
+        nns.knn_index()
+        _, distances = nns.knn_search(o3d.core.Tensor(np.ascontiguousarray(queries, dtype=np.float64)), nb_neighbors)
+        return float(np.percentile(np.sqrt(distances.numpy()[:, -1]), 95))
+
+    def split_tiles(self, points: np.ndarray, tiles: List[int], halo: float) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """포인트들을 tiles 개수의 격자로 나누고, 타일마다 halo 영역을 포함한 포인트 인덱스를 구한다.
+
+        Args:
+            points : 전체 포인트.
+            tiles  : x, y, z 축별 타일 개수. 예) [4, 4, 1]
+            halo   : 타일 경계 밖으로 포함할 거리.
+        Returns:
+            (타일 + halo 포인트의 전체 인덱스, 그 중 타일 내부(core) 포인트인지 나타내는 bool 마스크) 목록.
+            모든 타일의 core 포인트를 합치면 전체 포인트가 정확히 한 번씩 포함된다.
+
+        """
+        lower: np.ndarray = points.min(axis=0)
+        size: np.ndarray = (points.max(axis=0) - lower) / np.asarray(tiles)
+        size[size == 0] = 1  # 한 축의 값이 모두 같은 경우
+        cell: np.ndarray = np.minimum(((points - lower) // size).astype(np.int64), np.asarray(tiles) - 1)
+
+        result: List[Tuple[np.ndarray, np.ndarray]] = []
+        for tile in np.ndindex(*tiles):
+            tile_lower: np.ndarray = lower + np.asarray(tile) * size
+            tile_upper: np.ndarray = tile_lower + size
+            inside: np.ndarray = np.all(cell == tile, axis=1)
+            region: np.ndarray = inside | np.all((points >= tile_lower - halo) & (points <= tile_upper + halo), axis=1)
+            index: np.ndarray = np.flatnonzero(region)
+            core: np.ndarray = inside[index]
+            if core.any():
+                result.append((index, core))
+        return result
+
+    def filter(
+            self,
+            pcd: o3d.geometry.PointCloud,
+            algorithm: str,
+            params: Dict[str, Any],
+            tiles: List[int],
+            workers: int,
+            halo: Optional[float] = None
+        ) -> np.ndarray:
+        """타일 단위로 outlier removal을 실행하고, 유지할 포인트 인덱스를 합쳐서 반환한다.
+
+        Args:
+            pcd       : 노이즈를 제거할 포인트 클라우드.
+            algorithm : 'statistical' 또는 'radius'.
+            params    : remove_noise와 같은 알고리즘 파라미터.
+            tiles     : x, y, z 축별 타일 개수.
+            workers   : 프로세스 풀 워커 개수. 1 이하이면 현재 프로세스에서 실행한다.
+            halo      : 타일 경계 밖으로 포함할 거리. None이면 'radius'는 radius, 'statistical'은 추정값을 사용한다.
+        Returns:
+            유지할 포인트의 정렬된 인덱스.
+        Raises:
+            ValueError: 'statistical', 'radius' 이외의 값이 전달된 경우.
+
+        """
+        points: np.ndarray = np.asarray(pcd.points)
+        if algorithm == 'statistical':
+            halo = self.estimate_halo(points, params['nb_neighbors']) if halo is None else halo
+        elif algorithm == 'radius':
+            halo = params['radius'] if halo is None else halo
+        else:
+            raise ValueError("Unknown noise removal algorithm")
+
+        tile_list: List[Tuple[np.ndarray, np.ndarray]] = self.split_tiles(points, tiles, halo)
+        overlap: float = sum(len(index) for index, _ in tile_list) / max(len(points), 1)
+        self.logger.info(f'Tiled noise removal: {len(tile_list)} tiles, halo {halo:.6f}, overlap {overlap:.2f}x')
+
+        if algorithm == 'statistical':
+            jobs = [(points[index], core, params['nb_neighbors']) for index, core in tile_list]
+            worker = _tile_statistical
+        else:
+            jobs = [(points[index], core, params['nb_points'], params['radius']) for index, core in tile_list]
+            worker = _tile_radius
+
+        if workers <= 1:
+            tile_results: List[np.ndarray] = [worker(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                tile_results = list(pool.map(worker, *zip(*jobs)))
+
+        core_index: np.ndarray = np.concatenate([index[core] for index, core in tile_list])
+        values: np.ndarray = np.concatenate(tile_results)
+
+        if algorithm == 'statistical':
+            # 기준값은 전체 클라우드의 평균 이웃 거리로 계산 (open3d와 같은 방식)
+            threshold: float = values.mean() + params['std_ratio'] * values.std(ddof=1)
+            keep: np.ndarray = values < threshold
+        else:
+            keep = values
+
+        return np.sort(core_index[keep])
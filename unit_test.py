@@ -1,11 +1,36 @@
 import unittest
+import unittest.mock
 import numpy as np
 import open3d as o3d
 import matplotlib.pyplot as plt
+from matplotlib.path import Path
 import os
+import io
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import yaml
+import logging
 from typing import Dict, Any, Tuple
 
 from data_processing import DataProcessing
+from rasterizer import Rasterizer, MapAccumulator, SparseMapAccumulator, MAP_TYPES
+from benchmark import legacy_depth_map, legacy_heat_map, make_synthetic_cloud, run_stage_benchmark, compare_results
+from batch_processor import BatchProcessor
+from logger import Logger
+from map_writer import MapWriter
+from worker_daemon import WorkerDaemon, send_jobs
+from app_config import AppConfig, ConfigError
+from frame_stream import FrameStream
+from voxel_downsampler import VoxelDownsampler
+from roi_filter import RoiFilter
+from job_queue import JobQueue, file_digest
+from projection import ProjectionEngine
 
 class TestDataProcessing(unittest.TestCase):
     def setUp(self):
@@ -45,12 +70,22 @@ class TestDataProcessing(unittest.TestCase):
         projection_vector = np.array([1, 0, 0])  # x축으로 투영
         
         point_cloud = o3d.geometry.PointCloud()
-        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(100, 3))
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(101, 3))
+        points = np.asarray(point_cloud.points)
         
         projected_points = self.dp.project_to_2d(point_cloud, projection_vector)
         
-        # 2D 형태 확인
-        self.assertEqual(projected_points.shape[1], 2)  
+        # 포인트마다 (u, v, depth): x 방향으로 보면 u = -y, v = z, depth = x
+        self.assertEqual(projected_points.shape, (101, 3))
+        np.testing.assert_allclose(projected_points, np.c_[-points[:, 1], points[:, 2], points[:, 0]], atol=1e-12)
+
+        # z 방향으로 보는 경우도 기저를 만들 수 있음
+        self.assertEqual(self.dp.project_to_2d(points, np.array([0, 0, 1])).shape, (101, 3))
+
+        # legacy: 투영 값을 2개씩 묶는 기존 방식 (홀수 개이면 마지막 포인트 제거)
+        legacy = self.dp.project_to_2d(point_cloud, projection_vector, legacy=True)
+        self.assertEqual(legacy.shape, (50, 2))
+        np.testing.assert_array_equal(legacy.ravel(), points[:100, 0])
 
     def test_create_depth_map(self):
         # 테스트할 param 생성
@@ -82,5 +117,834 @@ class TestDataProcessing(unittest.TestCase):
         heat_map_image = plt.imread(heat_map_path)
         self.assertEqual(heat_map_image.shape[:2], image_size)
 
+    def test_rasterizer_matches_loop(self):
+        # y 좌표가 음수, 범위 밖인 포인트까지 포함되도록 정규분포 사용
+        projected_points = np.random.normal(size=(5000, 2))
+        max_depth, min_depth = np.max(projected_points[:, 0]), np.min(projected_points[:, 0])
+        image_size = (60, 80)
+        rasterizer = Rasterizer(image_size)
+
+        depth_map_image = rasterizer.depth_map(projected_points, max_depth, min_depth)
+        heat_map_image = rasterizer.heat_map(projected_points, max_depth, min_depth)
+
+        # 기존 루프 결과와 비트 단위로 같은지 확인
+        expected_depth = legacy_depth_map(projected_points, max_depth, min_depth, image_size)
+        self.assertTrue(np.array_equal(depth_map_image.view(np.int32), expected_depth.view(np.int32)))
+        self.assertTrue(np.array_equal(heat_map_image, legacy_heat_map(projected_points, max_depth, min_depth, image_size)))
+
+    def test_create_maps(self):
+        # 테스트할 param 생성
+        projected_points = np.random.uniform(0.5, 1.0, size=(1000, 2))
+        map_paths = {
+            'depth_map': 'result/test_fused_depth_map.png',
+            'heat_map': 'result/test_fused_heat_map.png',
+            'density_map': 'result/test_density_map.png',
+            'min_depth_map': 'result/test_min_depth_map.png',
+            'max_depth_map': 'result/test_max_depth_map.png',
+            'std_map': 'result/test_std_map.png',
+        }
+        image_size = (20, 20)
+
+        maps = self.dp.create_maps(projected_points, map_paths, image_size)
+
+        # 이미지 파일이 저장되었는지 확인
+        for path in map_paths.values():
+            self.assertTrue(os.path.exists(path), f"{path} not saved.")
+
+        # 개별 맵과 같은 결과인지 확인
+        max_depth, min_depth = np.max(projected_points[:, 0]), np.min(projected_points[:, 0])
+        rasterizer = Rasterizer(image_size)
+        self.assertTrue(np.array_equal(maps['depth_map'], rasterizer.depth_map(projected_points, max_depth, min_depth)))
+        self.assertTrue(np.array_equal(maps['heat_map'], rasterizer.heat_map(projected_points, max_depth, min_depth)))
+
+        # 통계 맵 확인
+        occupied = maps['density_map'] > 0
+        self.assertEqual(maps['density_map'].sum(), len(projected_points))
+        self.assertTrue(np.all(maps['min_depth_map'][occupied] <= maps['depth_map'][occupied] + 1e-6))
+        self.assertTrue(np.all(maps['max_depth_map'][occupied] >= maps['depth_map'][occupied] - 1e-6))
+        self.assertTrue(np.all(maps['std_map'] >= 0))
+
+    def test_create_maps_unknown_map(self):
+        with self.assertRaises(ValueError):
+            self.dp.create_maps(np.random.rand(10, 2), {'unknown_map': 'result/unknown.png'})
+
+    def test_batch_processor(self):
+        # 정상 파일 2개와 깨진 파일 1개 생성
+        os.makedirs('data/test_batch', exist_ok=True)
+        for name in ('scan_a', 'scan_b'):
+            point_cloud = o3d.geometry.PointCloud()
+            point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(200, 3))
+            o3d.io.write_point_cloud(f'data/test_batch/{name}.pcd', point_cloud)
+        with open('data/test_batch/broken.pcd', 'w') as f:
+            f.write('not a point cloud')
+
+        config = {
+            'batch_settings': {'output_dir': 'result/test_batch', 'workers': 2},
+            '2Dfile_paths': {'depth_map': 'result/depth_map.png', 'heat_map': 'result/heat_map.png'},
+            'algorithm_settings': {
+                'noise_removal': {'algorithms': 'statistical', 'params': {'nb_neighbors': 20, 'std_ratio': 2.0}},
+                'projection_vector': [1, 0, 0],
+            },
+        }
+        paths = sorted(os.path.join('data/test_batch', f) for f in os.listdir('data/test_batch'))
+        summary = BatchProcessor(self.dp).run(paths, config)
+
+        # 깨진 파일만 실패하고 나머지는 파일별 이름으로 저장되었는지 확인
+        self.assertEqual(summary['files'], 3)
+        self.assertEqual(summary['failed'], 1)
+        self.assertTrue(os.path.exists('result/test_batch/scan_a_pcd_depth_map.png'))
+        self.assertTrue(os.path.exists('result/test_batch/scan_b_pcd_heat_map.png'))
+        self.assertGreater(summary['points_per_sec'], 0)
+
+        # 확장자나 디렉토리만 다른 같은 이름의 입력은 서로 다른 경로에 저장
+        processor = BatchProcessor(self.dp)
+        colliding = ['data/test_batch/scan_a.pcd', 'data/test_batch/scan_a.ply', 'data/test_batch/sub/scan_a.pcd']
+        outputs = [processor.output_paths(path, config['2Dfile_paths'], 'result/test_batch', colliding)['depth_map'] for path in colliding]
+        self.assertEqual(len(set(outputs)), 3)
+        self.assertEqual(outputs[1], 'result/test_batch/scan_a_ply_depth_map.png')
+        self.assertNotEqual(outputs[0], 'result/test_batch/scan_a_pcd_depth_map.png')
+
+    def test_load_points_memmap(self):
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(100, 3))
+        o3d.io.write_point_cloud('data/test_binary.pcd', point_cloud)
+        o3d.io.write_point_cloud('data/test_binary.ply', point_cloud)
+        o3d.io.write_point_cloud('data/test_ascii.pcd', point_cloud, write_ascii=True)
+
+        for path in ('data/test_binary.pcd', 'data/test_binary.ply'):
+            points = self.dp.load_points(path)
+            # memmap 위의 view인지 확인
+            self.assertIsInstance(points.base, np.memmap)
+            self.assertEqual(points.shape, (100, 3))
+            np.testing.assert_allclose(points, np.asarray(o3d.io.read_point_cloud(path).points), rtol=1e-6)
+
+        # ASCII 파일은 open3d로 읽음
+        points = self.dp.load_points('data/test_ascii.pcd')
+        self.assertNotIsInstance(points.base, np.memmap)
+        np.testing.assert_allclose(points, np.asarray(point_cloud.points), rtol=1e-6)
+
+        # 투영 단계에서 배열을 그대로 사용
+        projected_points = self.dp.project_to_2d(self.dp.load_points('data/test_binary.pcd'), np.array([1, 0, 0]))
+        self.assertEqual(projected_points.shape, (100, 3))
+
+    def test_create_maps_streaming(self):
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(1001, 3))
+        o3d.io.write_point_cloud('data/test_stream.pcd', point_cloud)
+        projection_vector = np.array([1, 0, 0])
+        map_names = ['depth_map', 'heat_map', 'density_map', 'min_depth_map', 'max_depth_map', 'std_map']
+
+        # 전체를 메모리에 올려 만든 맵
+        projected_points = self.dp.project_to_2d(self.dp.load_points('data/test_stream.pcd'), projection_vector)
+        expected = self.dp.create_maps(
+            projected_points, {name: f'result/test_full_{name}.png' for name in map_names}, (30, 30)
+        )
+
+        # chunk 단위로 만든 맵 (모든 chunk가 같은 이미지 범위를 사용)
+        maps = self.dp.create_maps_streaming(
+            'data/test_stream.pcd', projection_vector,
+            {name: f'result/test_stream_{name}.png' for name in map_names}, chunk_size=99, image_size=(30, 30)
+        )
+
+        for name in map_names:
+            if name == 'std_map':
+                np.testing.assert_allclose(maps[name], expected[name], atol=1e-6)
+            else:
+                self.assertTrue(np.array_equal(maps[name], expected[name]), name)
+
+    def test_remove_noise_tiled(self):
+        # 균일한 포인트 + 흩어진 noise 포인트
+        points = np.vstack([np.random.rand(3000, 3), np.random.uniform(-1, 2, size=(100, 3))])
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(points)
+        o3d.io.write_point_cloud('data/test_tiled.pcd', point_cloud)
+        tiling = {'use_tiling': True, 'tiles': [2, 2, 2], 'workers': 2}
+
+        # radius: halo가 radius이므로 한 번에 실행한 결과와 같아야 함
+        params = {'nb_points': 8, 'radius': 0.1}
+        expected = self.dp.remove_noise('data/test_tiled.pcd', 'radius', params)
+        result = self.dp.remove_noise('data/test_tiled.pcd', 'radius', params, tiling=tiling)
+        self.assertTrue(np.array_equal(np.asarray(result.points), np.asarray(expected.points)))
+
+        # statistical: 타일 경계 허용 오차(전체 포인트의 1%) 안에서 같아야 함
+        params = {'nb_neighbors': 20, 'std_ratio': 2.0}
+        expected = {tuple(p) for p in np.asarray(self.dp.remove_noise('data/test_tiled.pcd', 'statistical', params).points)}
+        result = {tuple(p) for p in np.asarray(self.dp.remove_noise('data/test_tiled.pcd', 'statistical', params, tiling=tiling).points)}
+        self.assertLessEqual(len(expected ^ result), len(points) * 0.01)
+
+    def test_remove_noise_cache(self):
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(500, 3))
+        o3d.io.write_point_cloud('data/test_cache.pcd', point_cloud)
+        params = {'nb_neighbors': 20, 'std_ratio': 1.0}
+        cache = {'use_cache': True, 'path': 'cache/test_noise', 'max_size_mb': 1}
+        for name in os.listdir(cache['path']) if os.path.isdir(cache['path']) else []:
+            os.remove(os.path.join(cache['path'], name))
+
+        # 첫 실행은 miss 후 저장, 두 번째 실행은 hit
+        expected = self.dp.remove_noise('data/test_cache.pcd', 'statistical', params, cache=cache)
+        self.assertEqual(len(os.listdir(cache['path'])), 1)
+        with self.assertLogs(self.dp.dm.cm.logger.logger, level='INFO') as logs:
+            result = self.dp.remove_noise('data/test_cache.pcd', 'statistical', params, cache=cache)
+        self.assertTrue(any('Noise cache hit' in line for line in logs.output))
+        self.assertTrue(np.array_equal(np.asarray(result.points), np.asarray(expected.points)))
+
+        # 파라미터가 바뀌면 다른 key
+        self.dp.remove_noise('data/test_cache.pcd', 'statistical', {'nb_neighbors': 10, 'std_ratio': 1.0}, cache=cache)
+        self.assertEqual(len(os.listdir(cache['path'])), 2)
+
+        # 타일 분할은 다른 key, 워커 개수만 바뀌면 같은 key
+        tiling = {'use_tiling': True, 'tiles': [2, 2, 1], 'workers': 1}
+        self.dp.remove_noise('data/test_cache.pcd', 'statistical', params, tiling=tiling, cache=cache)
+        self.assertEqual(len(os.listdir(cache['path'])), 3)
+        with self.assertLogs(self.dp.dm.cm.logger.logger, level='INFO') as logs:
+            self.dp.remove_noise('data/test_cache.pcd', 'statistical', params, tiling={**tiling, 'workers': 2}, cache=cache)
+        self.assertTrue(any('Noise cache hit' in line for line in logs.output))
+        self.assertEqual(len(os.listdir(cache['path'])), 3)
+
+        # 최대 크기를 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+        cache['max_size_mb'] = 2500 / (1024 * 1024)
+        self.dp.remove_noise('data/test_cache.pcd', 'statistical', {'nb_neighbors': 5, 'std_ratio': 1.0}, cache=cache)
+        self.assertLess(len(os.listdir(cache['path'])), 3)
+
+    def test_sweep_noise(self):
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.default_rng(0).random((1000, 3)))
+        o3d.io.write_point_cloud('data/test_sweep.pcd', point_cloud)
+        grids = {
+            'statistical': {'nb_neighbors': [5, 20], 'std_ratio': [1.0, 2.0]},
+            'radius': {'nb_points': [4, 8], 'radius': [0.05, 0.15]},
+        }
+
+        results = self.dp.sweep_noise(
+            'data/test_sweep.pcd', grids, np.array([1, 0, 0]), {'depth_map': 'result/test_sweep_depth_map.png'}
+        )
+        self.assertEqual(len(results), 8)
+
+        # 조합마다 remove_noise를 실행한 결과와 같은지 확인
+        for result in results:
+            expected = self.dp.remove_noise('data/test_sweep.pcd', result['algorithm'], result['params'])
+            self.assertEqual(result['kept'], len(expected.points), result)
+        self.assertTrue(os.path.exists('result/test_sweep_depth_map_statistical_nb_neighbors20_std_ratio2.0.png'))
+
+    def test_stage_benchmark(self):
+        for profile in ('uniform', 'clustered', 'surface'):
+            self.assertEqual(make_synthetic_cloud(1000, profile).shape, (1000, 3))
+
+        report = run_stage_benchmark([2000], ['uniform'], workdir='result/test_benchmark')
+        stages = {r['stage'] for r in report['results']}
+        self.assertEqual(stages, {'remove_noise', 'project_to_2d', 'create_depth_map', 'create_heat_map', 'save_image'})
+
+        # 같은 결과끼리는 regression 없음, 느려진 단계는 regression
+        self.assertEqual(compare_results(report, report), [])
+        slower = {'results': [dict(r, seconds=r['seconds'] * 2) if r['stage'] == 'remove_noise' else r
+                              for r in report['results']]}
+        regressions = compare_results(report, slower, threshold=0.2)
+        self.assertEqual([(r['stage'], r['metric']) for r in regressions], [('remove_noise', 'seconds')])
+
+    def test_logger_span_metrics(self):
+        if os.path.exists('result/test_metrics.jsonl'):
+            os.remove('result/test_metrics.jsonl')
+        logger = Logger('result/test_metrics.log', False, False, 'result/test_metrics.jsonl')
+        self.dp.dm.cm.logger = logger
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.random.rand(500, 3)))
+        projected_points = self.dp.project_to_2d(pcd, np.array([1, 0, 0]))
+        self.dp.create_maps(projected_points, {'depth_map': 'result/test_metrics_depth_map.png'})
+
+        def writer_span():
+            with logger.span('writer'):
+                np.ones(10)
+
+        with logger.span('outer') as span:
+            with logger.span('inner'):
+                data = np.ones(1000000)
+            # 다른 스레드의 span은 main 스레드 span의 메모리 측정을 바꾸지 않음
+            writer = threading.Thread(target=writer_span)
+            writer.start()
+            writer.join()
+            span['points'] = 10
+        summary = {row['stage']: row for row in logger.metrics_summary()}
+
+        with open('result/test_metrics.jsonl', encoding='UTF8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(
+            [r['stage'] for r in records[:-1]],
+            ['project_to_2d', 'save_image', 'create_maps', 'inner', 'writer', 'outer']
+        )
+        self.assertIsNone(records[4]['peak_bytes'])
+        self.assertEqual(records[-1]['type'], 'summary')
+        self.assertEqual(records[0]['points'], 500)
+        # 바깥 span의 최대 메모리에는 안쪽 span의 할당량이 포함됨
+        self.assertGreaterEqual(summary['outer']['peak_bytes'], data.nbytes)
+        self.assertGreaterEqual(summary['inner']['peak_bytes'], data.nbytes)
+        self.assertIsNotNone(summary['outer']['points_per_sec'])
+
+        # metrics_path가 없으면 기록하지 않음
+        with Logger('result/test_metrics.log', False, False).span('noop') as span:
+            pass
+        self.assertNotIn('wall_sec', span)
+
+    def test_map_writer_formats(self):
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.random.rand(2000, 3)))
+        projected_points = self.dp.project_to_2d(pcd, np.array([1, 0, 0]))
+        map_paths = {
+            'depth_map': 'result/test_writer_depth_map.npy',
+            'min_depth_map': 'result/test_writer_min_depth_map.npz',
+            'max_depth_map': 'result/test_writer_max_depth_map.raw',
+            'std_map': 'result/test_writer_std_map.16.png',
+            'density_map': 'result/test_writer_density_map.16.png',
+            'heat_map': 'result/test_writer_heat_map.16.png',
+        }
+        maps = self.dp.create_maps(projected_points, map_paths)
+        writer = MapWriter(self.dp.dm.cm.logger)
+
+        for name in ('depth_map', 'min_depth_map', 'max_depth_map', 'density_map', 'heat_map'):
+            np.testing.assert_array_equal(writer.read(map_paths[name]), maps[name], name)
+
+        # 16-bit PNG는 값 범위의 1/65535 이내로 복원됨
+        std_map = writer.read(map_paths['std_map'])
+        self.assertLessEqual(np.abs(std_map - maps['std_map']).max(), maps['std_map'].max() / 65535)
+        with open(map_paths['std_map'], 'rb') as file:
+            self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+        self.assertEqual(plt.imread(map_paths['heat_map']).shape, (100, 100, 3))
+
+        with self.assertRaises(ValueError):
+            writer.read('result/test_writer_preview.png')
+
+    def test_write_queue(self):
+        maps = {'depth_map': np.random.rand(50, 50).astype(np.float32), 'density_map': np.ones((50, 50), np.float32)}
+        bad = np.full((50, 50), np.nan, dtype=np.float32)
+
+        # max_pending 1: 앞의 저장이 끝날 때까지 다음 save_image가 기다림
+        self.dp.dm.start_write_queue(workers=1, max_pending=1)
+        for name, image in maps.items():
+            self.dp.dm.save_image(image, f'result/test_queue_{name}.npy', map_type=name)
+        self.dp.dm.save_image(bad, 'result/test_queue_bad.16.png', map_type='bad')
+        failed = self.dp.dm.close_write_queue()
+
+        self.assertEqual(failed, ['result/test_queue_bad.16.png'])
+        self.assertIsNone(self.dp.dm.write_queue)
+        for name, image in maps.items():
+            np.testing.assert_array_equal(np.load(f'result/test_queue_{name}.npy'), image)
+
+        # 여러 저장 스레드가 아직 없는 디렉토리를 동시에 만들어도 실패하지 않음
+        makedirs = os.makedirs
+
+        def slow_makedirs(*args, **kwargs):
+            time.sleep(0.05)  # 모든 스레드가 디렉토리가 없다고 확인한 뒤에 만들도록
+            makedirs(*args, **kwargs)
+
+        with unittest.mock.patch('os.makedirs', side_effect=slow_makedirs):
+            self.dp.dm.start_write_queue(workers=4, max_pending=8)
+            for i in range(8):
+                self.dp.dm.save_image(maps['depth_map'], f'result/test_queue_new/{i}.npy', map_type='depth')
+            self.assertEqual(self.dp.dm.close_write_queue(), [])
+        self.assertEqual(len(os.listdir('result/test_queue_new')), 8)
+
+        # 배치 워커 프로세스의 큐는 프로세스 종료 시 모두 저장됨
+        os.makedirs('data/test_queue', exist_ok=True)
+        for name in ('scan_a', 'scan_b'):
+            point_cloud = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.random.rand(200, 3)))
+            o3d.io.write_point_cloud(f'data/test_queue/{name}.pcd', point_cloud)
+        config = {
+            'batch_settings': {'output_dir': 'result/test_queue', 'workers': 2},
+            'write_queue': {'use_queue': True, 'workers': 1, 'max_pending': 2},
+            '2Dfile_paths': {'depth_map': 'result/depth_map.npy'},
+            'algorithm_settings': {
+                'noise_removal': {'algorithms': 'none', 'params': {}},
+                'projection_vector': [1, 0, 0],
+            },
+        }
+        summary = BatchProcessor(self.dp).run(['data/test_queue/scan_a.pcd', 'data/test_queue/scan_b.pcd'], config)
+        self.assertEqual(summary['failed'], 0)
+        self.assertTrue(os.path.exists('result/test_queue/scan_a_pcd_depth_map.npy'))
+        self.assertTrue(os.path.exists('result/test_queue/scan_b_pcd_depth_map.npy'))
+
+    def test_worker_daemon(self):
+        point_cloud = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.random.rand(500, 3)))
+        o3d.io.write_point_cloud('data/test_daemon.pcd', point_cloud)
+        daemon = WorkerDaemon(self.dp)
+        jobs = [
+            {'id': 1, 'input': 'data/test_daemon.pcd', 'algorithm': 'radius', 'params': {'nb_points': 2, 'radius': 0.2},
+             'outputs': {'depth_map': 'result/test_daemon_depth_map.npy'}},
+            {'id': 2, 'input': 'data/missing.pcd', 'algorithm': 'none', 'outputs': {'depth_map': 'result/test_daemon.npy'}},
+        ]
+
+        # stdin JSON lines: 잘못된 줄과 실패한 작업이 있어도 계속 처리하고, shutdown에서 멈춤
+        lines = [json.dumps(job) for job in jobs] + ['not json', '[1]', '"x"', json.dumps({'command': 'shutdown'}), json.dumps(jobs[0])]
+        output = io.StringIO()
+        self.assertTrue(daemon.serve_stream(io.StringIO('\n'.join(lines) + '\n'), output))
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([r['ok'] for r in responses], [True, False, False, False, False])
+        self.assertEqual(responses[0]['outputs'], jobs[0]['outputs'])
+        self.assertEqual(set(responses[0]['timings']), {'load_cloud', 'project_to_2d', 'create_maps'})
+        self.assertTrue(os.path.exists('result/test_daemon_depth_map.npy'))
+
+        # outputs가 없으면 입력 파일별 경로에 저장
+        with unittest.mock.patch.dict(daemon.config, {'2Dfile_paths': {'depth_map': 'result/test_daemon_default/depth_map.npy'}}):
+            default = daemon.run_job({'input': 'data/test_daemon.pcd', 'algorithm': 'none'})
+        self.assertTrue(default['ok'])
+        self.assertNotEqual(default['outputs']['depth_map'], 'result/test_daemon_default/depth_map.npy')
+        self.assertTrue(os.path.basename(default['outputs']['depth_map']).startswith('test_daemon_pcd_'))
+        self.assertTrue(os.path.exists(default['outputs']['depth_map']))
+
+        # Unix 소켓
+        socket_path = os.path.abspath('result/test_daemon.sock')
+        os.makedirs('result', exist_ok=True)
+        server = threading.Thread(target=daemon.serve_socket, args=(socket_path,))
+        server.start()
+        for _ in range(100):  # 소켓 생성 대기
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        # 응답을 받기 전에 끊은 연결, UTF-8이 아닌 줄이 있어도 daemon은 계속 연결을 받음
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall((json.dumps(jobs[0]) + '\n').encode())
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b'\xff\xfe\n' + json.dumps({'command': 'ping'}).encode() + b'\n')
+            with client.makefile('r', encoding='UTF8') as reader:
+                self.assertEqual([json.loads(reader.readline())['ok'] for _ in range(2)], [False, True])
+        responses = send_jobs(socket_path, jobs[:1], shutdown=True)
+        server.join(timeout=30)
+        self.assertTrue(responses[0]['ok'])
+        self.assertGreater(responses[0]['points'], 0)
+        self.assertFalse(server.is_alive())
+
+    def test_app_config(self):
+        with open('config/image.yaml', encoding='UTF8') as file:
+            config = yaml.safe_load(file)
+        os.makedirs('result', exist_ok=True)
+        path = 'result/test_config.yaml'
+
+        def write(data, mtime):
+            with open(path, 'w', encoding='UTF8') as file:
+                yaml.safe_dump(data, file)
+            os.utime(path, ns=(mtime, mtime))
+
+        write(config, 1_000_000_000)
+        app_config = AppConfig(path)
+        self.assertEqual(app_config.algorithm, config['algorithm_settings']['noise_removal']['algorithms'])
+        self.assertFalse(app_config.reload_if_changed())  # mtime이 같으면 다시 읽지 않음
+
+        # 문제는 한 번에 모두 보고됨
+        bad = yaml.safe_load(yaml.safe_dump(config))
+        bad['algorithm_settings']['noise_removal'] = {'algorithms': 'radius', 'params': {'nb_points': 16}}
+        bad['algorithm_settings']['projection_vector'] = [0, 0, 0]
+        bad['2Dfile_paths']['edge_map'] = 'result/edge_map.png'
+        del bad['log_settings']['use_print']
+        write(bad, 2_000_000_000)
+        with self.assertRaises(ConfigError) as context:
+            app_config.reload_if_changed()
+        self.assertEqual(len(context.exception.errors), 4)
+        self.assertIn("'radius' needs 'algorithm_settings.noise_removal.params.radius'", context.exception.errors)
+        self.assertEqual(app_config.data, config)  # 검증 실패 시 기존 값 유지
+
+        changed = yaml.safe_load(yaml.safe_dump(config))
+        changed['algorithm_settings']['noise_removal'] = {'algorithms': 'radius', 'params': {'nb_points': 4, 'radius': 0.1}}
+        write(changed, 3_000_000_000)
+        self.assertTrue(app_config.reload_if_changed())
+        self.assertEqual(app_config.params, {'nb_points': 4, 'radius': 0.1})
+
+    def test_frame_stream(self):
+        rng = np.random.default_rng(0)
+        frames = [rng.random((400, 3)) for _ in range(6)]
+        projected = [self.dp._project(frame, np.array([1, 0, 0])) for frame in frames]
+        bounds = (-1.0, 0.0, 0.0, 1.0)  # x 방향으로 보면 u = -y, v = z
+
+        # window: 최근 3개 프레임을 처음부터 래스터화한 결과와 같음
+        stream = FrameStream((50, 50), ['depth_map', 'density_map'], window=3, bounds=bounds)
+        for points in projected:
+            stream.add(points)
+        expected = Rasterizer((50, 50)).rasterize(np.concatenate(projected[-3:]), 0, 0, ['depth_map', 'density_map'], bounds)
+        maps = stream.maps()
+        np.testing.assert_allclose(maps['depth_map'], expected['depth_map'], rtol=1e-5)
+        np.testing.assert_array_equal(maps['density_map'], expected['density_map'])
+
+        # decay: 프레임 t의 가중치는 decay^(마지막 프레임 - t)
+        stream = FrameStream((50, 50), ['depth_map', 'density_map'], decay=0.5, min_weight=0, bounds=bounds)
+        rasterizer = Rasterizer((50, 50))
+        weighted_sum, weight = np.zeros(2500), np.zeros(2500)
+        for t, points in enumerate(projected):
+            stream.add(points)
+            index, valid = rasterizer.compute_indices(points, 0, 0, bounds)
+            w = 0.5 ** (len(projected) - 1 - t)
+            weighted_sum += np.bincount(index, weights=points[valid, 2] * w, minlength=2500)
+            weight += np.bincount(index, minlength=2500) * w
+        maps = stream.maps()
+        np.testing.assert_allclose(maps['density_map'].ravel(), weight, rtol=1e-6)
+        occupied = weight > 0
+        np.testing.assert_allclose(maps['depth_map'].ravel()[occupied], weighted_sum[occupied] / weight[occupied], rtol=1e-5)
+
+        with self.assertRaises(ValueError):
+            FrameStream((50, 50), ['std_map'])
+
+        # emit_every 간격으로 프레임 번호가 붙은 경로에 저장
+        emitted = self.dp.create_maps_from_frames(
+            frames, np.array([1, 0, 0]), {'depth_map': 'result/test_frames_depth_map.npy'}, window=3, emit_every=2
+        )
+        self.assertEqual(emitted, [2, 4, 6])
+        self.assertTrue(os.path.exists('result/test_frames_depth_map_000006.npy'))
+
+    def test_map_pyramid(self):
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.random.default_rng(0).random((5000, 3))))
+        projected_points = self.dp.project_to_2d(pcd, np.array([1, 0, 0]))
+        map_paths = {'depth_map': 'result/test_pyramid/depth_map.npy', 'min_depth_map': 'result/test_pyramid/min_depth_map.npy'}
+        pyramid = self.dp.create_map_pyramid(projected_points, map_paths, image_size=(64, 60), min_size=8, tile_size=16)
+        self.assertEqual([level.image_size for level in pyramid.levels], [(64, 60), (32, 30), (16, 15), (8, 8)])
+
+        # level 2의 픽셀은 level 0의 4x4 블록 안의 포인트로 계산한 값과 같음
+        index, valid = Rasterizer((64, 60)).compute_indices(projected_points, 0, 0)
+        coarse = (index // 60 // 4) * 15 + (index % 60 // 4)
+        depths = projected_points[valid, 2]
+        count = np.bincount(coarse, minlength=240)
+        expected_depth = np.zeros(240)
+        expected_depth[count > 0] = (np.bincount(coarse, weights=depths, minlength=240) / np.maximum(count, 1))[count > 0]
+        expected_min = np.full(240, np.inf)
+        np.minimum.at(expected_min, coarse, depths)
+        maps = pyramid.level_maps(2)
+        np.testing.assert_allclose(maps['depth_map'].ravel(), expected_depth, rtol=1e-5)
+        np.testing.assert_array_equal(maps['min_depth_map'].ravel(), np.where(count > 0, expected_min, 0).astype(np.float32))
+
+        # 타일 저장과 pyramid.json
+        with open('result/test_pyramid/depth_map/pyramid.json', encoding='UTF8') as file:
+            manifest = json.load(file)
+        self.assertEqual([(level['rows'], level['cols']) for level in manifest['levels']], [(4, 4), (2, 2), (1, 1), (1, 1)])
+        tile = np.load('result/test_pyramid/depth_map/L0/3_3.npy')
+        self.assertEqual(tile.shape, (16, 12))
+        np.testing.assert_array_equal(tile, pyramid.level_maps(0)['depth_map'][48:, 48:])
+
+    def test_project_views(self):
+        points = np.random.default_rng(0).random((2000, 3))
+        camera = {'name': 'camera', 'type': 'pinhole', 'position': [0.5, 0.5, 1.5], 'direction': [0, 0, -1], 'up': [0, 1, 0], 'fov': 40}
+        views = self.dp.project_views(points, ['top', 'front', camera])
+
+        # orthographic: top은 (x, y, -z), front는 (x, z, y)
+        np.testing.assert_allclose(views['top'], points * [1, 1, -1], atol=1e-12)
+        np.testing.assert_allclose(views['front'], points[:, [0, 2, 1]], atol=1e-12)
+        # pinhole: 카메라 좌표 (x, y, z)를 depth로 나눈 이미지 평면 좌표
+        depth = 1.5 - points[:, 2]
+        expected = np.column_stack([(points[:, 0] - 0.5) / depth, (points[:, 1] - 0.5) / depth, depth])
+        np.testing.assert_allclose(views['camera'], expected, atol=1e-12)
+
+        map_paths = {'density_map': 'result/test_views/density_map.npy', 'depth_map': 'result/test_views/depth_map.npy'}
+        maps = self.dp.create_view_maps(points, ['top', camera], map_paths, image_size=(32, 32))
+        self.assertEqual(maps['top']['density_map'].sum(), len(points))
+        # pinhole view는 시야각 밖의 포인트를 버림
+        self.assertLess(maps['camera']['density_map'].sum(), len(points))
+        np.testing.assert_array_equal(np.load('result/test_views/depth_map_top.npy'), maps['top']['depth_map'])
+        self.assertTrue(os.path.exists('result/test_views/density_map_camera.npy'))
+        with self.assertRaises(ValueError):
+            self.dp.project_views(points, ['diagonal'])
+
+    def test_low_memory_maps(self):
+        points = np.random.default_rng(0).random((20001, 3))
+        map_paths = {'depth_map': 'result/test_low_memory/depth_map.npy', 'density_map': 'result/test_low_memory/density_map.npy'}
+        vector = np.array([1, 0, 0])
+
+        single = self.dp.create_maps_low_memory(points, vector, map_paths, max_memory_mb=64, image_size=(32, 32))
+        # 메모리에 있는 입력 배열은 예산에 포함되고, 파일 경로는 memmap chunk로 읽으므로 포함되지 않음
+        with self.assertRaises(ValueError):
+            self.dp.create_maps_low_memory(points, vector, map_paths, max_memory_mb=0.1, image_size=(32, 32))
+        o3d.io.write_point_cloud('data/test_low_memory.pcd', o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points)))
+        chunked = self.dp.create_maps_low_memory('data/test_low_memory.pcd', vector, map_paths, max_memory_mb=0.1, image_size=(32, 32))
+        # chunk로 나누어도 같은 float32 연산, 같은 누적 순서
+        np.testing.assert_array_equal(single['depth_map'], chunked['depth_map'])
+        np.testing.assert_array_equal(single['density_map'], chunked['density_map'])
+
+        # float64 기본 모드와는 경계 픽셀만 다름
+        reference = self.dp.create_maps(self.dp.project_to_2d(points, vector), map_paths, image_size=(32, 32))
+        self.assertEqual(single['density_map'].sum(), reference['density_map'].sum())
+        self.assertLess(np.abs(single['density_map'] - reference['density_map']).sum(), len(points) * 0.01)
+        np.testing.assert_allclose(single['depth_map'], reference['depth_map'], atol=0.05)
+
+        with self.assertRaises(ValueError):
+            self.dp.create_maps_low_memory(points, vector, map_paths, max_memory_mb=0.01, image_size=(1000, 1000))
+        self.assertGreater(self.dp.dm.cm.logger.peak_rss_mb(), 0)
+
+    def test_logger_queue_setup(self):
+        # 같은 경로로 여러 번 생성해도 핸들러는 한 번만 추가됨
+        loggers = [Logger('result/test_queue.log', True, False, rate_limit=5) for _ in range(3)]
+        self.assertEqual(len(loggers[0].logger.handlers), 1)
+
+        class Caller:
+            def check(self, cm_logger):
+                cm_logger.log_caller(logging.ERROR, 'Missing %s', 'file', depth=1)
+
+        # 큐에 들어가는 레코드에는 frame 대신 호출 위치 문자열만 담김
+        records = []
+        capture = logging.Handler()
+        capture.emit = records.append
+        loggers[2].logger.addHandler(capture)
+        self.addCleanup(loggers[2].logger.removeHandler, capture)
+        self.assertFalse(loggers[0].logger.propagate)
+
+        for i in range(20):
+            loggers[1].info('hot path %s', args=(i,))  # 같은 템플릿은 1초에 5개까지만 기록
+        loggers[1].warning('Positional name', "[Caller] ")
+        loggers[1].warning('Keyword name %s', name="[Caller] ", args=('arg',))
+        Caller().check(loggers[2])
+        loggers[0].flush()
+        with open('result/test_queue.log', encoding='UTF8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(sum('hot path' in line for line in lines), 5)
+        self.assertTrue(lines[-3].endswith('[WARNING] [Caller] Positional name'))
+        self.assertTrue(lines[-2].endswith('[WARNING] [Caller] Keyword name arg'))
+        self.assertTrue(lines[-1].endswith('[ERROR] [Caller] [check] Missing file'))
+        self.assertEqual(records[-1].caller_context, '[Caller] [check] ')
+        self.assertFalse(any(isinstance(value, types.FrameType) for value in vars(records[-1]).values()))
+
+    def test_voxel_downsample(self):
+        points = np.random.default_rng(0).random((20000, 3))
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(points)
+        o3d.io.write_point_cloud('data/test_voxel.pcd', point_cloud)
+        downsampler = VoxelDownsampler(self.dp.dm.cm.logger)
+
+        # voxel 개수는 open3d 다운샘플링 결과 포인트 개수와 같음
+        self.assertEqual(downsampler.count_voxels(points, 0.07), len(point_cloud.voxel_down_sample(0.07).points))
+
+        # 목표 포인트 개수의 허용 오차 안으로 voxel 크기를 찾음
+        result, voxel_size = downsampler.downsample(point_cloud, target_points=5000)
+        self.assertGreater(voxel_size, 0)
+        self.assertLessEqual(abs(len(result.points) - 5000), 5000 * 0.05)
+
+        params = {'nb_neighbors': 20, 'std_ratio': 2.0}
+        full = self.dp.remove_noise('data/test_voxel.pcd', 'statistical', params)
+        reduced = self.dp.remove_noise('data/test_voxel.pcd', 'statistical', params, voxel={'use_voxel': True, 'voxel_size': 0.07})
+        self.assertLess(len(reduced.points), len(full.points))
+
+        # 다른 알고리즘의 파라미터가 섞여 있어도 time_budget 측정 필터와 캐시 key에는 선택한 알고리즘 파라미터만 사용
+        mixed = {**params, 'nb_points': 16, 'radius': 0.05}
+        self.assertGreater(len(self.dp.remove_noise('data/test_voxel.pcd', 'statistical', mixed, voxel={'use_voxel': True, 'time_budget': 0.01}).points), 0)
+
+        # time_budget 모드도 캐시 key는 설정으로 만들므로 두 번째 실행은 시간 측정, 다운샘플링 없이 캐시를 사용
+        cache = {'use_cache': True, 'path': 'result/test_voxel_cache', 'max_size_mb': 16}
+        budget = {'use_voxel': True, 'time_budget': 0.01}
+        first = self.dp.remove_noise('data/test_voxel.pcd', 'statistical', params, cache=cache, voxel=budget)
+        with unittest.mock.patch.object(VoxelDownsampler, 'downsample') as downsample:
+            second = self.dp.remove_noise('data/test_voxel.pcd', 'statistical', mixed, cache=cache, voxel=budget)
+        downsample.assert_not_called()
+        np.testing.assert_array_equal(np.asarray(second.points), np.asarray(first.points))
+
+        with self.assertRaises(ValueError):
+            downsampler.downsample(point_cloud)
+
+    def test_array_api(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pcd_path, map_dir = os.path.join(directory.name, 'test_array.pcd'), os.path.join(directory.name, 'maps')
+        points = np.random.default_rng(1).random((5000, 3)).astype(np.float32).astype(np.float64)  # PCD 파일과 같은 정밀도
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(points)
+        o3d.io.write_point_cloud(pcd_path, point_cloud)
+        vector = np.array([1, 0, 0])
+        params = {'nb_neighbors': 20, 'std_ratio': 2.0}
+
+        # 포인트 클라우드 입력은 open3d 메모리를 공유하는 view로 읽음
+        self.assertTrue(np.shares_memory(self.dp.to_points(point_cloud), np.asarray(point_cloud.points)))
+        self.assertIs(self.dp.to_points(points), points)
+
+        # 배열, 포인트 클라우드 입력의 노이즈 제거 결과는 파일 입력과 같음
+        expected = np.asarray(self.dp.remove_noise(pcd_path, 'statistical', params).points)
+        for source in (points, point_cloud):
+            np.testing.assert_array_equal(np.asarray(self.dp.remove_noise(source, 'statistical', params).points), expected)
+
+        # 파일을 쓰지 않고 맵 배열을 반환
+        maps = self.dp.process(points, vector, ['depth_map', 'density_map'], algorithm='statistical', params=params)
+        self.assertFalse(os.path.exists(map_dir))
+        reference = self.dp.create_maps(self.dp.project_to_2d(expected, vector), {'depth_map': None, 'density_map': None})
+        for name in ('depth_map', 'density_map'):
+            np.testing.assert_array_equal(maps[name], reference[name])
+        np.testing.assert_array_equal(self.dp.create_depth_map(self.dp.project_to_2d(expected, vector)), maps['depth_map'])
+
+        # 저장은 선택한 맵만 마지막 단계에서
+        self.dp.process(points, vector, ['depth_map', 'density_map'], map_paths={'depth_map': os.path.join(map_dir, 'depth_map.npy')})
+        self.assertEqual(os.listdir(map_dir), ['depth_map.npy'])
+
+        with self.assertRaises(ValueError):
+            self.dp.process(points[:, :2], vector)
+
+    def test_roi_crop(self):
+        points = np.random.default_rng(2).random((20000, 3))
+        points = points[np.argsort(points[:, 0])].astype(np.float32).astype(np.float64)  # x 순서로 저장된 스캔
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(points)
+        o3d.io.write_point_cloud('data/test_roi.pcd', point_cloud)
+
+        # box: chunk 단위로 읽은 결과와 배열 mask 결과가 같고, chunk마다 mask 한 번으로 판정
+        box = {'type': 'box', 'min': [0.2, 0.2, 0.2], 'max': [0.4, 0.8, 0.8], 'chunk_size': 1000}
+        expected = points[np.all((points >= 0.2) & (points <= [0.4, 0.8, 0.8]), axis=1)]
+        with unittest.mock.patch.object(RoiFilter, 'mask', autospec=True, side_effect=RoiFilter.mask) as mask:
+            np.testing.assert_array_equal(self.dp.crop_points('data/test_roi.pcd', box), expected)
+        self.assertEqual(mask.call_count, 20)
+        np.testing.assert_array_equal(self.dp.crop_points(points, box), expected)
+
+        # oriented box: z축 45도 회전된 상자
+        c = np.sqrt(0.5)
+        oriented = {'type': 'oriented_box', 'center': [0.5, 0.5, 0.5], 'extent': [0.6, 0.2, 1.0], 'rotation': [[c, -c, 0], [c, c, 0], [0, 0, 1]]}
+        local = (points - 0.5) @ np.array(oriented['rotation'])
+        expected = points[np.all(np.abs(local) <= [0.3, 0.1, 0.5], axis=1)]
+        np.testing.assert_array_equal(self.dp.crop_points('data/test_roi.pcd', oriented), expected)
+
+        # polygon prism
+        polygon = {'type': 'polygon', 'polygon': [[0.1, 0.1], [0.9, 0.2], [0.3, 0.8]], 'z_range': [0.0, 0.5]}
+        inside = Path(polygon['polygon']).contains_points(points[:, :2]) & (points[:, 2] <= 0.5)
+        self.assertLessEqual(abs(len(self.dp.crop_points(points, polygon)) - inside.sum()), 1)  # 경계 위 포인트 처리 차이
+
+        # 노이즈 제거 전에 잘라냄
+        box['use_roi'] = True
+        cleaned = self.dp.remove_noise('data/test_roi.pcd', 'statistical', {'nb_neighbors': 20, 'std_ratio': 2.0}, roi=box)
+        self.assertTrue(np.all(np.asarray(cleaned.points) <= [0.4, 0.8, 0.8]))
+
+        with self.assertRaises(ValueError):
+            self.dp.crop_points(points, {'type': 'sphere'})
+
+    def test_job_queue(self):
+        os.makedirs('data/test_jobs', exist_ok=True)
+        for name in ('scan_a', 'scan_b', 'scan_c'):
+            point_cloud = o3d.geometry.PointCloud()
+            point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(200, 3))
+            o3d.io.write_point_cloud(f'data/test_jobs/{name}.pcd', point_cloud)
+        with open('data/test_jobs/broken.pcd', 'w') as f:
+            f.write('not a point cloud')
+        paths = sorted(os.path.join('data/test_jobs', f) for f in os.listdir('data/test_jobs'))
+        logger = self.dp.dm.cm.logger
+
+        # 두 연결이 동시에 가져가도 작업마다 한 번씩만 가져감
+        queue = JobQueue('result/test_claim.sqlite', logger, max_attempts=2, backoff=0)
+        queue.add([(path, {}) for path in paths], 'config')
+        claimed = []
+
+        def claim_all():
+            worker = JobQueue('result/test_claim.sqlite', logger)
+            claimed.extend(job['input'] for job in iter(worker.claim, None))
+            worker.close()
+
+        threads = [threading.Thread(target=claim_all) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), paths)
+
+        # 실패하면 backoff 뒤에 다시 가져가고, max_attempts번 실패하면 failed
+        self.assertEqual(queue.fail(paths[0], 'error', 0.1), 'pending')
+        self.assertEqual(queue.claim()['attempts'], 2)
+        self.assertEqual(queue.fail(paths[0], 'error', 0.1), 'failed')
+
+        # 다른 워커가 가진 작업은 기록하지 않고, pid가 없어진 워커의 작업은 lease 전이라도 다시 가져감
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        queue.connection.execute('UPDATE jobs SET worker = ? WHERE input = ?', (f'{socket.gethostname()}:{process.pid}', paths[1]))
+        self.assertFalse(queue.complete(paths[1], 200, 0.1))
+        self.assertIsNone(queue.fail(paths[1], 'error', 0.1))
+        self.assertEqual(queue.heartbeat(), 2)
+        self.assertEqual(queue.claim()['input'], paths[1])
+        self.assertTrue(queue.complete(paths[1], 200, 0.1))
+        self.assertEqual(queue.connection.execute('SELECT input_hash FROM jobs WHERE input = ?', (paths[1],)).fetchone()[0], file_digest(paths[1]))
+        self.assertIsNotNone(queue.next_retry())  # 아직 running 작업이 있음
+        queue.close()
+
+        config = {
+            'batch_settings': {
+                'output_dir': 'result/test_jobs', 'workers': 2,
+                'job_queue': {'use_job_queue': True, 'path': 'result/test_jobs/jobs.sqlite', 'max_attempts': 2, 'backoff': 0.01},
+            },
+            '2Dfile_paths': {'depth_map': 'result/depth_map.npy'},
+            'algorithm_settings': {
+                'noise_removal': {'algorithms': 'statistical', 'params': {'nb_neighbors': 20, 'std_ratio': 2.0}},
+                'projection_vector': [1, 0, 0],
+            },
+        }
+        summary = BatchProcessor(self.dp).run(paths, config)
+        self.assertEqual(summary['queue'], {'pending': 0, 'running': 0, 'done': 3, 'failed': 1})
+        self.assertEqual(summary['failed'], 1)
+
+        # 다시 실행하면 끝나지 않은 파일(실패한 파일)만 처리
+        summary = BatchProcessor(self.dp).run(paths, config)
+        self.assertEqual([r['path'] for r in summary['results']], ['data/test_jobs/broken.pcd'])
+
+        # 입력 파일 내용이나 설정이 바뀌면 다시 처리
+        point_cloud.points = o3d.utility.Vector3dVector(np.random.rand(200, 3))
+        o3d.io.write_point_cloud('data/test_jobs/scan_c.pcd', point_cloud)
+        summary = BatchProcessor(self.dp).run(paths, config)
+        self.assertEqual(sorted(r['path'] for r in summary['results']), ['data/test_jobs/broken.pcd', 'data/test_jobs/scan_c.pcd'])
+        config['algorithm_settings']['projection_vector'] = [0, 1, 0]
+        summary = BatchProcessor(self.dp).run(paths, config)
+        self.assertEqual(summary['files'], 4)
+
+    def test_zbuffer_map(self):
+        # 같은 xy 격자 위의 두 면 (z=0, z=1): 위에서 보면 z=1 면만 보여야 함
+        grid = np.stack(np.meshgrid(np.linspace(0, 1, 40), np.linspace(0, 1, 40)), axis=-1).reshape(-1, 2)
+        points = np.vstack([np.c_[grid, np.zeros(len(grid))], np.c_[grid, np.ones(len(grid))]])
+        projected = ProjectionEngine(['top']).project(points)['top']
+        rasterizer = Rasterizer((20, 20))
+        depth, index = rasterizer.z_buffer_view(projected)
+        average = rasterizer.rasterize_view(projected, ['depth_map'])['depth_map']
+        self.assertTrue(np.all(depth == -1))  # top view depth = -z
+        self.assertTrue(np.all(average == -0.5))  # 평균은 뒤쪽 면이 섞임
+        self.assertTrue(np.all(points[index.ravel(), 2] == 1))
+
+        # 가장 먼 포인트, 포인트 순서와 관계없는 결과
+        farthest, _ = rasterizer.z_buffer_view(projected, nearest=False)
+        self.assertTrue(np.all(farthest == 0))
+        order = np.random.default_rng(3).permutation(len(projected))
+        shuffled, shuffled_index = rasterizer.z_buffer_view(projected[order])
+        np.testing.assert_array_equal(shuffled, depth)
+        self.assertTrue(np.all(points[order[shuffled_index.ravel()], 2] == 1))
+
+        # 기존 투영: 이긴 포인트 인덱스로 클라우드를 다시 찾을 수 있음
+        cloud = np.random.default_rng(4).random((5001, 3))
+        vector = np.array([1, 0, 0])
+        projected_points = self.dp.project_to_2d(cloud, vector)
+        depth, index = self.dp.create_zbuffer_map(projected_points, 'result/test_zbuffer.npy', index_path='result/test_zbuffer_index.npy')
+        hit = index >= 0
+        np.testing.assert_array_equal(depth[hit], (cloud[index[hit]] @ vector).astype(np.float32))
+        np.testing.assert_array_equal(depth, self.dp.create_maps(projected_points, {'min_depth_map': None})['min_depth_map'])
+        np.testing.assert_array_equal(np.load('result/test_zbuffer_index.npy'), index)
+        with self.assertRaises(ValueError):  # 이미지 형식은 인덱스 값을 잃음
+            self.dp.create_zbuffer_map(projected_points, index_path='result/test_zbuffer_index.16.png')
+
+    def test_sparse_accumulator(self):
+        # 두 번에 나누어 누적해도 dense 누적과 모든 맵이 비트 단위로 같음
+        rng = np.random.default_rng(5)
+        index, depths = rng.integers(0, 70 * 90, 3000), rng.random(3000)
+        dense, sparse = MapAccumulator((70, 90), MAP_TYPES), SparseMapAccumulator((70, 90), MAP_TYPES)
+        for part in (slice(0, 1000), slice(1000, None)):
+            dense.add(index[part], depths[part])
+            sparse.add(index[part], depths[part])
+        expected = dense.maps()
+        for name, image in sparse.maps().items():
+            self.assertEqual(image.dtype, expected[name].dtype)
+            np.testing.assert_array_equal(image, expected[name])
+        np.testing.assert_allclose(sparse.downsample().maps()['std_map'], dense.downsample().maps()['std_map'], atol=1e-6)
+
+        # 포인트가 있는 타일만 만들어지고, 타일은 전체 맵의 해당 영역과 같음
+        sparse = SparseMapAccumulator((70, 90), ['density_map'])
+        sparse.add(np.array([0, 5 * 90 + 85, 69 * 90 + 89]), np.zeros(3))
+        tiles = {(row, col): tile.maps()['density_map'] for row, col, tile in sparse.tiles(32)}
+        self.assertEqual(sorted(tiles), [(0, 0), (0, 2), (2, 2)])
+        self.assertEqual(tiles[(2, 2)].shape, (6, 26))
+        self.assertEqual(tiles[(0, 2)][5, 21], 1)
+
+        # auto는 포인트 개수 / 픽셀 개수 비율로 선택
+        self.assertIsInstance(Rasterizer((100, 100)).accumulator(['depth_map'], 10), SparseMapAccumulator)
+        self.assertIsInstance(Rasterizer((100, 100)).accumulator(['depth_map'], 10000), MapAccumulator)
+        self.assertIsInstance(Rasterizer((100, 100), backend='dense').accumulator(['depth_map'], 10), MapAccumulator)
+        with self.assertRaises(ValueError):
+            Rasterizer((100, 100), backend='hash')
+
+        # 큰 해상도 타일 저장: 포인트가 있는 타일과 tiles.json만 저장
+        projected_points = self.dp.project_to_2d(rng.random((2000, 3)), np.array([1, 0, 0]))
+        accumulator = self.dp.create_map_tiles(projected_points, {'density_map': 'result/test_tiles/density_map.npy'}, (4000, 4000), 1000)
+        with open('result/test_tiles/density_map/tiles.json', encoding='UTF8') as file:
+            manifest = json.load(file)
+        self.assertEqual((manifest['rows'], manifest['cols']), (4, 4))
+        total = sum(np.load(f'result/test_tiles/density_map/{row}_{col}.npy').sum() for row, col in manifest['tiles'])
+        self.assertEqual(total, len(projected_points))
+        self.assertLess(accumulator.nbytes, 4000 * 4000)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,157 @@
+import time
+import numpy as np
+import open3d as o3d
+from typing import Any, Callable, Optional, Tuple
+
+from logger import Logger
+
+
+class VoxelDownsampler:
+    def __init__(self, logger: Logger) -> None:
+        """노이즈 제거 전에 voxel grid로 포인트 개수를 줄이는 클래스.
+
+        voxel 크기를 직접 지정하거나, 목표 포인트 개수(target_points) 또는 노이즈 제거 시간 예산(time_budget)으로
+        voxel 크기를 자동으로 고른다. 자동 선택은 voxel 개수가 voxel 크기의 거듭제곱에 반비례한다고 보고,
+        실제 voxel 개수를 몇 번 세어 지수를 보정하면서 목표 개수에 맞는 크기를 찾는다.
+        voxel 개수는 open3d voxel_down_sample과 같은 격자 원점으로 계산한다.
+
+        Args:
+            logger : 로그 기록용 Logger 인스턴스.
+
+        """
+        self.logger: Logger = logger
+
+    def count_voxels(self, points: np.ndarray, voxel_size: float) -> int:
+        """voxel_size 격자에서 포인트가 있는 voxel 개수(다운샘플링 후 포인트 개수)를 센다.
+
+        Args:
+            points     : (N, 3) 형태의 xyz 좌표 배열.
+            voxel_size : voxel 한 변의 길이.
+        Returns:
+            포인트가 있는 voxel 개수.
+
+        """
+        origin: np.ndarray = points.min(axis=0) - voxel_size * 0.5  # open3d voxel_down_sample과 같은 원점
+        keys: np.ndarray = np.floor((points - origin) / voxel_size).astype(np.int64)
+        dims: np.ndarray = keys.max(axis=0) + 1
+        if float(dims[0]) * float(dims[1]) * float(dims[2]) >= 2 ** 62:  # 1차원 key가 넘치는 경우
+            return len(np.unique(keys, axis=0))
+        return len(np.unique((keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]))
+
+    def size_for_points(
+            self,
+            points: np.ndarray,
+            target_points: int,
+            tolerance: float = 0.05,
+            max_iterations: int = 8
+        ) -> float:
+        """다운샘플링 후 포인트 개수가 target_points에 가까워지는 voxel 크기를 찾는다.
+
+        스캔 데이터는 대부분 표면이므로 voxel 개수가 크기의 -2제곱에 비례한다고 보고 시작하며,
+        voxel 개수를 셀 때마다 실제 지수를 다시 계산한다. 보통 3~4번 안에 tolerance 안으로 들어온다.
+
+        Args:
+            points         : (N, 3) 형태의 xyz 좌표 배열.
+            target_points  : 목표 포인트 개수.
+            tolerance      : 목표 개수에 대한 허용 오차 비율.
+            max_iterations : voxel 개수를 세는 최대 횟수.
+        Returns:
+            voxel 크기. 포인트 개수가 이미 목표 이하이거나 범위가 0이면 0(다운샘플링 안 함).
+
+        """
+        largest: float = float(np.max(np.ptp(points, axis=0))) if len(points) else 0.0
+        if len(points) <= target_points or largest == 0:
+            return 0.0
+
+        exponent: float = 2.0  # voxel 개수 ~ voxel 크기^-exponent
+        voxel_size: float = largest / np.sqrt(target_points)
+        count: int = self.count_voxels(points, voxel_size)
+        for _ in range(max_iterations):
+            if abs(count - target_points) <= tolerance * target_points:
+                break
+            next_size: float = voxel_size * (count / target_points) ** (1 / exponent)
+            next_count: int = self.count_voxels(points, next_size)
+            if next_count != count and next_count > 0 and count > 0:
+                exponent = float(np.clip(-np.log(next_count / count) / np.log(next_size / voxel_size), 0.5, 3.0))
+            voxel_size, count = next_size, next_count
+        return voxel_size
+
+    def target_for_budget(
+            self,
+            pcd: o3d.geometry.PointCloud,
+            time_budget: float,
+            run_filter: Callable[[o3d.geometry.PointCloud], Any],
+            sample_size: int = 20000
+        ) -> int:
+        """노이즈 제거가 time_budget 초 안에 끝나는 포인트 개수를 추정한다.
+
+        최대 sample_size개를 무작위로 뽑아 run_filter 실행 시간을 재고, 이웃 탐색 비용을 n log n으로 보아
+        시간 예산에 맞는 포인트 개수를 계산한다. 무작위 샘플은 voxel 결과보다 밀도가 낮으므로 추정값은 근사치이다.
+
+        Args:
+            pcd         : 원본 포인트 클라우드.
+            time_budget : 노이즈 제거에 허용할 시간(초).
+            run_filter  : 포인트 클라우드 하나에 노이즈 제거를 실행하는 함수.
+            sample_size : 시간 측정에 사용할 최대 포인트 개수.
+        Returns:
+            목표 포인트 개수.
+
+        """
+        total: int = len(pcd.points)
+        sample: o3d.geometry.PointCloud = pcd.random_down_sample(min(1.0, sample_size / max(total, 1)))
+        measured: int = max(len(sample.points), 2)
+        start: float = time.perf_counter()
+        run_filter(sample)
+        seconds: float = max(time.perf_counter() - start, 1e-9)
+
+        cost: float = seconds / (measured * np.log(measured))  # 포인트 하나, log n 한 단위의 비용
+        target: float = time_budget / (cost * np.log(max(total, 2)))
+        for _ in range(3):  # t log t = time_budget / cost 고정점 반복
+            target = time_budget / (cost * np.log(max(target, 2)))
+        self.logger.info('Voxel time budget %ss: %s sample points took %.4fs, target %s points', args=(time_budget, measured, seconds, int(target)))
+        return int(np.clip(target, 1, total))
+
+    def downsample(
+            self,
+            pcd: o3d.geometry.PointCloud,
+            voxel_size: Optional[float] = None,
+            target_points: Optional[int] = None,
+            time_budget: Optional[float] = None,
+            run_filter: Optional[Callable[[o3d.geometry.PointCloud], Any]] = None
+        ) -> Tuple[o3d.geometry.PointCloud, float]:
+        """포인트 클라우드를 voxel grid로 다운샘플링한다. voxel마다 포함된 포인트들의 평균 위치 하나가 남는다.
+        voxel_size가 없으면 target_points, time_budget 중 더 적은 포인트 개수를 목표로 voxel 크기를 고른다.
+
+        Args:
+            pcd           : 원본 포인트 클라우드.
+            voxel_size    : 고정 voxel 크기.
+            target_points : 목표 포인트 개수.
+            time_budget   : 노이즈 제거 시간 예산(초). run_filter가 필요하다.
+            run_filter    : time_budget 추정에 사용할 노이즈 제거 함수.
+        Returns:
+            다운샘플링된 포인트 클라우드와 사용한 voxel 크기. 다운샘플링하지 않은 경우 원본과 0.
+        Raises:
+            ValueError: voxel_size, target_points, time_budget이 모두 없는 경우.
+
+        """
+        start: float = time.perf_counter()
+        total: int = len(pcd.points)
+        if not voxel_size:
+            if target_points is None and time_budget is None:
+                raise ValueError("Voxel downsampling needs voxel_size, target_points or time_budget")
+            targets = [target_points] if target_points is not None else []
+            if time_budget is not None and run_filter is not None:
+                targets.append(self.target_for_budget(pcd, time_budget, run_filter))
+            voxel_size = self.size_for_points(np.asarray(pcd.points), min(targets)) if targets else 0.0
+
+        if not voxel_size:
+            self.logger.info('Voxel downsampling skipped: %s points are within the target', args=(total,))
+            return pcd, 0.0
+
+        result: o3d.geometry.PointCloud = pcd.voxel_down_sample(voxel_size)
+        kept: int = len(result.points)
+        self.logger.info(
+            'Voxel downsampling: %s -> %s points (%.1f%%), voxel size %.6g, %.3fs',
+            args=(total, kept, 100 * kept / max(total, 1), voxel_size, time.perf_counter() - start)
+        )
+        return result, voxel_size
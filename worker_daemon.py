@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import numpy as np
+from typing import Dict, Any, Optional, List, TextIO
+
+from data_processing import DataProcessing
+from batch_processor import BatchProcessor
+
+
+class WorkerDaemon:
+    def __init__(self, dp: DataProcessing) -> None:
+        """open3d, numpy import와 DataProcessing -> DataManager -> ConfigFileManager -> Logger 생성,
+        YAML 설정 파일 읽기를 한 번만 하고, 이후 작업을 JSON lines로 받아 처리하는 상주 서비스 클래스.
+
+        작업(한 줄) 예)
+            {"id": 1, "input": "data/scan.pcd", "algorithm": "radius", "params": {"nb_points": 16, "radius": 0.05},
+             "projection_vector": [1, 0, 0], "outputs": {"depth_map": "result/scan_depth.16.png"}, "image_size": [100, 100]}
+        input 이외의 항목은 생략하면 YAML 설정 파일 값을 사용하며, 설정 파일이 수정되면 다시 읽는다. {"command": "shutdown"}을 받으면 종료한다.
+        outputs를 생략하면 2Dfile_paths의 디렉토리에 입력 파일별 이름으로 저장한다(BatchProcessor.output_paths 참고).
+        응답(한 줄)에는 ok, 출력 경로(outputs), 포인트 개수, 단계별 처리 시간(timings), 에러 메세지가 담긴다.
+
+        Args:
+            dp : 작업에 사용할 DataProcessing 인스턴스.
+
+        """
+        self.dp: DataProcessing = dp
+        self.batch: BatchProcessor = BatchProcessor(dp)  # 작업별 출력 경로 생성
+        self.jobs: int = 0
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """YAML 설정 값. 설정 파일이 수정된 경우 다음 작업부터 바뀐 값을 사용한다."""
+        return self.dp.dm.cm.get_config().data
+
+    def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """작업 하나를 실행한다. 에러가 발생해도 예외를 밖으로 던지지 않고 응답에 기록한다.
+
+        Args:
+            job : 입력 경로(input)와 algorithm, params, projection_vector, outputs, image_size 덮어쓰기 값.
+                  outputs가 없으면 2Dfile_paths의 맵마다 같은 디렉토리에 입력 파일별 경로를 만든다.
+        Returns:
+            작업 id, 성공 여부, 출력 경로, 포인트 개수, 단계별 처리 시간, 전체 처리 시간, 에러 메세지를 담은 딕셔너리.
+
+        """
+        config: Dict[str, Any] = self.config
+        noise_removal: Dict[str, Any] = config['algorithm_settings']['noise_removal']
+        result: Dict[str, Any] = {
+            'id': job.get('id'), 'ok': False, 'input': job.get('input'), 'outputs': {},
+            'points': 0, 'timings': {}, 'seconds': 0.0, 'error': None
+        }
+        start: float = time.perf_counter()
+
+        try:
+            outputs: Dict[str, str] = job.get('outputs') or {
+                name: path
+                for name, map_path in config['2Dfile_paths'].items()
+                for name, path in self.batch.output_paths(job['input'], {name: map_path}, os.path.dirname(map_path)).items()
+            }
+            stage: float = time.perf_counter()
+            img_3d = self.dp.load_cloud(
+                job['input'],
+                algorithm=job.get('algorithm', noise_removal['algorithms']),
+                params=job.get('params', noise_removal['params']),
+                tiling=noise_removal.get('tiling'),
+                cache=noise_removal.get('cache'),
+                voxel=config['algorithm_settings'].get('voxel_downsample'), 
+                roi=config['algorithm_settings'].get('roi')
+            )
+            result['points'] = len(img_3d) if isinstance(img_3d, np.ndarray) else len(img_3d.points)
+            result['timings']['load_cloud'] = time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            projected_points: np.ndarray = self.dp.project_to_2d(
+                img_3d,
+                projection_vector=np.array(job.get('projection_vector', config['algorithm_settings']['projection_vector']))
+            )
+            result['timings']['project_to_2d'] = time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            image_size = job.get('image_size', config['algorithm_settings'].get('image_size', [100, 100]))
+            self.dp.create_maps(projected_points, map_paths=outputs, image_size=tuple(image_size))
+            result['timings']['create_maps'] = time.perf_counter() - stage
+
+            result['outputs'] = outputs
+            result['ok'] = True
+        except Exception as e:
+            self.dp.dm.cm.logger.exception(f"Daemon job failed: {job.get('input')}--> {e}", name=f"[{self.__class__.__name__}] ")
+            result['error'] = f"{type(e).__name__}: {e}"
+
+        result['seconds'] = time.perf_counter() - start
+        self.jobs += 1
+        return result
+
+    def handle_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """JSON 한 줄을 처리한다.
+
+        Args:
+            line : 작업 또는 명령 JSON 문자열.
+        Returns:
+            응답 딕셔너리. shutdown 명령인 경우 None.
+
+        """
+        try:
+            job: Dict[str, Any] = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {'id': None, 'ok': False, 'error': f"Invalid JSON: {e}"}
+        if not isinstance(job, dict):
+            return {'id': None, 'ok': False, 'error': f"Job must be a JSON object: {line.strip()[:100]}"}
+
+        if job.get('command') == 'shutdown':
+            self.dp.dm.cm.logger.info(f'Daemon shutdown after {self.jobs} jobs')
+            return None
+        if job.get('command') == 'ping':
+            return {'id': job.get('id'), 'ok': True, 'jobs': self.jobs}
+        if 'input' not in job:
+            return {'id': job.get('id'), 'ok': False, 'error': "Job has no 'input' path"}
+        return self.run_job(job)
+
+    def serve_stream(self, reader: TextIO, writer: TextIO) -> bool:
+        """reader에서 한 줄씩 작업을 읽어 처리하고, 응답을 writer에 한 줄씩 쓴다.
+
+        Args:
+            reader : 작업을 읽을 텍스트 스트림.
+            writer : 응답을 쓸 텍스트 스트림.
+        Returns:
+            shutdown 명령을 받았으면 True, 스트림이 끝났으면 False.
+
+        """
+        for line in reader:
+            if not line.strip():
+                continue
+            response: Optional[Dict[str, Any]] = self.handle_line(line)
+            if response is None:
+                return True
+            writer.write(json.dumps(response) + '\n')
+            writer.flush()
+        return False
+
+    def serve_stdio(self) -> None:
+        """표준 입력으로 작업을 받고 표준 출력으로 응답한다.
+        open3d 등이 표준 출력에 직접 쓰는 메세지가 응답과 섞이지 않도록, 응답용 파일 디스크립터를 따로 복제하고
+        표준 출력(fd 1)은 표준 에러로 돌린다.
+
+        Args:
+            없음.
+        Returns:
+            없음.
+
+        """
+        sys.stdout.flush()
+        sys.stdin.reconfigure(errors='replace')  # UTF-8이 아닌 줄은 JSON 에러 응답으로 처리
+        protocol: TextIO = os.fdopen(os.dup(1), 'w', encoding='UTF8')
+        os.dup2(2, 1)
+        self.dp.dm.cm.logger.info('Daemon serving on stdin')
+        with protocol:
+            self.serve_stream(sys.stdin, protocol)
+
+    def serve_socket(self, path: str) -> None:
+        """Unix 소켓으로 작업을 받는다. 연결은 하나씩 순서대로 처리하며, shutdown 명령을 받으면 종료한다.
+        응답을 받기 전에 연결을 끊은 클라이언트 등 연결별 에러는 로그에 기록하고 다음 연결을 계속 받는다.
+
+        Args:
+            path : Unix 소켓 파일 경로.
+        Returns:
+            없음.
+
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        server: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen()
+        self.dp.dm.cm.logger.info(f'Daemon serving on {path}')
+
+        try:
+            with server:
+                while True:
+                    connection, _ = server.accept()
+                    try:
+                        with connection, connection.makefile('r', encoding='UTF8', errors='replace') as reader, \
+                                connection.makefile('w', encoding='UTF8') as writer:
+                            if self.serve_stream(reader, writer):
+                                break
+                    except OSError as e:  # BrokenPipeError, ConnectionResetError 등
+                        self.dp.dm.cm.logger.warning(f'Daemon connection closed--> {e}', name=f"[{self.__class__.__name__}] ")
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def send_jobs(path: str, jobs: List[Dict[str, Any]], shutdown: bool = False) -> List[Dict[str, Any]]:
+    """Unix 소켓으로 실행 중인 WorkerDaemon에 작업들을 보내고 응답을 받는다.
+
+    Args:
+        path     : Unix 소켓 파일 경로.
+        jobs     : 작업 목록.
+        shutdown : 작업이 끝난 뒤 daemon을 종료할지 여부.
+    Returns:
+        작업 순서대로의 응답 목록.
+
+    """
+    responses: List[Dict[str, Any]] = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        with client.makefile('r', encoding='UTF8') as reader, client.makefile('w', encoding='UTF8') as writer:
+            for job in jobs:
+                writer.write(json.dumps(job) + '\n')
+                writer.flush()
+                responses.append(json.loads(reader.readline()))
+            if shutdown:
+                writer.write(json.dumps({'command': 'shutdown'}) + '\n')
+                writer.flush()
+    return responses
+
+
+def main(args: Optional[Any] = None) -> int:
+    """상주 서비스 CLI.
+
+    python worker_daemon.py --stdio
+    python worker_daemon.py --socket /tmp/image_processing.sock
+    python worker_daemon.py --job '{"input": "data/sample_data.pcd"}'
+
+    --job은 작업 하나를 실행하고 종료한다(매번 새로 실행하는 CLI와 같은 비용). 작업이 실패하면 1을 반환한다.
+
+    """
+    parser = argparse.ArgumentParser(description='Image processing worker daemon')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--stdio', action='store_true', help='read JSON lines jobs from stdin')
+    mode.add_argument('--socket', help='serve JSON lines jobs on a Unix socket')
+    mode.add_argument('--job', help='run a single JSON job and exit')
+    parsed = parser.parse_args(args)
+
+    daemon: WorkerDaemon = WorkerDaemon(DataProcessing())
+    if parsed.stdio:
+        daemon.serve_stdio()
+    elif parsed.socket:
+        daemon.serve_socket(parsed.socket)
+    else:
+        response: Optional[Dict[str, Any]] = daemon.handle_line(parsed.job)
+        print(json.dumps(response))
+        return 0 if response and response['ok'] else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
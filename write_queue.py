@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Any, List
+
+from logger import Logger
+
+
+class WriteQueue:
+    def __init__(self, logger: Logger, workers: int = 2, max_pending: int = 8) -> None:
+        """맵 저장 작업을 백그라운드 스레드에서 실행하는 bounded 작업 큐 클래스.
+
+        PNG 인코딩(zlib)과 파일 쓰기는 GIL을 놓고 실행되므로, 저장하는 동안 다음 단계의 계산을 진행할 수 있다.
+        대기 중인 작업이 max_pending 개가 되면 submit이 빈 자리가 생길 때까지 기다린다(backpressure).
+        따라서 저장이 계산보다 느려도 메모리에 쌓이는 맵 배열은 max_pending 개를 넘지 않는다.
+        작업 중 발생한 예외는 호출한 쪽으로 전달되지 않고 Logger에 기록된다.
+
+        Args:
+            logger      : 로그 기록용 Logger 인스턴스.
+            workers     : 저장 스레드 개수.
+            max_pending : 실행 중인 작업을 포함한 최대 대기 작업 개수.
+
+        """
+        self.logger: Logger = logger
+        self.max_pending: int = max(max_pending, 1)
+        self.failed: List[str] = []  # 저장에 실패한 작업 이름
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_pending)
+        self._pending: List[Future] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='map-writer')
+
+    def submit(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """저장 작업을 큐에 넣는다. 큐가 가득 차 있으면 빈 자리가 생길 때까지 기다린다.
+        작업이 끝날 때까지 전달한 배열을 수정하지 않아야 한다.
+
+        Args:
+            name   : 로그 기록용 작업 이름(저장 경로).
+            fn     : 실행할 저장 함수.
+            args   : fn에 전달할 인자.
+            kwargs : fn에 전달할 키워드 인자.
+        Returns:
+            작업의 Future.
+
+        """
+        if not self._slots.acquire(blocking=False):
+            self.logger.info(f'Write queue is full ({self.max_pending} pending). Waiting: {name}')
+            self._slots.acquire()
+
+        future: Future = self._pool.submit(self._run, name, fn, *args, **kwargs)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+        return future
+
+    def _run(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            self.failed.append(name)
+            self.logger.exception(f"Map write failed: {name}--> {e}", name=f"[{self.__class__.__name__}] ")
+        finally:
+            self._slots.release()
+
+    def flush(self) -> List[str]:
+        """큐에 들어간 모든 작업이 끝날 때까지 기다린다.
+
+        Args:
+            없음.
+        Returns:
+            지금까지 저장에 실패한 작업 이름 목록.
+
+        """
+        with self._lock:
+            pending: List[Future] = self._pending
+            self._pending = []
+        for future in pending:
+            future.result()
+        return list(self.failed)
+
+    def close(self) -> List[str]:
+        """남은 작업을 모두 저장하고 스레드를 종료한다.
+
+        Args:
+            없음.
+        Returns:
+            저장에 실패한 작업 이름 목록.
+
+        """
+        failed: List[str] = self.flush()
+        self._pool.shutdown(wait=True)
+        if failed:
+            self.logger.error(f'Write queue closed with {len(failed)} failed writes')
+        return failed
+
+    def __enter__(self) -> 'WriteQueue':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()